@@ -1,52 +1,67 @@
-import functools
 import string
-from math import floor
 
+# Excel's last column is "XFD".
+MAX_COLUMNS = 16384
 
-def _convert_number_to_letter(num):
-    if num >= 26:
-        return _convert_number_to_letter(floor(num / 26) - 1) + string.ascii_uppercase[num % 26]
-    else:
-        return string.ascii_uppercase[num]
+_letters = string.ascii_uppercase
+
+
+def column_letter(index):
+    """Convert a zero-based column `index` into its column letters.
+
+    Examples:
+        >>> column_letter(0)
+        'A'
+        >>> column_letter(26)
+        'AA'
+        >>> column_letter(16383)
+        'XFD'
+    """
+    result = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        result = _letters[remainder] + result
+    return result
+
+
+def column_index(letters):
+    """Convert column `letters` into their zero-based column index.
+
+    Examples:
+        >>> column_index('A')
+        0
+        >>> column_index('AA')
+        26
+        >>> column_index('XFD')
+        16383
+    """
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
 
 
 def _column_letters():
-    itr = 0
-    while True:
-        yield _convert_number_to_letter(itr)
-        itr += 1
+    for itr in range(MAX_COLUMNS):
+        yield column_letter(itr)
 
 
 class _Alphabet:
-    def __init__(self, starting_length=26):
-        self.letters = []
-        self.letter_offset = {}
+    """An immutable table of every column's letters, in both directions."""
 
-        self.column_letter_factory = _column_letters()
-        self._generate_more_letters(starting_length)
+    def __init__(self):
+        self.letters = tuple(_column_letters())
+        self.letter_offset = {letter: i for i, letter in enumerate(self.letters)}
 
-    @functools.lru_cache()
     def index(self, value):
-        try:
-            return self.letter_offset[value]
-        except KeyError:
-            required_letter_count = len(value) * 26
-            self._generate_more_letters(required_letter_count)
-            return self.letter_offset[value]
+        return self.letter_offset[value]
 
     def __getitem__(self, item):
-        try:
-            return self.letters[item]
-        except (IndexError, KeyError):
-            self._generate_more_letters(item)
-            return self.letters[item]
-
-    def _generate_more_letters(self, max_letter_index):
-        letter_count = len(self.letters)
-        for i in range(letter_count, max_letter_index + 1):
-            next_letter = next(self.column_letter_factory)
-            self.letter_offset[next_letter] = i
-            self.letters.append(next_letter)
+        return self.letters[item]
+
+    def __len__(self):
+        return len(self.letters)
 
     def __repr__(self):
         return "Alphabet(letter_count={})".format(len(self.letter_offset))
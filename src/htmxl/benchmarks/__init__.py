@@ -0,0 +1,169 @@
+"""Benchmark the composition of a variety of workbooks, and compare the results to a baseline.
+
+Run with ``python -m htmxl.benchmarks --help``.
+
+Each case is composed with each parser a number of times, and the fastest time of each phase
+(render, parse, write, save) is kept, along with the peak memory of a separate run traced with
+`tracemalloc` (which would otherwise skew the times).
+"""
+import importlib.util
+import io
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from htmxl.benchmarks.cases import Case, cases
+from htmxl.compose import ComposeReport, Workbook
+from htmxl.token import available_parsers
+
+phase_names = ["render", "parse", "write", "save"]
+
+
+@dataclass
+class Result:
+    """The resources used to compose a case with a given parser.
+
+    Attributes:
+        case: The name of the case.
+        parser: The name of the parser.
+        phases: The fastest time of each phase, in seconds, summed across sheets.
+        total: The fastest total time (of any one run), in seconds.
+        peak_memory: The peak memory allocated while composing the workbook, in bytes.
+    """
+
+    case: str
+    parser: str
+    phases: Dict[str, float] = field(default_factory=dict)
+    total: float = 0.0
+    peak_memory: int = 0
+
+    @property
+    def key(self):
+        return f"{self.case}[{self.parser}]"
+
+
+@dataclass
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    result: float
+
+    @property
+    def ratio(self):
+        return self.result / self.baseline
+
+    def __str__(self):
+        return "{} {}: {:.4g} -> {:.4g} ({:+.1%})".format(
+            self.key, self.metric, self.baseline, self.result, self.ratio - 1
+        )
+
+
+def compose(case: Case, parser: str, sheets: List[Dict], report: ComposeReport):
+    workbook = Workbook(styles=case.styles, parser=parser, **case.options)
+    for data in sheets:
+        workbook.add_sheet_from_template(case.template, data=data)
+    return workbook.compose(io.BytesIO(), report=report)
+
+
+def run_case(case: Case, parser: str, scale: float = 1.0, repeat: int = 3) -> Result:
+    """Compose `case` with `parser` `repeat` times, and measure the resources used."""
+    sheets = case.sheets(scale)
+    result = Result(case=case.name, parser=parser)
+
+    for _ in range(repeat):
+        report = compose(case, parser, sheets, ComposeReport(trace_memory=False))
+
+        phases = dict.fromkeys(phase_names, 0.0)
+        for sheet in report.sheets:
+            for name, phase in sheet.phases.items():
+                phases[name] += phase.wall_time
+        phases["save"] = report.phases["save"].wall_time
+        total = report.phases["write"].wall_time + report.phases["save"].wall_time
+
+        for name, wall_time in phases.items():
+            if name not in result.phases or wall_time < result.phases[name]:
+                result.phases[name] = wall_time
+        if not result.total or total < result.total:
+            result.total = total
+
+    report = compose(case, parser, sheets, ComposeReport(trace_memory=True))
+    result.peak_memory = max(phase.peak_memory for phase in report.phases.values())
+    return result
+
+
+def run(
+    case_names: Optional[List[str]] = None,
+    parsers: Optional[List[str]] = None,
+    scale: float = 1.0,
+    repeat: int = 3,
+    on_result=None,
+) -> List[Result]:
+    """Run each of the named cases (by default all of them) with each of the `parsers`."""
+    if parsers is None:
+        parsers = available_parsers()
+
+    results = []
+    for case_name in case_names or list(cases):
+        case = cases[case_name]
+        if case.requires is not None and importlib.util.find_spec(case.requires) is None:
+            continue
+
+        for parser in parsers:
+            result = run_case(case, parser, scale=scale, repeat=repeat)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def compare(
+    results: List[Result], baseline: Dict, threshold: float = 0.2, min_time: float = 0.01
+) -> List[Regression]:
+    """Return the metrics of `results` which exceed those of the `baseline` by over `threshold`.
+
+    Times which exceed their baseline by less than `min_time` seconds are considered noise, and
+    results without a baseline (for example, of a newly added case) are ignored.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.key)
+        if expected is None:
+            continue
+
+        metrics = [("total", expected["total"], result.total)]
+        metrics.extend(
+            (name, expected["phases"][name], wall_time)
+            for name, wall_time in result.phases.items()
+            if name in expected["phases"]
+        )
+        metrics.append(("peak_memory", expected["peak_memory"], result.peak_memory))
+
+        for metric, expected_value, value in metrics:
+            if metric != "peak_memory" and value - expected_value < min_time:
+                continue
+
+            if expected_value and value > expected_value * (1 + threshold):
+                regressions.append(Regression(result.key, metric, expected_value, value))
+    return regressions
+
+
+def load_baseline(path) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results: List[Result]):
+    with open(path, "w") as f:
+        json.dump({result.key: asdict(result) for result in results}, f, indent=2, sort_keys=True)
+
+
+def format_result(result: Result) -> str:
+    phases = " ".join(
+        "{}={:.3f}s".format(name, result.phases[name])
+        for name in phase_names
+        if result.phases[name]
+    )
+    return "{:<32} total={:.3f}s {} peak_memory={:.1f}MiB".format(
+        result.key, result.total, phases, result.peak_memory / 2**20
+    )
@@ -0,0 +1,76 @@
+import argparse
+import sys
+
+from htmxl.benchmarks import compare, format_result, load_baseline, run, save_baseline
+from htmxl.benchmarks.cases import cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m htmxl.benchmarks",
+        description="Benchmark the composition of a variety of workbooks.",
+    )
+    parser.add_argument("cases", nargs="*", metavar="case", help="The cases to run (default all).")
+    parser.add_argument(
+        "--parser", action="append", dest="parsers", help="A parser to run each case with."
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="A multiplier on the size of each case."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="The number of times to time each case."
+    )
+    parser.add_argument("--baseline", help="A file of results to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="The fraction by which a result may exceed its baseline before it's a regression.",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.01,
+        help="The number of seconds by which a time must exceed its baseline to be a regression.",
+    )
+    parser.add_argument("--save", help="A file to save the results to, as a new baseline.")
+    parser.add_argument("--list", action="store_true", help="List the available cases.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in cases.values():
+            print("{:<16} {}".format(case.name, case.description))
+        return 0
+
+    unknown_cases = set(args.cases) - set(cases)
+    if unknown_cases:
+        parser.error("Unknown cases: {}".format(", ".join(sorted(unknown_cases))))
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+
+    results = run(
+        case_names=args.cases,
+        parsers=args.parsers,
+        scale=args.scale,
+        repeat=args.repeat,
+        on_result=lambda result: print(format_result(result), flush=True),
+    )
+
+    if args.save:
+        save_baseline(args.save, results)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, threshold=args.threshold, min_time=args.min_time)
+        if regressions:
+            print("\nRegressions beyond {:.0%}:".format(args.threshold))
+            for regression in regressions:
+                print("  {}".format(regression))
+            return 1
+
+        print("\nNo regressions beyond {:.0%}.".format(args.threshold))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
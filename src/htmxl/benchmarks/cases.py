@@ -0,0 +1,397 @@
+"""The templates (and data) composed by the benchmarks.
+
+Each case's data is produced for a given `scale`, such that the same cases can be run quickly
+(as a smoke test) or at production-like sizes.
+"""
+import datetime
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class Case:
+    """A workbook to compose, with one sheet per item of the data produced by `sheets`.
+
+    The `options` are passed to the `Workbook`, such as the `mode` to compose it in, and cases
+    which `require` a module are skipped unless it's installed.
+    """
+
+    name: str
+    description: str
+    template: str
+    sheets: Callable[[float], List[Dict]]
+    styles: List[Dict] = field(default_factory=list)
+    options: Dict = field(default_factory=dict)
+    requires: Optional[str] = None
+
+
+def _count(count, scale):
+    return max(1, int(count * scale))
+
+
+wide_table_template = """
+<table>
+  <thead>
+    <tr>
+      {% for column in columns %}
+      <th>{{ column }}</th>
+      {% endfor %}
+    </tr>
+  </thead>
+  <tbody>
+    {% for row in rows %}
+    <tr>
+      {% for value in row %}
+      <td data-type="int">{{ value }}</td>
+      {% endfor %}
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+"""
+
+
+def wide_table(scale):
+    columns = [f"column_{i}" for i in range(100)]
+    rows = [[i * j for j in range(len(columns))] for i in range(_count(200, scale))]
+    return [dict(columns=columns, rows=rows)]
+
+
+_depth = 25
+deep_nesting_template = (
+    "{% for row in rows %}\n"
+    + "<div>" * _depth
+    + "<span>{{ row.name }}</span><span>{{ row.value }}</span>"
+    + "</div>" * _depth
+    + "\n{% endfor %}\n"
+)
+
+
+def deep_nesting(scale):
+    rows = [dict(name=f"row {i}", value=i) for i in range(_count(500, scale))]
+    return [dict(rows=rows)]
+
+
+class_styling_styles = [
+    {"name": "bold", "font": {"bold": True}},
+    {"name": "italic", "font": {"italic": True}},
+    {"name": "red", "font": {"color": "FF0000"}},
+    {"name": "shaded", "pattern_fill": {"fill_type": "solid", "fgColor": "DDDDDD"}},
+    {"name": "money", "number_format": "$#,##0.00"},
+    {
+        "name": "boxed",
+        "border": {"top": {"style": "thin"}, "bottom": {"style": "thin"}},
+    },
+]
+
+class_styling_template = """
+<table>
+  <thead class="bold boxed">
+    <tr>
+      <th>Name</th>
+      <th>Amount</th>
+      <th>Change</th>
+      <th>Notes</th>
+    </tr>
+  </thead>
+  <tbody>
+    {% for row in rows %}
+    <tr{% if loop.index is even %} class="shaded"{% endif %}>
+      <td class="bold">{{ row.name }}</td>
+      <td class="money boxed" data-type="float">{{ row.amount }}</td>
+      <td class="{{ 'red' if row.change < 0 else 'bold' }} money" data-type="float">
+        {{ row.change }}
+      </td>
+      <td class="italic" style="text-align: center">{{ row.notes }}</td>
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+"""
+
+
+def class_styling(scale):
+    rows = [
+        dict(name=f"row {i}", amount=i * 1.5, change=(i % 7) - 3, notes="n/a")
+        for i in range(_count(2000, scale))
+    ]
+    return [dict(rows=rows)]
+
+
+merges_template = """
+{% for group in groups %}
+<table>
+  <thead>
+    <tr>
+      <th colspan="3">{{ group.name }}</th>
+      <th rowspan="2">Total</th>
+    </tr>
+    <tr>
+      <th>a</th>
+      <th>b</th>
+      <th>c</th>
+    </tr>
+  </thead>
+  <tbody>
+    {% for row in group.rows %}
+    <tr>
+      <td>{{ row.a }}</td>
+      <td>{{ row.b }}</td>
+      <td>{{ row.c }}</td>
+      <td>{{ row.a + row.b + row.c }}</td>
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+{% endfor %}
+"""
+
+
+def merges(scale):
+    groups = [
+        dict(name=f"group {i}", rows=[dict(a=j, b=j * 2, c=j * 3) for j in range(5)])
+        for i in range(_count(400, scale))
+    ]
+    return [dict(groups=groups)]
+
+
+datalist_template = """
+<datalist id="statuses">
+  {% for status in statuses %}
+  <option value="{{ status }}" />
+  {% endfor %}
+</datalist>
+<table>
+  {% for row in rows %}
+  <tr>
+    <td>{{ row.name }}</td>
+    <td><input list="statuses" value="{{ row.status }}" /></td>
+  </tr>
+  {% endfor %}
+</table>
+"""
+
+
+def datalist(scale):
+    statuses = ["open", "pending", "closed"]
+    rows = [dict(name=f"row {i}", status=statuses[i % 3]) for i in range(_count(2000, scale))]
+    return [dict(statuses=statuses, rows=rows)]
+
+
+rows_template = """
+<table>
+  <thead>
+    <tr>
+      <th>Name</th>
+      <th>Value</th>
+      <th>Date</th>
+    </tr>
+  </thead>
+  <tbody>
+    {% for row in rows %}
+    <tr>
+      <td>{{ row.name }}</td>
+      <td data-type="int">{{ row.value }}</td>
+      <td data-type="date">{{ row.date }}</td>
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+"""
+
+
+def _rows(count):
+    return [
+        dict(name=f"row {i}", value=i, date="2020-01-{:02}".format(i % 28 + 1))
+        for i in range(count)
+    ]
+
+
+def multi_sheet(scale):
+    return [dict(rows=_rows(_count(1000, scale))) for _ in range(10)]
+
+
+def large_rows(scale):
+    return [dict(rows=_rows(_count(50000, scale)))]
+
+
+bound_rows_template = """
+<table>
+  <thead>
+    <tr>
+      <th>Name</th>
+      <th>Value</th>
+      <th>Date</th>
+    </tr>
+  </thead>
+  <tbody data-rows="rows">
+    <tr>
+      <td data-field="name"></td>
+      <td data-field="value" data-type="int"></td>
+      <td data-field="date" data-type="date"></td>
+    </tr>
+  </tbody>
+</table>
+"""
+
+
+# The text of each of the enclosing elements is that of the whole table.
+deep_table_template = "<div>" * _depth + rows_template + "</div>" * _depth
+
+
+def deep_table(scale):
+    return [dict(rows=_rows(_count(5000, scale)))]
+
+
+cell_values_template = rows_template.replace("{{ row.value }}", "{{ row.value | cell }}").replace(
+    "{{ row.date }}", "{{ row.date | cell }}"
+)
+
+
+def cell_values(scale):
+    rows = [
+        dict(name=f"row {i}", value=i, date=datetime.date(2020, 1, i % 28 + 1))
+        for i in range(_count(50000, scale))
+    ]
+    return [dict(rows=rows)]
+
+
+typed_cells_template = """
+<table>
+  <colgroup>
+    <col data-type="date" />
+    <col span="2" data-type="datetime" />
+  </colgroup>
+  <thead>
+    <tr>
+      <th>Date</th>
+      <th>Created</th>
+      <th>Updated</th>
+      <th data-column-type="int">Count</th>
+      <th data-column-type="decimal">Amount</th>
+      <th data-column-type="percent">Rate</th>
+      <th data-column-type="float">Score</th>
+      <th data-column-type="bool">Active</th>
+      <th data-column-type="date">Due</th>
+      <th data-column-type="int">Rank</th>
+    </tr>
+  </thead>
+  <tbody>
+    {% for row in rows %}
+    <tr>
+      <td>{{ row.date }}</td>
+      <td>{{ row.created }}</td>
+      <td>{{ row.updated }}</td>
+      <td>{{ row.count }}</td>
+      <td>{{ row.amount }}</td>
+      <td>{{ row.rate }}%</td>
+      <td>{{ row.score }}</td>
+      <td>{{ row.active }}</td>
+      <td>{{ row.due }}</td>
+      <td>{{ row.rank }}</td>
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+"""
+
+
+def typed_cells(scale):
+    rows = [
+        dict(
+            date="2020-01-{:02}".format(i % 28 + 1),
+            created="2020-01-{:02}T{:02}:00:00".format(i % 28 + 1, i % 24),
+            updated="2020-02-{:02} 12:{:02}:00".format(i % 28 + 1, i % 60),
+            count=i,
+            amount="{}.{:02}".format(i, i % 100),
+            rate=i % 100,
+            score=i * 0.5,
+            active=i % 2 == 0,
+            due="2021-{:02}-01".format(i % 12 + 1),
+            rank=i % 10,
+        )
+        for i in range(_count(100000, scale))
+    ]
+    return [dict(rows=rows)]
+
+
+def bound_columns(scale):
+    rows = _rows(_count(50000, scale))
+    return [dict(rows={name: [row[name] for row in rows] for name in rows[0]})]
+
+
+cases = {
+    case.name: case
+    for case in [
+        Case("wide_table", "A table of 100 columns.", wide_table_template, wide_table),
+        Case(
+            "deep_nesting",
+            f"Rows of elements nested {_depth} deep.",
+            deep_nesting_template,
+            deep_nesting,
+        ),
+        Case(
+            "class_styling",
+            "Cells styled by combinations of classes and inline styles.",
+            class_styling_template,
+            class_styling,
+            styles=class_styling_styles,
+        ),
+        Case("merges", "Many tables with colspan/rowspan headers.", merges_template, merges),
+        Case("datalist", "A list validation on every row.", datalist_template, datalist),
+        Case("multi_sheet", "Many sheets of the same template.", rows_template, multi_sheet),
+        Case("large_rows", "A very long table.", rows_template, large_rows),
+        Case(
+            "streaming_rows",
+            "The very long table of large_rows, in streaming mode.",
+            rows_template,
+            large_rows,
+            options=dict(mode="streaming"),
+        ),
+        Case(
+            "native_rows",
+            "The very long table of large_rows, in native mode.",
+            rows_template,
+            large_rows,
+            options=dict(mode="native"),
+        ),
+        Case(
+            "xlsxwriter_rows",
+            "The very long table of large_rows, written by xlsxwriter.",
+            rows_template,
+            large_rows,
+            options=dict(engine="xlsxwriter"),
+            requires="xlsxwriter",
+        ),
+        Case(
+            "bound_rows",
+            "The very long table of large_rows, bound to its data.",
+            bound_rows_template,
+            large_rows,
+        ),
+        Case(
+            "cell_values",
+            "The very long table of large_rows, with its values passed by the cell filter.",
+            cell_values_template,
+            cell_values,
+        ),
+        Case(
+            "typed_cells",
+            "A million cells, converted by the data-type declared for their column.",
+            typed_cells_template,
+            typed_cells,
+        ),
+        Case(
+            "bound_columns",
+            "The very long table of large_rows, bound to its data by column.",
+            bound_rows_template,
+            bound_columns,
+        ),
+        Case(
+            "deep_table",
+            f"A long table within elements nested {_depth} deep.",
+            deep_table_template,
+            deep_table,
+        ),
+    ]
+}
@@ -1,5 +1,8 @@
 # flake8: noqa
 from htmxl.compose.cell import Cell
+from htmxl.compose.profile import Profiler
+from htmxl.compose.report import ComposeReport
 from htmxl.compose.style import Styler
+from htmxl.compose.template import TemplateCache
 from htmxl.compose.workbook import Workbook, Worksheet
 from htmxl.compose.write import Writer
@@ -2,3 +2,7 @@
 
 DATA_AUTOFILTER = "data-autofilter"
 DATA_MERGE = "data-merge"
+DATA_PARALLEL = "data-parallel"
+DATA_ROWS = "data-rows"
+DATA_FIELD = "data-field"
+DATA_COLUMN_TYPE = "data-column-type"
@@ -0,0 +1,129 @@
+"""The engines which the sheets of a workbook are written out with.
+
+Whichever the engine, a :class:`Writer` lays each sheet out onto openpyxl cells, whose styles are
+registered in the style tables of an openpyxl workbook (the backend's `wb`), by way of the
+:class:`Styler`. Every sheet written to supports the subset of the openpyxl `Worksheet` API that
+writers use:
+
+* ``cell(row, column, value)`` to write cells (and ``sheet[ref]`` for ranges of them),
+* ``merge_cells(ref)`` and ``merged_cells``,
+* ``column_dimensions[letter].width`` and ``row_dimensions[row].height``,
+* ``auto_filter.ref``,
+* ``add_data_validation(validation)``, to which cells are then added.
+
+A backend creates the sheet (and the writer writing to it) for each of the workbook's sheets,
+and saves the workbook, determining where and how what was written to those sheets ends up in
+the saved file.
+"""
+import openpyxl
+
+from htmxl.compose.write import NativeWriter, StreamingWriter, Writer
+
+
+class Backend:
+    """The engine which the sheets of a workbook are written out with.
+
+    Args:
+        mode: The name of one of the backend's `writers_by_mode`, by default its `default_mode`.
+        workbook_kwargs: Keyword arguments forwarded to the `openpyxl.workbook.Workbook`.
+    """
+
+    writers_by_mode = {}
+    default_mode = None
+
+    def __init__(self, mode=None, workbook_kwargs=None):
+        if mode is None:
+            mode = self.default_mode
+
+        if mode not in self.writers_by_mode:
+            mode_options = ", ".join(self.writers_by_mode)
+            raise ValueError(f"Unknown mode '{mode}', expected one of: {mode_options}.")
+
+        self.mode = mode
+        self.writer_class = self.writers_by_mode[mode]
+        self.wb = self.create_workbook(workbook_kwargs or {})
+
+    def create_workbook(self, workbook_kwargs):
+        """Create the openpyxl workbook, in whose tables the styles of cells are registered."""
+        wb = openpyxl.workbook.Workbook(**workbook_kwargs)
+        if wb.worksheets:
+            wb.remove(wb.worksheets[0])
+        return wb
+
+    def create_writer(self, title):
+        """Create a sheet named `title`, and the writer writing to it."""
+        raise NotImplementedError()
+
+    def save(self, file_path):
+        """Save the workbook to `file_path`, a path or file-like object."""
+        raise NotImplementedError()
+
+
+class OpenpyxlBackend(Backend):
+    """Write each sheet to the openpyxl workbook, and save it with openpyxl.
+
+    In "default" mode, the whole workbook is held in memory until it is saved. Otherwise, the
+    workbook is write-only, and each row is written out as soon as its layout is final.
+    """
+
+    writers_by_mode = {
+        "default": Writer,
+        "streaming": StreamingWriter,
+        "native": NativeWriter,
+    }
+    default_mode = "default"
+
+    def create_workbook(self, workbook_kwargs):
+        if self.mode != "default":
+            workbook_kwargs = {**workbook_kwargs, "write_only": True}
+        return super().create_workbook(workbook_kwargs)
+
+    def create_writer(self, title):
+        return self.writer_class(self.wb.create_sheet(title))
+
+    def save(self, file_path):
+        self.wb.save(file_path)
+
+
+class XlsxWriterBackend(Backend):
+    """Write the rows of each sheet with xlsxwriter, in its `constant_memory` mode.
+
+    Rows are streamed just as in openpyxl's "streaming" mode, but each is written to xlsxwriter
+    as soon as it is final, with the style of each cell translated into an xlsxwriter `Format`.
+    The openpyxl workbook only records the styles, merged cells, dimensions, autofilter and
+    validations of each sheet, and is never itself saved.
+    """
+
+    writers_by_mode = {"streaming": StreamingWriter}
+    default_mode = "streaming"
+
+    def create_workbook(self, workbook_kwargs):
+        from htmxl.compose.write.xlsx import XlsxWriterWorkbook
+
+        wb = super().create_workbook({**workbook_kwargs, "write_only": True})
+        self.workbook = XlsxWriterWorkbook(wb)
+        return wb
+
+    def create_writer(self, title):
+        return self.writer_class(self.workbook.create_sheet(self.wb.create_sheet(title)))
+
+    def save(self, file_path):
+        self.workbook.save(file_path)
+
+
+_backends_by_engine = {
+    "openpyxl": OpenpyxlBackend,
+    "xlsxwriter": XlsxWriterBackend,
+}
+
+
+def get_backend(engine) -> type:
+    """Return the `Backend` class named `engine` (or `engine` itself, if already a backend)."""
+    if isinstance(engine, type) and issubclass(engine, Backend):
+        return engine
+
+    try:
+        return _backends_by_engine[engine]
+    except KeyError:
+        engine_options = ", ".join(_backends_by_engine)
+        raise ValueError(f"Unknown engine '{engine}', expected one of: {engine_options}.")
@@ -0,0 +1,170 @@
+"""Tables whose rows are bound directly to data, rather than rendered by the template.
+
+The content of a `<tbody data-rows="rows">` is the template of a single row, which is written once
+per item of the iterable named by `data-rows` (looked up in the sheet's data). The cells of the
+template with a `data-field` attribute are written with that field of the item, as is, without
+being rendered to (and then parsed back from) html.
+
+.. code-block:: html
+
+   <tbody data-rows="rows">
+     <tr>
+       <td data-field="name"></td>
+       <td data-field="value" data-type="int"></td>
+     </tr>
+   </tbody>
+
+The rows may also be column-oriented: a mapping of column names to sequences (such as NumPy
+arrays), a pandas DataFrame or a pyarrow Table. Each column is then converted to python values in
+bulk, and the rows are written from tuples of those values.
+"""
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from htmxl.token import DetachedStream, TokenStream
+
+
+@dataclass(frozen=True)
+class BoundStream(TokenStream):
+    """A token of a row template, bound to the `row` of data it's being written for."""
+
+    row: Any = None
+
+    # The position of each field in the rows of a column-oriented source, which are tuples.
+    fields: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def bind(cls, token: TokenStream, row: Any, fields: Optional[Dict[str, int]] = None):
+        return cls(
+            node=token,
+            name=token.name,
+            attrs=token.attrs,
+            classes=token.classes,
+            text=token.text,
+            row=row,
+            fields=fields,
+        )
+
+    def content(self):
+        row = self.row
+        fields = self.fields
+        for child in self.node.content():
+            yield self.bind(child, row, fields)
+
+    def field(self, name: str):
+        """Get the field `name` of the bound row, by key, attribute or (numeric) index."""
+        row = self.row
+        try:
+            if self.fields is not None:
+                return row[self.fields[name]]
+            if isinstance(row, Mapping):
+                return row[name]
+            if isinstance(row, Sequence) and not isinstance(row, str) and name.isdigit():
+                return row[int(name)]
+            return getattr(row, name)
+        except (KeyError, IndexError, AttributeError):
+            raise ValueError(f"A row of <{self.name}> data has no field '{name}'.")
+
+
+def lookup(data: Any, path: str):
+    """Look up the dotted `path` (such as "report.rows") in the sheet's `data`."""
+    value = data
+    for name in path.split("."):
+        if isinstance(value, Mapping) and name in value:
+            value = value[name]
+        elif hasattr(value, name):
+            value = getattr(value, name)
+        else:
+            raise ValueError(f"The sheet's data has no '{path}' to bind rows to.")
+    return value
+
+
+def column_values(column: Any) -> List[Any]:
+    """Convert a `column` of a column-oriented source to a list of python values, in bulk.
+
+    NumPy arrays (including the columns of a DataFrame) are converted by `tolist`, with datetimes
+    and timedeltas first cast to microseconds so that they become `datetime` and `timedelta`
+    values, rather than integers. Missing values (NaN, NaT and nulls) become None, and the
+    datetimes of a pyarrow column with a time zone are given in that time zone, without it.
+    """
+    dtype = getattr(column, "dtype", None)
+    if dtype is not None and hasattr(column, "tolist"):
+        kind = getattr(dtype, "kind", None)
+        if kind == "M" and dtype != "datetime64[D]":
+            column = column.astype("datetime64[us]")
+        elif kind == "m":
+            column = column.astype("timedelta64[us]")
+
+        values = column.tolist()
+        if kind == "f" and (column != column).any():
+            values = _without_nan(values)
+        return values
+
+    if hasattr(column, "to_pylist"):
+        values = column.to_pylist()
+        if getattr(column.type, "tz", None) is not None:
+            values = [value and value.replace(tzinfo=None) for value in values]
+        elif str(column.type) in _arrow_float_types:
+            values = _without_nan(values)
+        return values
+
+    return list(column)
+
+
+_arrow_float_types = {"halffloat", "float", "double"}
+
+
+def _without_nan(values):
+    return [None if value != value else value for value in values]
+
+
+def _series_values(series: Any) -> List[Any]:
+    """Convert a pandas `series` to a list of python values, with None for missing values."""
+    if getattr(series.dtype, "tz", None) is not None:
+        # Excel doesn't support time zones, so datetimes are given in their own time zone.
+        series = series.dt.tz_localize(None)
+
+    values = column_values(series.to_numpy())
+    missing = series.isna()
+    if missing.any():
+        values = [None if is_missing else value for value, is_missing in zip(values, missing)]
+    return values
+
+
+def columns(source: Any) -> Optional[Dict[str, List[Any]]]:
+    """Get the columns of `source`, or None if it's an iterable of rows rather than of columns."""
+    if hasattr(source, "column_names") and hasattr(source, "column"):
+        # A pyarrow Table or RecordBatch.
+        return {name: column_values(source.column(name)) for name in source.column_names}
+
+    if hasattr(source, "columns") and hasattr(source, "items") and hasattr(source, "to_numpy"):
+        # A pandas DataFrame.
+        return {str(name): _series_values(series) for name, series in source.items()}
+
+    if isinstance(source, Mapping):
+        return {str(name): column_values(column) for name, column in source.items()}
+
+    return None
+
+
+def bound_rows(element: TokenStream, path: str, data: Any):
+    """Yield the content of `element` once per row of the iterable at `path` in `data`."""
+    # The template is read in full once, since the element's own content can only be consumed
+    # once by some parsers.
+    template = [DetachedStream.from_token(child) for child in element.content()]
+
+    rows = lookup(data, path)
+    fields = None
+
+    table = columns(rows)
+    if table is not None:
+        if len({len(column) for column in table.values()}) > 1:
+            raise ValueError(f"The columns of '{path}' aren't all the same length.")
+
+        fields = {name: index for index, name in enumerate(table)}
+        rows = zip(*table.values())
+
+    for row in rows:
+        for token in template:
+            yield BoundStream.bind(token, row, fields)
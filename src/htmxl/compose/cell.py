@@ -1,9 +1,6 @@
-import functools
-
 from htmxl.alphabet import alphabet
 
 
-@functools.lru_cache()
 def split_col_row(ref):
     """Split the letter and number components of a cell reference.
 
@@ -21,20 +18,40 @@ def split_col_row(ref):
 
 
 class Cell:
+    """An integer (row, column) location on a sheet.
+
+    A1-style references are only produced on demand.
+
+    Examples:
+        >>> cell = Cell('CC12')
+        >>> cell.row, cell.col
+        (12, 81)
+        >>> Cell.from_location(col=81, row=12).ref
+        'CC12'
+    """
+
+    __slots__ = ("row", "col")
+
     def __init__(self, ref="A1"):
         col, row = split_col_row(ref)
 
         self.row = row
-        self.row_ref = str(row)
-
         self.col = alphabet.index(col) + 1
-        self.col_ref = col
 
     @classmethod
     def from_location(cls, col, row):
-        col = alphabet[col - 1]
-        ref = f"{col}{row}"
-        return cls(ref)
+        cell = cls.__new__(cls)
+        cell.row = row
+        cell.col = col
+        return cell
+
+    @property
+    def row_ref(self):
+        return str(self.row)
+
+    @property
+    def col_ref(self):
+        return alphabet[self.col - 1]
 
     @property
     def ref(self):
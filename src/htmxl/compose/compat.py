@@ -2,3 +2,8 @@ try:
     from io import BytesIO  # noqa
 except ImportError:
     from StringIO import StringIO as BytesIO  # noqa
+
+try:
+    from jinja2 import pass_context  # noqa
+except ImportError:
+    from jinja2 import contextfilter as pass_context  # noqa
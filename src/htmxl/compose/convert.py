@@ -0,0 +1,112 @@
+"""Conversion of the text of cells into the values written, according to their `data-type`.
+
+Dates and datetimes in the ISO-8601 format templates most commonly render them in are converted
+directly, with anything else falling back to `pendulum.parse`. Since the same dates (and bools)
+tend to be repeated throughout a report, the conversions of recently seen values are memoized.
+"""
+import ast
+import datetime
+import re
+from decimal import Decimal
+from functools import lru_cache
+
+import pendulum
+
+_cache_size = 2**14
+
+_iso_date = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_iso_datetime = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?)?"
+)
+
+
+@lru_cache(maxsize=_cache_size)
+def to_date(text: str) -> datetime.date:
+    match = _iso_date.fullmatch(text)
+    if match:
+        year, month, day = match.groups()
+        return datetime.date(int(year), int(month), int(day))
+
+    return pendulum.parse(text).date()
+
+
+@lru_cache(maxsize=_cache_size)
+def to_datetime(text: str) -> datetime.datetime:
+    """Convert `text` to a naive datetime, in the time (and zone) it was given in.
+
+    Excel has no notion of time zones, so the wall time of a datetime with an offset is written.
+    """
+    match = _iso_datetime.fullmatch(text)
+    if match:
+        year, month, day, hour, minute, second, fraction = match.groups()
+        return datetime.datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int(fraction.ljust(6, "0")) if fraction else 0,
+        )
+
+    value = pendulum.parse(text)
+    return datetime.datetime(
+        value.year,
+        value.month,
+        value.day,
+        value.hour,
+        value.minute,
+        value.second,
+        value.microsecond,
+    )
+
+
+@lru_cache(maxsize=_cache_size)
+def to_bool(text: str) -> bool:
+    return ast.literal_eval(text)
+
+
+def to_percent(text: str) -> float:
+    """Convert `text` to a fraction, such that both "12.5%" and "0.125" are 0.125."""
+    if text.endswith("%"):
+        return float(text[:-1]) / 100
+    return float(text)
+
+
+converters = {
+    None: str,
+    "str": str,
+    "int": int,
+    "float": float,
+    "decimal": Decimal,
+    "percent": to_percent,
+    "date": to_date,
+    "datetime": to_datetime,
+    "bool": to_bool,
+}
+
+
+def convert(text: str, data_type: str = None):
+    """Convert the (stripped) `text` of a cell according to its `data_type`."""
+    try:
+        converter = converters[data_type]
+    except KeyError:
+        data_types = ", ".join(name for name in converters if name is not None)
+        raise ValueError(f"Unknown data-type '{data_type}', expected one of: {data_types}.")
+    return converter(text)
+
+
+def convert_value(value, data_type: str = None):
+    """Convert a python `value` (rather than the text of a cell) according to its `data_type`.
+
+    Values are written as they are, except for strings, which are converted just as the text of
+    any other cell would be.
+    """
+    if value is None or data_type is None:
+        return value
+
+    if isinstance(value, str):
+        return convert(value.strip(), data_type)
+    if data_type == "str":
+        return str(value)
+    return value
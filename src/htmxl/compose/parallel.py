@@ -0,0 +1,502 @@
+"""A module dedicated to composing workbooks in parallel, across processes.
+
+Whole sheets can be written by worker processes (see :meth:`htmxl.compose.Workbook.compose`), as
+can chunks of the rows of a single large `<tbody data-parallel="true">`. Each worker writes into
+a workbook of its own, exactly as it would be otherwise, and returns a compact payload of the
+cells it wrote (along with their styles, merged ranges, dimensions and validations), which the
+parent then copies into its own workbook.
+
+Styles can't be shared between workbooks by index, so each payload carries the worker's style
+tables (its fonts, fills, borders and so on). These are added to the parent's workbook in the
+order the worker added them, such that the composed workbook is identical to one composed in a
+single process.
+"""
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from copy import copy
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+import openpyxl
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.styles.builtins import styles as builtin_styles
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+
+from htmxl.alphabet import alphabet
+from htmxl.compose.recording import Recording
+from htmxl.compose.report import ComposeReport
+from htmxl.compose.style import default_styles, Styler
+from htmxl.compose.values import CellValues
+from htmxl.token import DetachedStream
+
+logger = logging.getLogger(__name__)
+
+# The fewest rows of a `data-parallel` tbody worth sending to a worker as a chunk.
+min_chunk_size = 500
+
+
+@dataclass
+class CellsPayload:
+    """The cells written by a worker, along with everything they reference.
+
+    Attributes:
+        cells: The (row, column, value, data type, style index) of each (unmerged) cell.
+        merged_cells: The (row, column, style index) of each cell covered by a merged range.
+        merged_ranges: The references of each merged range, in the order they were merged.
+        style_arrays: Each distinct style of the cells, as indices into the style tables.
+        named_styles: The names of the worker workbook's named styles.
+        fonts: The worker workbook's fonts (and similarly the following style tables).
+        number_formats: The worker workbook's custom number formats.
+        class_styles: The combinations of classes styled by the worker, which the parent
+            must similarly register as named styles.
+        column_widths: The width of each column, by letter.
+        row_heights: The height of each row, by number.
+    """
+
+    cells: List[Tuple[int, int, Any, str, Optional[int]]] = field(default_factory=list)
+    merged_cells: List[Tuple[int, int, Optional[int]]] = field(default_factory=list)
+    merged_ranges: List[str] = field(default_factory=list)
+    style_arrays: List[Tuple[int, ...]] = field(default_factory=list)
+    named_styles: List[str] = field(default_factory=list)
+    fonts: List[Any] = field(default_factory=list)
+    fills: List[Any] = field(default_factory=list)
+    borders: List[Any] = field(default_factory=list)
+    alignments: List[Any] = field(default_factory=list)
+    protections: List[Any] = field(default_factory=list)
+    number_formats: List[str] = field(default_factory=list)
+    class_styles: List[Tuple[str, ...]] = field(default_factory=list)
+    column_widths: Dict[str, float] = field(default_factory=dict)
+    row_heights: Dict[int, float] = field(default_factory=dict)
+
+    def read(self, writer, styler):
+        """Read the cells written by `writer`."""
+        sheet = writer.sheet
+        wb = sheet.parent
+
+        style_indices = {}
+
+        def style_index(cell):
+            style = cell._style
+            if style is None:
+                return None
+
+            key = tuple(style)
+            index = style_indices.get(key)
+            if index is None:
+                index = style_indices[key] = len(self.style_arrays)
+                self.style_arrays.append(key)
+            return index
+
+        for (row, col), cell in sheet._cells.items():
+            if isinstance(cell, MergedCell):
+                self.merged_cells.append((row, col, style_index(cell)))
+            else:
+                self.cells.append((row, col, cell._value, cell.data_type, style_index(cell)))
+
+        self.merged_ranges = list(writer.merged_ranges)
+        self.named_styles = list(wb.named_styles)
+        self.fonts = list(wb._fonts)
+        self.fills = list(wb._fills)
+        self.borders = list(wb._borders)
+        self.alignments = list(wb._alignments)
+        self.protections = list(wb._protections)
+        self.number_formats = list(wb._number_formats)
+        self.class_styles = [key for key in styler._style_names if len(key) > 1]
+        self.column_widths = {
+            letter: dimension.width
+            for letter, dimension in sheet.column_dimensions.items()
+            if dimension.customWidth
+        }
+        self.row_heights = {
+            row: dimension.height
+            for row, dimension in sheet.row_dimensions.items()
+            if dimension.height is not None
+        }
+
+    def write(self, sheet, styler, row_offset=0):
+        """Write the cells into `sheet`, `row_offset` rows below where they were written."""
+        style_arrays = self._import_styles(sheet.parent, styler)
+
+        # The values were already validated (and their types inferred) by the worker.
+        cells = sheet._cells
+        for row, col, value, data_type, style in self.cells:
+            row += row_offset
+            cell = cells.get((row, col))
+            if cell is None:
+                cell = cells[row, col] = Cell(sheet, row=row, column=col)
+            cell._value = value
+            cell.data_type = data_type
+            if style is not None:
+                cell._style = copy(style_arrays[style])
+
+        # Merging clears the covered cells and extends the borders of the top-left cell along
+        # the range, after which the covered cells are restored to their written styles.
+        for ref in self.merged_ranges:
+            sheet.merge_cells(_shift(ref, row_offset))
+
+        for row, col, style in self.merged_cells:
+            if style is not None:
+                sheet.cell(row=row + row_offset, column=col)._style = copy(style_arrays[style])
+
+        for letter, width in self.column_widths.items():
+            sheet.column_dimensions[letter].width = width
+
+        for row, height in self.row_heights.items():
+            sheet.row_dimensions[row + row_offset].height = height
+
+    def _import_styles(self, wb, styler):
+        for styles in self.class_styles:
+            styler.calculate_style(list(styles))
+
+        font_ids = [wb._fonts.add(font) for font in self.fonts]
+        fill_ids = [wb._fills.add(fill) for fill in self.fills]
+        border_ids = [wb._borders.add(border) for border in self.borders]
+        alignment_ids = [wb._alignments.add(alignment) for alignment in self.alignments]
+        protection_ids = [wb._protections.add(protection) for protection in self.protections]
+        number_format_ids = [
+            wb._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+            for number_format in self.number_formats
+        ]
+
+        for name in self.named_styles:
+            if name not in wb.named_styles:
+                wb.add_named_style(styler.named_styles.get(name) or builtin_styles[name])
+        named_styles = wb.named_styles
+        xf_ids = [named_styles.index(name) for name in self.named_styles]
+
+        style_arrays = []
+        for ids in self.style_arrays:
+            font, fill, border, number_format, protection, alignment, pivot, quote, xf = ids
+            if number_format >= BUILTIN_FORMATS_MAX_SIZE:
+                number_format = number_format_ids[number_format - BUILTIN_FORMATS_MAX_SIZE]
+
+            style_array = StyleArray()
+            style_array.fontId = font_ids[font]
+            style_array.fillId = fill_ids[fill]
+            style_array.borderId = border_ids[border]
+            style_array.numFmtId = number_format
+            style_array.protectionId = protection_ids[protection]
+            style_array.alignmentId = alignment_ids[alignment]
+            style_array.pivotButton = pivot
+            style_array.quotePrefix = quote
+            style_array.xfId = xf_ids[xf]
+            style_arrays.append(style_array)
+        return style_arrays
+
+
+def _shift(ref, rows):
+    if not rows:
+        return ref
+
+    cell_range = CellRange(ref)
+    cell_range.shift(row_shift=rows)
+    return cell_range.coord
+
+
+@dataclass
+class SheetJob:
+    """Everything a worker requires to write a single sheet."""
+
+    sheet_name: str
+    data: Dict
+    parser: Optional[str]
+    styles: Optional[List[Dict]]
+    template_file: Optional[str] = None
+    template_source: Optional[str] = None
+    incremental: bool = False
+    layout_plans: bool = False
+    report: bool = False
+    trace_memory: bool = True
+
+
+@dataclass
+class SheetPayload(CellsPayload):
+    """The content of a sheet written by a worker.
+
+    Attributes:
+        title: The title of the sheet.
+        validations: The data validations of the sheet.
+        auto_filter: The reference of the sheet's auto filter, if any.
+        report: The `SheetReport` of writing the sheet, if requested.
+    """
+
+    title: str = ""
+    validations: List[Any] = field(default_factory=list)
+    auto_filter: Optional[str] = None
+    report: Any = None
+
+    @classmethod
+    def from_worksheet(cls, worksheet):
+        sheet = worksheet.worksheet
+
+        payload = cls(title=sheet.title)
+        payload.read(worksheet.writer, worksheet.styler)
+        payload.validations = list(sheet.data_validations.dataValidation)
+        payload.auto_filter = sheet.auto_filter.ref
+        return payload
+
+    def apply(self, worksheet):
+        """Write the content of the payload into `worksheet`."""
+        sheet = worksheet.worksheet
+        self.write(sheet, worksheet.styler)
+
+        for validation in self.validations:
+            sheet.add_data_validation(validation)
+
+        if self.auto_filter:
+            sheet.auto_filter.ref = self.auto_filter
+
+        sheet.title = self.title
+
+
+def write_sheet(job: SheetJob) -> SheetPayload:
+    """Write the sheet described by `job` into a workbook of its own, returning its content."""
+    from htmxl.compose.workbook import Workbook
+
+    workbook = Workbook(
+        styles=job.styles,
+        parser=job.parser,
+        incremental=job.incremental,
+        layout_plans=job.layout_plans,
+    )
+    if job.template_file is not None:
+        worksheet = workbook.add_sheet_from_template_file(
+            job.template_file, data=job.data, sheet_name=job.sheet_name
+        )
+    else:
+        worksheet = workbook.add_sheet_from_template(
+            job.template_source, data=job.data, sheet_name=job.sheet_name
+        )
+
+    composition = None
+    if job.report:
+        composition = ComposeReport(trace_memory=job.trace_memory)
+
+    with composition.trace() if composition else nullcontext():
+        worksheet.write(report=composition)
+
+    payload = SheetPayload.from_worksheet(worksheet)
+    if composition is not None:
+        payload.report = composition.sheets[0]
+    return payload
+
+
+def write_parallel(workbook, worksheets, workers, composition=None):
+    """Write each of `worksheets` of the `workbook`, across a pool of `workers` processes."""
+    jobs = [
+        SheetJob(
+            sheet_name=worksheet.sheet_name,
+            data=worksheet.data,
+            parser=worksheet.parser,
+            styles=workbook.styles,
+            template_file=worksheet.template_file,
+            template_source=worksheet.template_source,
+            incremental=worksheet.incremental,
+            layout_plans=workbook.layout_plans,
+            report=composition is not None,
+            trace_memory=composition is not None and composition.trace_memory,
+        )
+        for worksheet in worksheets
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for worksheet, payload in zip(worksheets, executor.map(write_sheet, jobs)):
+            logger.debug("Applying the content of sheet <{}>".format(worksheet.sheet_name))
+            if composition is None:
+                payload.apply(worksheet)
+                continue
+
+            sheet = payload.report
+            composition.sheets.append(sheet)
+            with composition.measure(sheet.phases, "apply"):
+                payload.apply(worksheet)
+
+
+@dataclass
+class RowsJob:
+    """Everything a worker requires to lay out a chunk of the rows of a tbody.
+
+    The rows are written from the first row of the `col` column, and later moved into place.
+    """
+
+    rows: List[DetachedStream]
+    col: int
+    style: Optional[List[str]]
+    styles: List[Dict]
+    validations: Dict[str, Any]
+    retain_cells: bool
+    cell_values: Optional[CellValues] = None
+    column_types: Dict[int, str] = field(default_factory=dict)
+
+
+@dataclass
+class RowsPayload(CellsPayload):
+    """The cells of a chunk of rows written by a worker.
+
+    Attributes:
+        height: The number of rows the chunk occupies.
+        recording: The `Recording` of the cells written.
+        cell_log: The (row, column) of every cell written, in order, if they were retained.
+        validated_cells: The cells added to each validation, by validation id.
+        new_validations: The validations defined by the rows themselves, by id.
+        auto_filter: The reference of the auto filter set by the rows, if any.
+    """
+
+    height: int = 0
+    recording: Optional[Recording] = None
+    cell_log: Optional[List[Tuple[int, int]]] = None
+    validated_cells: Dict[str, List[str]] = field(default_factory=dict)
+    new_validations: Dict[str, Any] = field(default_factory=dict)
+    auto_filter: Optional[str] = None
+
+    def apply(self, writer, styler):
+        """Write the rows at the cursor of `writer`, as though `writer` had written them."""
+        offset = writer.row - 1
+        self.write(writer.sheet, styler, row_offset=offset)
+
+        for id, validation in self.new_validations.items():
+            writer.add_validation(id, validation)
+
+        for id, refs in self.validated_cells.items():
+            validation = writer._validations[id]
+            for ref in refs:
+                validation.add(_shift(ref, offset))
+
+        if self.auto_filter:
+            writer.auto_filter(_shift(self.auto_filter, offset))
+
+        recording = self.recording
+        if writer._recordings and recording.count:
+            recording.min_row += offset
+            recording.max_row += offset
+            writer._recordings[-1].extend(recording)
+
+        if writer._cell_log is not None:
+            writer._cell_log.extend((row + offset, col) for row, col in self.cell_log)
+
+        writer.move_down(self.height)
+
+
+def write_rows(job: RowsJob) -> RowsPayload:
+    """Write the chunk of rows described by `job` into a workbook of its own."""
+    from htmxl.compose.write import Writer
+    from htmxl.compose.write.elements import write
+
+    wb = openpyxl.Workbook()
+    styler = Styler(wb, job.styles)
+    writer = Writer(wb.active, ref="{}1".format(alphabet[job.col - 1]))
+    writer._validations = job.validations
+    writer.cell_values = job.cell_values
+    writer.column_types = job.column_types
+    known_validations = set(job.validations)
+
+    if job.retain_cells:
+        writer._cell_log = []
+        writer._cell_log_users += 1
+
+    with writer.record() as recording:
+        for row in job.rows:
+            write(row, writer, styler, job.style)
+
+    payload = RowsPayload(height=writer.row - 1, recording=recording)
+    payload.read(writer, styler)
+    payload.cell_log = writer._cell_log
+    payload.auto_filter = writer.sheet.auto_filter.ref
+
+    for id, validation in writer._validations.items():
+        refs = [str(cell_range) for cell_range in validation.sqref]
+        if id in known_validations:
+            payload.validated_cells[id] = refs
+        else:
+            payload.new_validations[id] = validation
+
+    return payload
+
+
+def write_rows_parallel(writer, rows, styler, style):
+    """Write `rows` (the content of a tbody) at the cursor of `writer`, across processes.
+
+    The rows are sent to the workers in chunks, each of which is laid out from the top of a
+    sheet of its own, and is then moved into place below the previous chunk. Only `<tr>`
+    elements are sent to the workers, and any content of the tbody from the first other element
+    onwards is written in this process.
+    """
+    from htmxl.compose.write.elements import write
+
+    workers = writer.workers
+    rows = iter(rows)
+    remainder = []
+
+    def chunks():
+        chunk = []
+        for row in rows:
+            if row.name != "tr":
+                remainder.append(row)
+                break
+
+            chunk.append(DetachedStream.from_token(row))
+            if len(chunk) == min_chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    chunk_iter = chunks()
+    first_chunk = next(chunk_iter, [])
+
+    if len(first_chunk) < min_chunk_size:
+        # Too few rows to be worth sending to the workers.
+        for row in chain(first_chunk, remainder, rows):
+            write(row, writer, styler, style)
+        return
+
+    default_style_names = {default["name"] for default in default_styles}
+    styles = [
+        spec for name, spec in styler.named_style_specs.items() if name not in default_style_names
+    ]
+
+    # The workers only need to know which validations exist, not the cells they already cover.
+    validations = {}
+    for id, validation in writer._validations.items():
+        validation = copy(validation)
+        validation.sqref = MultiCellRange()
+        validations[id] = validation
+
+    def submit(chunk):
+        # Only the values referenced by the chunk's own rows are sent along with it.
+        cell_values = None
+        if writer.cell_values:
+            cell_values = writer.cell_values.subset(chunk)
+
+        job = RowsJob(
+            rows=chunk,
+            col=writer.col,
+            style=style,
+            styles=styles,
+            validations=validations,
+            retain_cells=writer._cell_log is not None,
+            cell_values=cell_values,
+            column_types=writer.column_types,
+        )
+        return executor.submit(write_rows, job)
+
+    logger.debug("Writing the rows of a tbody across {} processes".format(workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque([submit(first_chunk)])
+        for chunk in chunk_iter:
+            pending.append(submit(chunk))
+
+            # Bound the number of chunks held in memory at once.
+            if len(pending) > workers * 2:
+                pending.popleft().result().apply(writer, styler)
+
+        while pending:
+            pending.popleft().result().apply(writer, styler)
+
+    for row in chain(remainder, rows):
+        write(row, writer, styler, style)
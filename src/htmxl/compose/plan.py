@@ -0,0 +1,553 @@
+"""A module dedicated to compiling templates into reusable layout plans.
+
+Composing a sheet normally renders its template to html, and parses that html into a tree of
+elements for the :class:`htmxl.compose.write.Writer` to lay out. However the structure of that
+tree is almost entirely determined by the template itself, rather than by the data it's rendered
+with.
+
+A :class:`LayoutPlan` is produced by parsing the template's html **once**, with the template's
+expressions, loops and conditions replaced by markers. Each subsequent compose then produces the
+element tree directly from the plan and the data, evaluating expressions and expanding loops as
+the tree is consumed, entirely skipping html generation and parsing.
+
+Templates using constructs which cannot be represented by a plan (for example ``{% set %}`` or
+macros, or control blocks which open and close different elements) raise an
+:class:`UnsupportedTemplateError` when compiled.
+
+Note, expressions are substituted as text. Any markup produced by an expression is written
+literally, rather than being interpreted as html, although its character references (such as
+those of escaped values) are replaced, as a parser would replace them.
+"""
+import html
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from jinja2 import nodes
+from jinja2.environment import TemplateExpression
+
+from htmxl.token import TokenStream
+
+HOLE_START = "\ue000"
+HOLE_END = "\ue001"
+
+LOOP_TAG = "htmxl-for"
+BRANCH_TAG = "htmxl-if"
+START_TAG = "htmxl-start"
+CONTROL_ID = "data-control-id"
+BRANCH_INDEX = "data-branch"
+
+_hole_pattern = re.compile(f"{HOLE_START}(\\d+){HOLE_END}")
+_tag_pattern = re.compile(r"<(/?)([a-zA-Z][\w:-]*)[^>]*?(/?)>")
+_void_tags = {"br", "input", "option", "col", "img", "hr", "meta", "link"}
+
+# Elements whose text is read by their writer, which cannot therefore contain control blocks.
+_text_tags = {"td", "th", "option", "title"}
+
+# The attributes of jinja's `loop` variable which a `_LoopContext` provides.
+_loop_attrs = {"index", "index0", "length", "revindex", "revindex0", "first", "last", "cycle"}
+
+
+class UnsupportedTemplateError(Exception):
+    """Raised when a template cannot be compiled into a `LayoutPlan`."""
+
+
+@dataclass(frozen=True)
+class PlanStream(TokenStream):
+    """A token produced on demand from a node of a `LayoutPlan`."""
+
+    context: Any = None
+
+    def content(self):
+        return self.node.content(self.context)
+
+
+class LayoutPlan:
+    """The parsed structure of a template, independent of the data it's rendered with."""
+
+    def __init__(self, root, environment):
+        self.root = root
+        self.environment = environment
+
+    @classmethod
+    def compile(cls, environment, source, parser):
+        """Compile the template `source` into a `LayoutPlan`, using the given `parser` class."""
+        if HOLE_START in source or HOLE_END in source:
+            raise UnsupportedTemplateError("The template contains reserved characters.")
+
+        compiler = _Compiler(environment)
+        compiler.visit_body(environment.parse(source).body)
+
+        html = "".join(compiler.html)
+        _check_text_around_controls(html)
+
+        tree = parser.parse_str(html)
+        converter = _Converter(compiler, parser)
+        return cls(converter.convert_element(tree), environment)
+
+    def tree(self, data):
+        """Produce the element tree of the template rendered with `data`."""
+        context = {**self.environment.globals, **data}
+        return self.root.token(context)
+
+
+class _Compiler:
+    """Produce the marked-up html of a template from its jinja syntax tree."""
+
+    def __init__(self, environment):
+        self.environment = environment
+        self.html = []
+        self.holes = []
+        self.controls = []
+
+        # The chain of control blocks enclosing each hole.
+        self.scopes = []
+        self.scope = ()
+
+    def visit_body(self, body):
+        for node in body:
+            if isinstance(node, nodes.Output):
+                self.visit_output(node)
+            elif isinstance(node, nodes.For):
+                self.visit_for(node)
+            elif isinstance(node, nodes.If):
+                self.visit_if(node)
+            else:
+                raise UnsupportedTemplateError(
+                    f"Templates containing {node.__class__.__name__} nodes are not supported."
+                )
+
+    def visit_output(self, node):
+        for child in node.nodes:
+            if isinstance(child, nodes.TemplateData):
+                self.html.append(child.data)
+            else:
+                self.html.append(f"{HOLE_START}{len(self.holes)}{HOLE_END}")
+                self.holes.append(_compile_expression(self.environment, child))
+                self.scopes.append(self.scope)
+
+    def visit_for(self, node):
+        if node.else_ or node.test is not None or node.recursive:
+            raise UnsupportedTemplateError(
+                "Loops with an `else` block, filter or `recursive` are not supported."
+            )
+
+        target = node.target
+        if isinstance(target, nodes.Name):
+            names = target.name
+        else:
+            names = tuple(item.name for item in target.items)
+
+        uses_loop = _uses_loop(node.body)
+        loop = _Loop(names, _compile_expression(self.environment, node.iter), uses_loop)
+        self.visit_control(loop, LOOP_TAG, [node.body])
+
+    def visit_if(self, node):
+        tests = [node.test]
+        bodies = [node.body]
+        for elif_ in getattr(node, "elif_", []):
+            tests.append(elif_.test)
+            bodies.append(elif_.body)
+
+        if node.else_:
+            tests.append(None)
+            bodies.append(node.else_)
+
+        tests = [
+            None if test is None else _compile_expression(self.environment, test) for test in tests
+        ]
+        self.visit_control(_Branches(tests), BRANCH_TAG, bodies)
+
+    def visit_control(self, control, tag, bodies):
+        html = "".join(self.html)
+        if html.rfind("<") > html.rfind(">"):
+            raise UnsupportedTemplateError("Control blocks within an html tag are not supported.")
+
+        control_id = len(self.controls)
+        self.controls.append(control)
+
+        scope = self.scope
+        for index, body in enumerate(bodies):
+            self.html.append(
+                f'<{tag} {CONTROL_ID}="{control_id}" {BRANCH_INDEX}="{index}"><{START_TAG}/>'
+            )
+            start = len(self.html)
+            self.scope = scope + ((control_id, index),)
+            self.visit_body(body)
+            self.scope = scope
+            _check_balanced("".join(self.html[start:]))
+            self.html.append(f"</{tag}>")
+
+
+def _check_balanced(html):
+    open_tags = []
+    for closing, tag, self_closing in _tag_pattern.findall(html):
+        tag = tag.lower()
+        if self_closing or tag in _void_tags:
+            continue
+
+        if not closing:
+            open_tags.append(tag)
+        elif not open_tags or open_tags.pop() != tag:
+            raise UnsupportedTemplateError(
+                "Control blocks must contain balanced html, opening and closing the same elements."
+            )
+
+    if open_tags:
+        raise UnsupportedTemplateError(
+            "Control blocks must contain balanced html, opening and closing the same elements."
+        )
+
+
+def _check_text_around_controls(html):
+    """Raise if any text directly precedes or follows a control block's tags.
+
+    The text rendered around (and by) a control block is a single run of text, written as one,
+    whereas the strings of a plan are each written in turn, overwriting one another.
+    """
+    control_tags = {LOOP_TAG, BRANCH_TAG, START_TAG}
+    position = 0
+    previous_tag = None
+    for match in _tag_pattern.finditer(html):
+        tag = match.group(2).lower()
+        if html[position : match.start()].strip() and (
+            previous_tag in control_tags or tag in control_tags
+        ):
+            raise UnsupportedTemplateError("Control blocks alongside text are not supported.")
+        position = match.end()
+        previous_tag = tag
+
+    if html[position:].strip() and previous_tag in control_tags:
+        raise UnsupportedTemplateError("Control blocks alongside text are not supported.")
+
+
+def _find_names(body):
+    for node in body:
+        yield from node.find_all(nodes.Name)
+
+
+def _uses_loop(body):
+    """Whether `body` uses the `loop` variable, which must be limited to the `_loop_attrs`."""
+    supported = set()
+    for node in body:
+        for attribute in node.find_all(nodes.Getattr):
+            name = attribute.node
+            if (
+                isinstance(name, nodes.Name)
+                and name.name == "loop"
+                and attribute.attr in _loop_attrs
+            ):
+                supported.add(id(name))
+
+    loop_names = [name for name in _find_names(body) if name.name == "loop"]
+    if any(id(name) not in supported for name in loop_names):
+        attrs = ", ".join(sorted(_loop_attrs))
+        raise UnsupportedTemplateError(f"Only the {attrs} attributes of `loop` are supported.")
+    return bool(loop_names)
+
+
+def _compile_expression(environment, node):
+    """Compile a jinja expression node into a function of the template context."""
+    if isinstance(node, nodes.Const):
+        value = node.value
+        return lambda context: value
+
+    if isinstance(node, nodes.Name):
+        name = node.name
+        undefined = environment.undefined
+
+        def evaluate_name(context):
+            try:
+                return context[name]
+            except KeyError:
+                return undefined(name=name)
+
+        return evaluate_name
+
+    if isinstance(node, nodes.Getattr):
+        evaluate_node = _compile_expression(environment, node.node)
+        attr = node.attr
+        getattr_ = environment.getattr
+        return lambda context: getattr_(evaluate_node(context), attr)
+
+    if isinstance(node, nodes.Getitem) and isinstance(node.arg, nodes.Const):
+        evaluate_node = _compile_expression(environment, node.node)
+        key = node.arg.value
+        getitem = environment.getitem
+        return lambda context: getitem(evaluate_node(context), key)
+
+    # Otherwise, defer to jinja itself, in the same way as `Environment.compile_expression`.
+    body = [nodes.Assign(nodes.Name("result", "store"), node, lineno=1)]
+    template = nodes.Template(body, lineno=1)
+    template.set_environment(environment)
+    expression = TemplateExpression(environment.from_string(template), undefined_to_none=False)
+    return lambda context: expression(context)
+
+
+class _Loop:
+    def __init__(self, names, iterable, uses_loop):
+        self.names = names
+        self.iterable = iterable
+        self.uses_loop = uses_loop
+
+    def contexts(self, context):
+        names = self.names
+        items = self.iterable(context)
+        if self.uses_loop:
+            items = list(items)
+            length = len(items)
+
+        for index, item in enumerate(items):
+            context = dict(context)
+            if isinstance(names, str):
+                context[names] = item
+            else:
+                context.update(zip(names, item))
+
+            if self.uses_loop:
+                context["loop"] = _LoopContext(index, length)
+            yield context
+
+
+class _Branches:
+    def __init__(self, tests):
+        self.tests = tests
+
+    def choose(self, context):
+        for index, test in enumerate(self.tests):
+            if test is None or test(context):
+                return index
+        return None
+
+
+class _LoopContext:
+    """The subset of jinja's `loop` variable available to templates compiled into plans."""
+
+    def __init__(self, index0, length):
+        self.index0 = index0
+        self.index = index0 + 1
+        self.length = length
+        self.revindex = length - index0
+        self.revindex0 = length - index0 - 1
+        self.first = index0 == 0
+        self.last = index0 == length - 1
+
+    def cycle(self, *args):
+        return args[self.index0 % len(args)]
+
+
+class _Text:
+    """Text containing expression holes."""
+
+    def __init__(self, parts, holes):
+        self.parts = parts
+        self.holes = holes
+
+    @classmethod
+    def parse(cls, value, holes):
+        """Parse `value`, returning it unchanged if it contains no holes."""
+        if not isinstance(value, str) or HOLE_START not in value:
+            return value
+
+        parts = []
+        position = 0
+        for match in _hole_pattern.finditer(value):
+            if match.start() > position:
+                parts.append(value[position : match.start()])
+            parts.append(holes[int(match.group(1))])
+            position = match.end()
+
+        if position < len(value):
+            parts.append(value[position:])
+        return cls(parts, holes)
+
+    def render(self, context):
+        # The template's own text was unescaped by the parser, but the output of its expressions
+        # is only unescaped here.
+        return "".join(
+            part if isinstance(part, str) else html.unescape(str(part(context)))
+            for part in self.parts
+        )
+
+
+def _render(value, context):
+    if isinstance(value, _Text):
+        return value.render(context)
+    return value
+
+
+class _String:
+    def __init__(self, text):
+        self.text = text
+
+    def tokens(self, context):
+        text = self.text
+        if isinstance(text, _Text):
+            text = text.render(context).strip()
+            if not text:
+                return
+        yield PlanStream(None, "string", text=text)
+
+
+class _Element:
+    def __init__(self, name, attrs, classes, text, children, parser, split_class_attr=False):
+        self.name = name
+        self.attrs = attrs
+        self.classes = classes
+        self.text = text
+        self.children = children
+        self.parser = parser
+        self.split_class_attr = split_class_attr
+
+        self.static = not isinstance(text, _Text) and not any(
+            isinstance(value, _Text) for value in attrs.values()
+        )
+
+    def token(self, context):
+        if self.static:
+            # Static elements share their attributes between every instance of the element.
+            return PlanStream(
+                node=self,
+                name=self.name,
+                attrs=self.attrs,
+                classes=self.classes,
+                text=self.text,
+                context=context,
+            )
+
+        attrs = {name: _render(value, context) for name, value in self.attrs.items()}
+
+        classes = self.classes
+        if isinstance(self.attrs.get("class"), _Text):
+            classes = self.parser.split_classes(attrs["class"])
+            if self.split_class_attr:
+                attrs["class"] = classes
+
+        text = self.text
+        if isinstance(text, _Text):
+            text = text.render(context)
+            if not self.parser.keeps_blank_text and not text.strip():
+                text = None
+
+        return PlanStream(
+            node=self, name=self.name, attrs=attrs, classes=classes, text=text, context=context
+        )
+
+    def tokens(self, context):
+        yield self.token(context)
+
+    def content(self, context):
+        for child in self.children:
+            yield from child.tokens(context)
+
+
+class _LoopNode:
+    def __init__(self, loop, children):
+        self.loop = loop
+        self.children = children
+
+    def tokens(self, context):
+        for loop_context in self.loop.contexts(context):
+            for child in self.children:
+                yield from child.tokens(loop_context)
+
+
+class _BranchNode:
+    def __init__(self, branches, bodies):
+        self.branches = branches
+        self.bodies = bodies
+
+    def tokens(self, context):
+        index = self.branches.choose(context)
+        if index is None:
+            return
+
+        for child in self.bodies[index]:
+            yield from child.tokens(context)
+
+
+class _Converter:
+    """Convert a parsed tree of marked-up html into the nodes of a `LayoutPlan`."""
+
+    def __init__(self, compiler, parser):
+        self.holes = compiler.holes
+        self.scopes = compiler.scopes
+        self.controls = compiler.controls
+        self.parser = parser
+
+    def parse_text(self, value, scope):
+        """Parse text which may contain holes, all of which must be within the given `scope`.
+
+        Some parsers produce the text of an element from all of its descendants, which may
+        include text within (say) a loop, which cannot be represented. Such text is omitted.
+        """
+        text = _Text.parse(value, self.holes)
+        if isinstance(text, _Text):
+            for match in _hole_pattern.finditer(value):
+                if self.scopes[int(match.group(1))] != scope:
+                    return None
+        return text
+
+    def convert_element(self, token, scope=(), within_text=False):
+        name = token.name
+        if HOLE_START in name or any(HOLE_START in attr for attr in token.attrs):
+            raise UnsupportedTemplateError(
+                "Expressions are only supported within attribute values."
+            )
+
+        attrs = {}
+        for attr, value in token.attrs.items():
+            if isinstance(value, list):
+                # Multi-valued attributes (namely `class`) are split by some parsers.
+                joined = " ".join(value)
+                if HOLE_START in joined:
+                    value = joined
+            attrs[attr] = _Text.parse(value, self.holes)
+
+        split_class_attr = isinstance(token.attrs.get("class"), list)
+
+        children = self.convert_content(token, scope, within_text=within_text or name in _text_tags)
+        return _Element(
+            name=name,
+            attrs=attrs,
+            classes=token.classes,
+            text=self.parse_text(token.text, scope),
+            children=children,
+            parser=self.parser,
+            split_class_attr=split_class_attr,
+        )
+
+    def convert_content(self, token, scope, within_text=False):
+        children = []
+        pending_branches = None
+        for child in token.content():
+            name = child.name
+            if name == START_TAG:
+                continue
+
+            if name in (LOOP_TAG, BRANCH_TAG):
+                if within_text:
+                    raise UnsupportedTemplateError(
+                        "Control blocks within elements whose text is written are not supported."
+                    )
+
+                control_id = int(child.attrs[CONTROL_ID])
+                branch = int(child.attrs[BRANCH_INDEX])
+                control = self.controls[control_id]
+                body = self.convert_content(child, scope + ((control_id, branch),))
+                if name == LOOP_TAG:
+                    children.append(_LoopNode(control, body))
+                    continue
+
+                if branch == 0:
+                    pending_branches = _BranchNode(control, [])
+                    children.append(pending_branches)
+                pending_branches.bodies.append(body)
+                continue
+
+            if name == "string":
+                children.append(_String(_Text.parse(child.text, self.holes)))
+            else:
+                children.append(self.convert_element(child, scope, within_text))
+
+        return children
@@ -0,0 +1,131 @@
+"""A module dedicated to profiling where the time is spent while composing a workbook.
+
+A :class:`Profiler` is attached to a writer by wrapping its element handlers, so writers
+which are not being profiled pay nothing for its existence.
+"""
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class HandlerStats:
+    """The statistics recorded for the handler of a single tag.
+
+    Attributes:
+        calls: The number of elements with the tag which were written.
+        cumulative_time: The time spent writing those elements, including their children.
+        own_time: The time spent writing those elements, excluding their children.
+        cells: The number of cells written directly by those elements (not their children).
+    """
+
+    calls: int = 0
+    cumulative_time: float = 0.0
+    own_time: float = 0.0
+    cells: int = 0
+
+    # The number of currently open elements with the tag, such that the time spent in
+    # nested elements of the same tag is only counted once.
+    _depth: int = 0
+
+
+class Profiler:
+    """Record the number of calls, time spent and cells written by the handler of each tag.
+
+    Examples:
+        >>> from htmxl.compose import Workbook
+        >>> workbook = Workbook(profile=True)
+        >>> _ = workbook.add_sheet_from_template("<table><tr><td>1</td><td>2</td></tr></table>")
+        >>> workbook.write()
+        >>> workbook.profiler.stats["td"].calls, workbook.profiler.stats["td"].cells
+        (2, 2)
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stats = {}
+
+        # The stats of each element currently being written, along with the time spent in
+        # its children thus far.
+        self._stack = []
+
+        # The element handlers and `write_cell` of the writer attached to, as they were before.
+        self._detached = None
+
+    def attach(self, writer):
+        """Profile every element subsequently written by `writer`."""
+        self._detached = (writer._element_handlers, writer.__dict__.get("write_cell"))
+        writer._element_handlers = {
+            tag: self._wrap(tag, handler) for tag, handler in writer._element_handlers.items()
+        }
+
+        write_cell = writer.write_cell
+        stack = self._stack
+
+        def profiled_write_cell(*args, **kwargs):
+            if stack:
+                stack[-1][0].cells += 1
+            return write_cell(*args, **kwargs)
+
+        writer.write_cell = profiled_write_cell
+
+    def detach(self, writer):
+        """Stop profiling the elements written by `writer`, restoring its own handlers."""
+        element_handlers, write_cell = self._detached
+        self._detached = None
+
+        writer._element_handlers = element_handlers
+        if write_cell is None:
+            del writer.write_cell
+        else:
+            writer.write_cell = write_cell
+
+    def _wrap(self, tag, handler):
+        stats = self.stats.setdefault(tag, HandlerStats())
+        clock = self.clock
+        stack = self._stack
+
+        def profiled(element, writer, styler, style):
+            frame = [stats, 0.0]
+            stack.append(frame)
+            stats._depth += 1
+
+            start = clock()
+            try:
+                return handler(element, writer, styler, style)
+            finally:
+                elapsed = clock() - start
+
+                stack.pop()
+                stats._depth -= 1
+
+                stats.calls += 1
+                stats.own_time += elapsed - frame[1]
+                if not stats._depth:
+                    stats.cumulative_time += elapsed
+
+                if stack:
+                    stack[-1][1] += elapsed
+
+        return profiled
+
+    def report(self):
+        """Summarize the recorded stats of each tag, by descending cumulative time."""
+        lines = [
+            "{:<10} {:>10} {:>12} {:>12} {:>10}".format(
+                "tag", "calls", "cumulative", "own", "cells"
+            )
+        ]
+        ordered = sorted(self.stats.items(), key=lambda item: item[1].cumulative_time, reverse=True)
+        for tag, stats in ordered:
+            if not stats.calls:
+                continue
+
+            lines.append(
+                "{:<10} {:>10} {:>11.3f}s {:>11.3f}s {:>10}".format(
+                    tag, stats.calls, stats.cumulative_time, stats.own_time, stats.cells
+                )
+            )
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
@@ -1,37 +1,74 @@
-from dataclasses import dataclass, field
-from typing import List
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
 from htmxl.compose.cell import Cell
 
 
 @dataclass
 class Recording:
+    """The extent of the cells written while writing an element.
+
+    Only the bounds and number of written cells are kept. The individual cells are only
+    available when the recording was given a `log` of written cells to slice them from.
+    """
+
     count: int = 0
-    cells: List[Cell] = field(default_factory=list)
 
     min_row: int = 1
     min_col: int = 1
     max_row: int = 1
     max_col: int = 1
 
-    def append(self, cell):
-        cell_row = cell.row
-        cell_col = cell.col
+    log: Optional[List[Tuple[int, int]]] = None
+    start: int = 0
+    end: Optional[int] = None
 
-        if cell_row < self.min_row:
-            self.min_row = cell_row
+    def append(self, row, col):
+        """Record a write to the cell at the integer (`row`, `col`) location."""
+        if not self.count:
+            self.min_row = self.max_row = row
+            self.min_col = self.max_col = col
+        else:
+            if row < self.min_row:
+                self.min_row = row
+            elif row > self.max_row:
+                self.max_row = row
 
-        if cell_col < self.min_col:
-            self.min_col = cell_col
+            if col < self.min_col:
+                self.min_col = col
+            elif col > self.max_col:
+                self.max_col = col
 
-        if cell_row > self.max_row:
-            self.max_row = cell_row
+        self.count += 1
 
-        if cell_col > self.max_col:
-            self.max_col = cell_col
+    def extend(self, other):
+        """Include the cells recorded by `other` within this recording."""
+        if not other.count:
+            return
 
-        self.count += 1
-        self.cells.append(cell)
+        if not self.count:
+            self.min_row, self.min_col = other.min_row, other.min_col
+            self.max_row, self.max_col = other.max_row, other.max_col
+        else:
+            self.min_row = min(self.min_row, other.min_row)
+            self.min_col = min(self.min_col, other.min_col)
+            self.max_row = max(self.max_row, other.max_row)
+            self.max_col = max(self.max_col, other.max_col)
+
+        self.count += other.count
+
+    def stop(self):
+        if self.log is not None:
+            self.end = len(self.log)
+
+    @property
+    def cells(self):
+        """Return the (row, col) location of every recorded cell, in the order written."""
+        if self.log is None:
+            raise RuntimeError("The individual cells of this recording were not retained.")
+
+        end = len(self.log) if self.end is None else self.end
+        return self.log[self.start : end]
 
     def id(self):
         return id(self)
@@ -0,0 +1,151 @@
+"""A module dedicated to reporting where the time and memory are spent while composing a workbook.
+
+A :class:`ComposeReport` is returned by :meth:`htmxl.compose.Workbook.compose` (and its
+`write`/`save` methods) when called with `report=True`, or given a report to record into.
+"""
+import dataclasses
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from htmxl.compose.profile import Profiler
+
+
+@dataclass
+class PhaseReport:
+    """The resources used by a single phase of composing a workbook.
+
+    Attributes:
+        wall_time: The elapsed time of the phase, in seconds.
+        peak_memory: The peak memory allocated during the phase (according to `tracemalloc`),
+            in bytes, beyond that which was allocated when the phase began.
+    """
+
+    wall_time: float
+    peak_memory: Optional[int] = None
+
+
+@dataclass
+class SheetReport:
+    """The phases of writing a single sheet, and the size of what was written.
+
+    The "render" and "parse" phases are only reported separately when the whole template is
+    rendered and parsed before being written; otherwise they're included in the "write" phase.
+
+    Attributes:
+        name: The name of the sheet.
+        phases: The resources used by each phase, by name.
+        html_size: The number of characters in the rendered html, or None when the sheet was
+            produced from a layout plan (and therefore no html was rendered).
+        node_count: The number of elements (including strings) written.
+        cell_count: The number of times a cell was written (including cells written more than
+            once, or later merged).
+        merged_ranges: The number of merged ranges in the sheet.
+    """
+
+    name: str
+    phases: Dict[str, PhaseReport] = field(default_factory=dict)
+    html_size: Optional[int] = None
+    node_count: int = 0
+    cell_count: int = 0
+    merged_ranges: int = 0
+
+    def count_html(self, chunks):
+        """Count the size of the html `chunks` as they're consumed."""
+        self.html_size = 0
+        for chunk in chunks:
+            self.html_size += len(chunk)
+            yield chunk
+
+
+@dataclass
+class ComposeReport:
+    """The phases of composing a workbook, and those of each of its sheets.
+
+    Attributes:
+        phases: The resources used by each workbook-level phase ("write" and "save"), by name.
+        sheets: The report of each sheet written.
+        named_styles: The number of named styles in the workbook.
+        trace_memory: Whether to measure the peak memory of each phase, which slows composition
+            considerably. Otherwise, only the time of each phase is measured.
+    """
+
+    phases: Dict[str, PhaseReport] = field(default_factory=dict)
+    sheets: List[SheetReport] = field(default_factory=list)
+    named_styles: int = 0
+    trace_memory: bool = True
+
+    # The memory allocated as each currently open phase began, and the peak since.
+    _frames: List[List[int]] = field(default_factory=list, repr=False, compare=False)
+
+    def as_dict(self):
+        """Return the report as a dict of primitive values, suitable for serialization."""
+        return {
+            name: value
+            for name, value in dataclasses.asdict(self).items()
+            if not name.startswith("_")
+        }
+
+    def add_sheet(self, worksheet):
+        """Start reporting on the writing of `worksheet`.
+
+        The returned profiler is attached to the sheet's writer, and should be detached from it
+        once the sheet is written.
+        """
+        sheet = SheetReport(name=worksheet.sheet_name)
+        self.sheets.append(sheet)
+
+        profiler = Profiler()
+        profiler.attach(worksheet.writer)
+        return sheet, profiler
+
+    @contextmanager
+    def trace(self):
+        """Trace memory allocations throughout, if they're not already being traced."""
+        if not self.trace_memory or tracemalloc.is_tracing():
+            yield
+            return
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            tracemalloc.stop()
+
+    @contextmanager
+    def measure(self, phases, name):
+        """Record the resources used within the context into `phases`, as `name`."""
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+
+            # Resetting the peak for this phase would lose the peak of any enclosing phase,
+            # so that's retained separately.
+            if self._frames:
+                enclosing = self._frames[-1]
+                enclosing[1] = max(enclosing[1], peak)
+
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            frame = [current, current]
+            self._frames.append(frame)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+
+            peak_memory = None
+            if tracing:
+                self._frames.pop()
+                peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                if self._frames:
+                    enclosing = self._frames[-1]
+                    enclosing[1] = max(enclosing[1], peak)
+
+                peak_memory = peak - frame[0]
+
+            phases[name] = PhaseReport(wall_time=wall_time, peak_memory=peak_memory)
@@ -0,0 +1,110 @@
+"""A module dedicated to streaming a composed workbook out in chunks, as it is saved.
+
+The archive of a workbook is written by `zipfile`, which compresses each part of the package
+(the xml of each sheet, its styles and so on) into the archive as that part is serialized. Given a
+file which can't report its position, `zipfile` writes the size of each part after the part
+rather than seeking back to it, so the archive can be passed on to its destination as it is
+written, rather than only once it is complete.
+"""
+import contextlib
+import queue
+import threading
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamClosed(Exception):
+    """The consumer of a stream stopped reading from it before the workbook was saved."""
+
+
+class ChunkedStream:
+    """An unseekable, write-only file, passing what is written to it on in chunks.
+
+    Args:
+        write: Called with each chunk of (at least `chunk_size`) bytes, and with whatever remains
+            when the stream is flushed.
+        chunk_size: The number of bytes to buffer before passing them on.
+    """
+
+    def __init__(self, write, chunk_size=DEFAULT_CHUNK_SIZE):
+        self._write = write
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            chunk = bytes(self._buffer)
+            self._buffer.clear()
+            self.size += len(chunk)
+            self._write(chunk)
+
+    def discard(self):
+        """Discard anything written from now on, as well as anything still buffered."""
+        self._write = _discard
+        self._buffer.clear()
+
+
+def _discard(chunk):
+    pass
+
+
+class _Finished:
+    def __init__(self, error=None):
+        self.error = error
+
+
+def iter_chunks(save, chunk_size=DEFAULT_CHUNK_SIZE, max_chunks=4):
+    """Call `save` with a `ChunkedStream` in a thread, yielding the chunks written to it.
+
+    At most `max_chunks` chunks are held while waiting to be consumed, beyond which `save` waits
+    for the consumer. If the consumer stops early (closing the generator), `save` is interrupted
+    by a `StreamClosed` the next time it writes. Any other error raised by `save` is raised here.
+    """
+    chunks = queue.Queue(maxsize=max_chunks)
+    closed = threading.Event()
+
+    def put(item):
+        while True:
+            if closed.is_set():
+                # The abandoned archive may still be written to as it's garbage collected.
+                stream.discard()
+                raise StreamClosed()
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    stream = ChunkedStream(put, chunk_size)
+
+    def run():
+        try:
+            save(stream)
+            stream.flush()
+            put(_Finished())
+        except StreamClosed:
+            pass
+        except BaseException as e:
+            with contextlib.suppress(StreamClosed):
+                put(_Finished(e))
+
+    thread = threading.Thread(target=run, name="htmxl-save", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if isinstance(item, _Finished):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        closed.set()
+        thread.join()
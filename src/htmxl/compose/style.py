@@ -2,6 +2,7 @@
 import functools
 import logging
 from copy import copy
+from types import MappingProxyType
 
 from openpyxl.styles import (
     Alignment,
@@ -23,13 +24,70 @@ default_styles = [
     {"name": "xl-underlined", "font": {"underline": "single"}},
 ]
 
+# Inline styles which are applied to each of the cells an element wrote (or their rows/columns),
+# once the element has been written.
+cell_inline_styles = frozenset(
+    {"width", "height", "text-align", "vertical-align", "data-wrap-text"}
+)
+
+
+empty_inline_style = MappingProxyType({})
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_inline_style(attrs):
+    """Parse an element's `style` and `data-*` attributes into its inline style.
+
+    Examples:
+        >>> dict(parse_inline_style((("style", "width: 10ch;text-align: center"),)))
+        {'width': 10, 'text-align': 'center'}
+        >>> dict(parse_inline_style((("data-type", "int"),)))
+        {'data-type': 'int'}
+    """
+    inline_style = {}
+    raw_inline_style = None
+    for attr, value in attrs:
+        if attr == "style":
+            raw_inline_style = value
+        else:
+            inline_style[attr] = value
+
+    if raw_inline_style is None:
+        return MappingProxyType(inline_style)
+
+    for inline_style_el in raw_inline_style.split(";"):
+        if inline_style_el:
+            name, value = inline_style_el.split(":")
+
+            if name in {"width", "min-width", "max-width"}:
+                value = int(value[0 : value.index("ch")])
+
+            elif name in {"height"}:
+                value = int(value[0 : value.index("px")])
+
+            if isinstance(value, str):
+                value = value.strip()
+
+            inline_style[name] = value
+
+    return MappingProxyType(inline_style)
+
 
 class Styler:
+    """Resolve the classes of elements into the workbook's named styles.
+
+    Styles are only added to the workbook once they're first applied to a cell, and each distinct
+    combination of classes is resolved into the style of a cell once, and reused thereafter.
+    """
+
     def __init__(self, wb, styles=None):
         self.wb = wb
         self.named_styles = {}
         self.named_style_specs = {}
 
+        self._style_names = {}
+        self._style_arrays = {}
+
         self.register_styles(default_styles)
 
         if styles is not None:
@@ -39,39 +97,32 @@ class Styler:
         return element.classes
 
     def get_inline_style(self, element):
-        inline_style = {}
-        raw_inline_style = element.get("style", None)
-        data_attributes = {
-            attr: value for attr, value in element.attrs.items() if attr.startswith("data-")
-        }
-        inline_style.update(data_attributes)
-        if raw_inline_style is None:
-            return inline_style
-
-        for inline_style_el in raw_inline_style.split(";"):
-            if inline_style_el:
-                name, value = inline_style_el.split(":")
-
-                if name in {"width", "min-width", "max-width"}:
-                    value = int(value[0 : value.index("ch")])
-
-                elif name in {"height"}:
-                    value = int(value[0 : value.index("px")])
+        """Return the (read-only) inline style of `element`.
 
-                if isinstance(value, str):
-                    value = value.strip()
+        Elements with identical `style` and `data-*` attributes share the same parsed result.
+        """
+        attrs = element.attrs
+        if not attrs:
+            return empty_inline_style
 
-                inline_style[name] = value
+        key = []
+        for attr, value in attrs.items():
+            if attr == "style" or attr.startswith("data-"):
+                key.append((attr, value))
 
-        return inline_style
+        if not key:
+            return empty_inline_style
+        return parse_inline_style(tuple(key))
 
     def register_style(self, style):
         name = style["name"]
         logger.debug("Registering named style {} in workbook {}".format(name, self.wb))
 
+        if name in self.named_style_specs:
+            raise ValueError("Style {} exists already".format(name))
+
         named_style = make_style(style)
 
-        self.wb.add_named_style(named_style)
         self.named_styles[name] = named_style
         self.named_style_specs[name] = style
 
@@ -83,20 +134,46 @@ class Styler:
         if not styles:
             return None
 
-        if len(styles) == 1:
-            return styles[0]
+        key = tuple(styles)
+        name = self._style_names.get(key)
+        if name is not None:
+            return name
 
-        name = "_".join(style for style in styles)
+        if len(styles) == 1:
+            name = styles[0]
+        else:
+            name = "_".join(style for style in styles)
 
         # Normally duplicate `register_style` calls for a given name intentionally cause an error,
         # but given that this is dynamic we dont want to regen or error on subsequent usages.
-        if name not in self.named_style_specs:
+        if name not in self.named_style_specs and len(styles) > 1:
             style_specs = [self.named_style_specs[style] for style in styles]
             result = functools.reduce(lambda a, b: dict_merge(a, b), style_specs, {})
             result["name"] = name
             self.register_style(result)
+
+        self._style_names[key] = name
         return name
 
+    def apply_style(self, cell, styles):
+        """Apply the named style calculated from `styles` to `cell`."""
+        key = tuple(styles)
+        style_array = self._style_arrays.get(key)
+        if style_array is None:
+            name = self.calculate_style(styles)
+            named_style = self.named_styles.get(name)
+            if named_style is None:
+                # Defer to openpyxl for its builtin styles, or to raise for unknown styles.
+                cell.style = name
+                style_array = cell._style
+            else:
+                if name not in self.wb.named_styles:
+                    self.wb.add_named_style(named_style)
+                style_array = named_style.as_tuple()
+            self._style_arrays[key] = style_array
+
+        cell._style = copy(style_array)
+
 
 def make_style(style_spec):
     name = style_spec["name"]
@@ -0,0 +1,128 @@
+"""A module dedicated to compiling and caching the jinja templates used to produce sheets."""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import jinja2
+
+from htmxl.compose.plan import LayoutPlan, UnsupportedTemplateError
+from htmxl.compose.values import cell
+
+logger = logging.getLogger(__name__)
+
+environment_options = dict(trim_blocks=True, lstrip_blocks=True, autoescape=False)
+
+
+class _FileLoader(jinja2.BaseLoader):
+    """Load templates by path, such that they're reloaded whenever the file's mtime changes."""
+
+    def get_source(self, environment, template):
+        directory, name = os.path.split(template)
+        return jinja2.FileSystemLoader(directory).get_source(environment, name)
+
+
+class TemplateCache:
+    """Compile jinja templates once, and reuse them across workbooks.
+
+    Templates given as strings are cached by a hash of their content, while templates given
+    as files are cached by path, and automatically reloaded when the file is modified.
+
+    Layout plans (see :class:`htmxl.compose.plan.LayoutPlan`) are similarly cached by a hash of
+    the template's content, per parser.
+
+    Args:
+        max_size: The maximum number of compiled templates of each kind to retain, evicting
+            the least recently used templates beyond that.
+        bytecode_cache_dir: An optional directory in which to persist compiled template
+            bytecode, such that new processes need not recompile templates already seen by
+            another.
+    """
+
+    def __init__(self, max_size=128, bytecode_cache_dir=None):
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+
+        self.max_size = max_size
+        self.environment = jinja2.Environment(
+            loader=_FileLoader(),
+            auto_reload=True,
+            cache_size=max_size,
+            bytecode_cache=bytecode_cache,
+            **environment_options,
+        )
+        self.environment.filters["cell"] = cell
+
+        self._templates = OrderedDict()
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._templates)
+
+    def from_string(self, source):
+        key = _hash(source)
+        return self._cached(self._templates, key, lambda: self._compile(key, source))
+
+    def from_file(self, path):
+        return self.environment.get_template(os.path.abspath(path))
+
+    def get_source(self, path):
+        """Return the current source of the template file at `path`."""
+        source, _, _ = self.environment.loader.get_source(self.environment, os.path.abspath(path))
+        return source
+
+    def plan(self, source, parser):
+        """Return the `LayoutPlan` of the template `source`, or None if it cannot be planned."""
+
+        def compile_plan():
+            try:
+                return LayoutPlan.compile(self.environment, source, parser)
+            except UnsupportedTemplateError as e:
+                logger.debug("Unable to compile a layout plan for the template: {}".format(e))
+                return None
+
+        return self._cached(self._plans, (_hash(source), parser), compile_plan)
+
+    def _cached(self, cache, key, factory):
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        value = factory()
+
+        with self._lock:
+            cache[key] = value
+            while len(cache) > self.max_size:
+                cache.popitem(last=False)
+
+        return value
+
+    def _compile(self, key, source):
+        environment = self.environment
+        bytecode_cache = environment.bytecode_cache
+
+        code = None
+        if bytecode_cache is not None:
+            bucket = bytecode_cache.get_bucket(environment, key, None, source)
+            code = bucket.code
+
+        if code is None:
+            code = environment.compile(source)
+            if bytecode_cache is not None:
+                bucket.code = code
+                bytecode_cache.set_bucket(bucket)
+
+        return environment.template_class.from_code(
+            environment, code, environment.make_globals(None)
+        )
+
+
+def _hash(source):
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+template_cache = TemplateCache()
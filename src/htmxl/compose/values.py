@@ -0,0 +1,95 @@
+"""Native python values, passed from a template to the cells it produces by reference.
+
+Values rendered by a template are normally written as text, parsed back out of the html, and then
+converted once again according to the cell's `data-type`. Values passed through the `cell` filter
+are instead kept in the sheet's :class:`CellValues`, and only a short placeholder is rendered in
+their place. The writer then writes the original value (a date, number, bool, etc) to the cell.
+Placeholders are resolved wherever a value is written: in the text of cells, the `value` of an
+`<input>` or `<option>`, and the `<title>` of the sheet (the latter two as strings).
+
+.. code-block:: html
+
+   <td>{{ row.when | cell }}</td>
+"""
+import re
+from typing import Any, Dict, Optional
+
+from htmxl.compose.compat import pass_context
+
+VALUE_START = "\ue002"
+VALUE_END = "\ue003"
+
+# The name of the template variable holding the `CellValues` of the sheet being rendered.
+CONTEXT_KEY = "htmxl_cell_values"
+
+_value_pattern = re.compile(f"{VALUE_START}(\\d+){VALUE_END}")
+
+
+class CellValues:
+    """The values passed through the `cell` filter while rendering the template of a sheet."""
+
+    def __init__(self, values: Optional[Dict[int, Any]] = None):
+        self.values = values if values is not None else {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value: Any) -> str:
+        """Retain `value`, returning the placeholder rendered in its place."""
+        index = len(self.values)
+        self.values[index] = value
+        return f"{VALUE_START}{index}{VALUE_END}"
+
+    def resolve(self, text: str) -> Any:
+        """Get the value of `text`, if it is a placeholder, or `text` itself otherwise.
+
+        Placeholders embedded within other text are replaced by their value, as a string.
+        """
+        if VALUE_START not in text:
+            return text
+
+        match = _value_pattern.fullmatch(text.strip())
+        if match:
+            return self.values[int(match.group(1))]
+
+        return self.substitute(text)
+
+    def substitute(self, text: str) -> str:
+        """Replace the placeholders within `text` by their values, as strings."""
+        if VALUE_START not in text:
+            return text
+
+        return _value_pattern.sub(lambda match: str(self.values[int(match.group(1))]), text)
+
+    def subset(self, tokens) -> "CellValues":
+        """Get the values referenced by `tokens` (or any of their descendants).
+
+        Values are referenced by the text of a token, or the value of any of its attributes.
+        """
+        values = {}
+        pending = list(tokens)
+        while pending:
+            token = pending.pop()
+            texts = [token.text]
+            if token.name != "string":
+                texts.extend(token.attrs.values())
+
+            for text in texts:
+                if isinstance(text, str) and VALUE_START in text:
+                    for match in _value_pattern.finditer(text):
+                        index = int(match.group(1))
+                        values[index] = self.values[index]
+
+            if token.name != "string":
+                pending.extend(token.content())
+        return CellValues(values)
+
+
+@pass_context
+def cell(context, value):
+    """Pass `value` to the cell it's rendered into as is, rather than as text."""
+    cell_values = context.get(CONTEXT_KEY)
+    if cell_values is None:
+        # Rendered outside of composing a sheet, where there's nothing to pass the value to.
+        return value
+    return cell_values.add(value)
@@ -1,99 +1,388 @@
 """A module dedicated to the core Workbook class which is a wrapper around the openpyxl workbook."""
 
+import contextlib
 import logging
 import uuid
 
-import jinja2
-import openpyxl
-
+from htmxl.compose.backends import get_backend
+from htmxl.compose.parallel import write_parallel
+from htmxl.compose.profile import Profiler
+from htmxl.compose.report import ComposeReport
+from htmxl.compose.stream import ChunkedStream, DEFAULT_CHUNK_SIZE, iter_chunks
 from htmxl.compose.style import Styler
+from htmxl.compose.template import template_cache as default_template_cache
+from htmxl.compose.values import CellValues, CONTEXT_KEY
 from htmxl.compose.write import Writer
 from htmxl.token import get_parser
 
 logger = logging.getLogger(__name__)
 
-jinja_env = jinja2.Environment(trim_blocks=True, lstrip_blocks=True, autoescape=False)
+jinja_env = default_template_cache.environment
+
+_write_only_modes = {"streaming", "native"}
 
 
 class Workbook:
-    def __init__(self, styles=None, workbook_kwargs=None, *, parser=None):
-        if workbook_kwargs is None:
-            workbook_kwargs = {}
+    """Compose an excel workbook from html templates.
 
-        self.wb = openpyxl.workbook.Workbook(**workbook_kwargs)
-        self.wb.remove(self.wb.worksheets[0])
+    Args:
+        styles: A list of named style specifications, referenced by an element's `class`.
+        workbook_kwargs: Keyword arguments forwarded to the `openpyxl.workbook.Workbook`.
+        parser: The name of the html parser to use, by default the first one installed.
+        mode: Either "default", in which the whole workbook is held in memory until it is saved,
+            or "streaming", which writes each row to a write-only workbook as soon as the layout
+            of that row is final, so that memory usage does not grow with the number of rows,
+            or "native", which streams rows just as "streaming" does, but serializes them to the
+            sheet's xml directly rather than through openpyxl. By default, the default mode of
+            the `engine`.
+        engine: The name of the backend writing the workbook out (or a `Backend` class), either
+            "openpyxl" (supporting each of the modes) or "xlsxwriter" (which only streams, in
+            xlsxwriter's `constant_memory` mode).
+        incremental: Whether to feed the rendered template to the parser in chunks as it is
+            rendered, writing each element as soon as it has been parsed rather than rendering
+            and parsing the whole document up front. Only parsers which support incremental
+            parsing (lxml) benefit from this.
+        template_cache: The `TemplateCache` used to compile templates, by default one shared by
+            all workbooks.
+        layout_plans: Whether to compile each template into a cached layout plan, so that
+            composing the same template again (with any data) skips rendering the template to
+            html and parsing it. Templates which cannot be planned are composed normally.
+        profile: Whether to record the calls, time spent and cells written by each tag's
+            handler, available as the `profiler` once the workbook has been written.
+    """
+
+    def __init__(
+        self,
+        styles=None,
+        workbook_kwargs=None,
+        *,
+        parser=None,
+        mode=None,
+        engine="openpyxl",
+        incremental=False,
+        template_cache=None,
+        layout_plans=False,
+        profile=False,
+    ):
+        self.backend = get_backend(engine)(mode, workbook_kwargs)
+        self.wb = self.backend.wb
         self.worksheets = []
+        self.styles = styles
         self.styler = Styler(self.wb, styles)
         self.parser = parser
+        self.mode = self.backend.mode
+        self.incremental = incremental
+        self.template_cache = template_cache or default_template_cache
+        self.layout_plans = layout_plans
+        self.profiler = Profiler() if profile else None
 
     def new_worksheet(self, parser=None, sheet_name=None):
+        sheet_name = sheet_name or new_sheet_name()
         worksheet = Worksheet(
             styler=self.styler,
             wb=self.wb,
             parser=parser or self.parser,
             sheet_name=sheet_name,
+            writer=self.backend.create_writer(sheet_name),
+            incremental=self.incremental,
         )
+        if self.profiler is not None:
+            self.profiler.attach(worksheet.writer)
+
         self.worksheets.append(worksheet)
 
         return worksheet
 
-    def add_sheet_from_template_file(self, template_file, data=None, sheet_name=None):
-        if data is None:
-            data = {}
+    def add_sheet_from_template_file(self, template_file, data=None, sheet_name=None, parser=None):
+        template = self.template_cache.from_file(template_file)
 
-        with open(template_file, "r") as f:
-            return self.add_sheet_from_template(template=f.read(), data=data, sheet_name=sheet_name)
+        source = None
+        if self.layout_plans:
+            source = self.template_cache.get_source(template_file)
+
+        worksheet = self._add_sheet(
+            template, source=source, data=data, parser=parser, sheet_name=sheet_name
+        )
+        worksheet.template_file = template_file
+        return worksheet
 
     def add_sheet_from_template(self, template, data=None, parser=None, sheet_name=None):
+        template_source = template
+        source = template if self.layout_plans else None
+        template = self.template_cache.from_string(template)
+        worksheet = self._add_sheet(
+            template, source=source, data=data, parser=parser, sheet_name=sheet_name
+        )
+        worksheet.template_source = template_source
+        return worksheet
+
+    def _add_sheet(self, template, source=None, data=None, parser=None, sheet_name=None):
         if data is None:
             data = {}
 
         worksheet = self.new_worksheet(parser=parser or self.parser, sheet_name=sheet_name)
-        worksheet.template = jinja_env.from_string(template)
+        worksheet.template = template
         worksheet.data = data
+
+        if source is not None:
+            worksheet.plan = self.template_cache.plan(source, get_parser(worksheet.parser))
         return worksheet
 
-    def write(self):
+    def write(self, report=False, workers=None):
+        """Write each of the sheets.
+
+        Args:
+            report: Whether to measure the time and memory spent writing each sheet, and return
+                the resulting `ComposeReport`. Alternatively, the `ComposeReport` to record into.
+            workers: The number of processes across which to write the sheets in parallel. By
+                default (or given 1), the sheets are written sequentially in this process.
+        """
+        composition = _composition_report(report)
+        with _tracing(composition):
+            self._write(composition, workers=workers)
+        return composition
+
+    def save(self, file_path, report=False):
+        """Save the workbook to `file_path`.
+
+        Args:
+            file_path: The path, or file-like object, to save the workbook to.
+            report: Whether to measure the time and memory spent saving the workbook, and
+                return the resulting `ComposeReport`. Alternatively, the `ComposeReport` to
+                record into.
+        """
+        composition = _composition_report(report)
+        with _tracing(composition):
+            self._save(file_path, composition)
+        return composition
+
+    def compose(self, file_path, report=False, workers=None):
+        """Write each of the sheets, and then save the workbook to `file_path`.
+
+        Args:
+            file_path: The path, or file-like object, to save the workbook to.
+            report: Whether to measure the time and memory spent in each phase of composing the
+                workbook, and return the resulting `ComposeReport`. Alternatively, the
+                `ComposeReport` to record into. Note that measuring memory (with `tracemalloc`)
+                slows composition considerably.
+            workers: The number of processes across which to write the sheets in parallel. Each
+                sheet is written by a worker into a workbook of its own, and then copied into
+                this one, so this only pays off for workbooks of several sizeable sheets.
+        """
+        logger.debug("Composing {}".format(self.wb))
+        composition = _composition_report(report)
+        with _tracing(composition):
+            self._write(composition, workers=workers)
+            self._save(file_path, composition)
+        return composition
+
+    def compose_to_stream(self, sink, chunk_size=DEFAULT_CHUNK_SIZE, report=False, workers=None):
+        """Write each of the sheets, and then save the workbook to `sink`, in chunks.
+
+        Unlike saving to a buffer, which holds the whole file until it's complete, each chunk
+        of the archive is passed on as soon as it has been written.
+
+        Args:
+            sink: A file-like object, or a callable given each chunk (such as the `write`
+                callable returned by a WSGI `start_response`). It needn't be seekable.
+            chunk_size: The number of bytes to buffer before writing them to the `sink`.
+            report: As for `compose`.
+            workers: As for `compose`.
+        """
+        stream = ChunkedStream(getattr(sink, "write", sink), chunk_size)
+        composition = self.compose(stream, report=report, workers=workers)
+        stream.flush()
+        return composition
+
+    def iter_bytes(self, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+        """Write each of the sheets, and then yield the saved workbook in chunks as it's saved.
+
+        Suitable as the body of a streaming http response. The sheets are written as iteration
+        begins, and the workbook is then saved in a separate thread, each chunk being yielded
+        as soon as it has been written. Closing the iterator early stops the saving.
+
+        Args:
+            chunk_size: The (minimum) number of bytes in each chunk but the last.
+            workers: As for `compose`.
+        """
+        self._write(workers=workers)
+        yield from iter_chunks(self._save, chunk_size)
+
+    def _write(self, composition=None, workers=None):
         logger.debug("Writing sheets for {}".format(self.wb))
+        if workers is not None and workers > 1:
+            if self.mode in _write_only_modes:
+                raise ValueError(f"Sheets cannot be written in parallel in {self.mode} mode.")
+            if self.profiler is not None:
+                raise ValueError("Sheets cannot be written in parallel while profiling.")
+
+        if composition is None:
+            self._write_sheets(workers=workers)
+            return
+
+        with composition.measure(composition.phases, "write"):
+            self._write_sheets(composition, workers=workers)
+        composition.named_styles = len(self.wb.named_styles)
+
+    def _write_sheets(self, composition=None, workers=None):
+        parallel = []
+        if workers is not None and workers > 1:
+            parallel = [sheet for sheet in self.worksheets if sheet.is_portable]
+
+        # A single sheet is instead written here, where its `data-parallel` tables (if any) are
+        # laid out across the workers.
+        if len(parallel) < 2:
+            parallel = []
+
+        # Sheets which can't be sent to a worker (given an already compiled template) are
+        # written here, before the rest are copied in, in order.
         for sheet in self.worksheets:
-            sheet.write()
+            if sheet not in parallel:
+                sheet.writer.workers = workers
+                sheet.write(report=composition)
 
-    def save(self, file_path):
+        if parallel:
+            write_parallel(self, parallel, workers, composition=composition)
+
+    def _save(self, file_path, composition=None):
         logger.debug("Saving {} to {}".format(self.wb, file_path))
-        self.wb.save(file_path)
+        if composition is None:
+            self.backend.save(file_path)
+            return
+
+        with composition.measure(composition.phases, "save"):
+            self.backend.save(file_path)
+
+
+def new_sheet_name():
+    return str(uuid.uuid4())[0:8]
 
-    def compose(self, file_path):
-        logger.debug("Composing {}".format(self.wb))
-        self.write()
-        self.save(file_path)
+
+def _composition_report(report):
+    if isinstance(report, ComposeReport):
+        return report
+    return ComposeReport() if report else None
+
+
+def _tracing(composition):
+    if composition is None:
+        return contextlib.nullcontext()
+    return composition.trace()
 
 
 class Worksheet:
-    def __init__(self, wb, styler, parser=None, sheet_name=None):
-        self.sheet_name = sheet_name or str(uuid.uuid4())[0:8]
-        self.writer = Writer(wb.create_sheet(self.sheet_name))
+    def __init__(
+        self,
+        wb,
+        styler,
+        parser=None,
+        sheet_name=None,
+        writer_class=Writer,
+        incremental=False,
+        writer=None,
+    ):
+        self.sheet_name = sheet_name or new_sheet_name()
+        if writer is None:
+            writer = writer_class(wb.create_sheet(self.sheet_name))
+        self.writer = writer
         self.styler = styler
         self.data = {}
         self.template = None
+        self.template_file = None
+        self.template_source = None
+        self.plan = None
         self.parser = parser
+        self.incremental = incremental
 
     @property
     def worksheet(self):
         return self.writer.sheet
 
+    @property
+    def is_portable(self):
+        """Whether the sheet can be written by another process, given its template's source."""
+        return self.template_file is not None or self.template_source is not None
+
+    @property
+    def context(self):
+        """The variables the template is rendered with: the sheet's data, and its cell values."""
+        return {**self.data, CONTEXT_KEY: self.writer.cell_values}
+
     @property
     def tree(self):
         logger.debug(
-            "Parsing the template into a tree of nodes for sheet <{}>".format(self.sheet_name)
+            "Parsing the template into a stream of events for sheet <{}>".format(self.sheet_name)
         )
         parser = get_parser(self.parser)
-        return parser.parse_str(self.rendered)
+        return parser.parse_events(self.rendered)
 
     @property
     def rendered(self):
         logger.debug("Rendering sheet <{}>".format(self.sheet_name))
-        return self.template.render(self.data)
+        return self.template.render(self.context)
 
-    def write(self):
+    @property
+    def stream(self):
+        """Lazily render and parse the template, as the resulting tree is consumed."""
+        logger.debug(
+            "Incrementally rendering and parsing the template for sheet <{}>".format(
+                self.sheet_name
+            )
+        )
+        parser = get_parser(self.parser)
+        return parser.parse_iter(self.template.generate(self.context))
+
+    def write(self, report=None):
+        """Write the sheet, recording the phases of doing so into the `ComposeReport`, if given."""
         logger.debug("Writing sheet <{}>".format(self.sheet_name))
-        self.writer.write(element=self.tree, styler=self.styler)
+        self.writer.data = self.data
+
+        # The values passed through the `cell` filter are only kept while the sheet is written.
+        self.writer.cell_values = CellValues()
+        try:
+            if report is not None:
+                self._write_reported(report)
+            else:
+                self._write()
+        finally:
+            self.writer.cell_values = None
+
+    def _write(self):
+        if self.plan is not None:
+            logger.debug("Producing sheet <{}> from its layout plan".format(self.sheet_name))
+            tree = self.plan.tree(self.context)
+        elif self.incremental:
+            tree = self.stream
+        else:
+            tree = self.tree
+
+        self.writer.write(element=tree, styler=self.styler)
+
+    def _write_reported(self, report):
+        sheet, profiler = report.add_sheet(self)
+        parser = get_parser(self.parser)
+
+        try:
+            if self.plan is not None:
+                with report.measure(sheet.phases, "write"):
+                    self.writer.write(element=self.plan.tree(self.context), styler=self.styler)
+
+            elif self.incremental:
+                chunks = sheet.count_html(self.template.generate(self.context))
+                with report.measure(sheet.phases, "write"):
+                    self.writer.write(element=parser.parse_iter(chunks), styler=self.styler)
+
+            else:
+                with report.measure(sheet.phases, "render"):
+                    rendered = self.rendered
+                with report.measure(sheet.phases, "parse"):
+                    tree = parser.parse_events(rendered)
+                with report.measure(sheet.phases, "write"):
+                    self.writer.write(element=tree, styler=self.styler)
+                sheet.html_size = len(rendered)
+        finally:
+            profiler.detach(self.writer)
+
+        sheet.node_count = sum(stats.calls for stats in profiler.stats.values())
+        sheet.cell_count = sum(stats.cells for stats in profiler.stats.values())
+        sheet.merged_ranges = len(self.worksheet.merged_cells.ranges)
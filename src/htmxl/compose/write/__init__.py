@@ -1,2 +1,4 @@
 # flake8: noqa
+from htmxl.compose.write.native import NativeWriter
+from htmxl.compose.write.streaming import StreamingWriter
 from htmxl.compose.write.writer import Writer
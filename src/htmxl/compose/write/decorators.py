@@ -1,6 +1,8 @@
 import enum
 import functools
 
+from htmxl.compose.style import cell_inline_styles
+
 
 @enum.unique
 class CursorStrategy(enum.Enum):
@@ -13,6 +15,9 @@ def return_cursor(strategy):
     def wrapper(fn):
         @functools.wraps(fn)
         def wrapped(element, writer, styler, style):
+            inline_style = styler.get_inline_style(element)
+            writer.open_scope(strategy, inline_style)
+
             if strategy == CursorStrategy.bottom_left:
                 # Must be determined before we potentially change the location by `fn`.
                 column = writer.col
@@ -21,8 +26,7 @@ def return_cursor(strategy):
                 element, recording = fn(element, writer, styler, style)
 
                 if recording:
-                    _, bottom_right = recording.bounding_cells
-                    row = bottom_right.row
+                    row = recording.max_row
 
                 writer.move_to(col=column, row=row)
                 writer.move_down()
@@ -40,11 +44,13 @@ def return_cursor(strategy):
             else:
                 raise ValueError("Strategy {} unknown".format(strategy))
 
-            writer.style_inline(
-                element=element,
-                included_cells=recording.cells,
-                inline_style=styler.get_inline_style(element),
-            )
+            if not cell_inline_styles.isdisjoint(inline_style):
+                writer.style_inline(
+                    element=element,
+                    included_cells=recording.cells,
+                    inline_style=inline_style,
+                )
+            writer.close_scope(inline_style)
 
             return element, recording
 
@@ -1,26 +1,16 @@
-import ast
 import logging
 
-import pendulum
 from openpyxl.worksheet.datavalidation import DataValidation
 
 import htmxl.compose.attributes
+from htmxl.compose.binding import bound_rows, BoundStream
+from htmxl.compose.convert import convert, convert_value
+from htmxl.compose.parallel import write_rows_parallel
 from htmxl.compose.write.decorators import CursorStrategy, return_cursor
 
 logger = logging.getLogger(__name__)
 
 
-_type_map = {
-    None: str,
-    "str": str,
-    "int": int,
-    "float": float,
-    "date": lambda x: pendulum.parse(x).date(),
-    "datetime": lambda x: pendulum.parse(x),
-    "bool": ast.literal_eval,
-}
-
-
 def write(element, writer, styler, style=None):
     tag = element.name
     try:
@@ -28,11 +18,12 @@ def write(element, writer, styler, style=None):
     except KeyError:
         raise RuntimeError(f"Encountered unhandled or unimplemented tag {tag}.")
     else:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Writing <{}> at {}".format(tag, writer.ref))
         handler(element, writer, styler, style)
 
 
 def write_body(element, writer, styler, style):
-    logger.debug("Writing < body > at {}".format(writer.ref))
     for item in element.content():
         write(item, writer, styler)
 
@@ -43,13 +34,12 @@ def write_head(element, writer, styler, style):
         for item in element.content():
             write_head(item, writer, styler, style)
     elif tag == "string":
-        writer.sheet.title = element.text
+        writer.sheet.title = resolve_text(element.text, writer)
     else:
         raise RuntimeError(f"Encountered unhandled or unimplemented tag {tag}.")
 
 
 def write_br(element, writer, styler, style):
-    logger.debug("Writing <br> at {}".format(writer.ref))
     row = writer.row
     col = writer.col
     value = writer.get_cell().value
@@ -63,23 +53,69 @@ def write_br(element, writer, styler, style):
 
 
 def write_value(element, writer, styler, style):
-    logger.debug("Writing <value> at {}".format(writer.ref))
     writer.write_cell(element, styler, style)
 
 
+def bound_value(element, field, data_type):
+    """Get the value of the `data-field` of a cell of a `data-rows` tbody."""
+    if not isinstance(element, BoundStream):
+        raise ValueError(
+            f"<{element.name}> elements may only have a `data-field` within a `data-rows` tbody."
+        )
+
+    return convert_value(element.field(field), data_type)
+
+
+def text_value(text, writer, data_type):
+    """Get the value of the text of a cell (or of an attribute), converted to its `data_type`.
+
+    The values passed through the `cell` filter are written as they were given to the template,
+    rather than as the text they would otherwise have been rendered as.
+    """
+    cell_values = writer.cell_values
+    if cell_values is not None:
+        text = cell_values.resolve(text)
+        if not isinstance(text, str):
+            return convert_value(text, data_type)
+
+    return convert(text.strip(), data_type)
+
+
+def resolve_text(text, writer):
+    """Replace the placeholders of values passed through the `cell` filter within `text`."""
+    if writer.cell_values is None:
+        return text
+    return writer.cell_values.substitute(text)
+
+
 @return_cursor(CursorStrategy.top_right)
 def write_td(element, writer, styler, style):
-    logger.debug("Writing <td> at {}".format(writer.ref))
     style = styler.get_style(element) or style
     with writer.record() as recording:
-        if element.text:
-            data_type = _type_map[element.attrs.get("data-type")]
-            logger.debug("Setting cell {} to {}".format(writer.ref, data_type))
-            write_value(data_type(element.text.strip()), writer, styler, style)
-
-        children = [child for child in element.content()]
-        for child in children:
-            logging.debug("Recursing into element {}".format(child.name))
+        # Cells without a `data-type` of their own take that declared for their column, if any.
+        data_type = element.attrs.get("data-type") or writer.column_types.get(writer.col)
+
+        field = element.get(htmxl.compose.attributes.DATA_FIELD, None)
+        if field is not None:
+            write_value(bound_value(element, field, data_type), writer, styler, style)
+        elif element.text:
+            write_value(text_value(element.text, writer, data_type), writer, styler, style)
+
+        # The strings (of parsers which include an element's own text among its content) are
+        # already written, as the converted text of the cell, unless it has elements among its
+        # content too. Children are written as they're read, since some parsers discard them
+        # once read past.
+        strings = [] if element.text else None
+        for child in element.content():
+            if strings is not None:
+                if child.name == "string":
+                    strings.append(child)
+                    continue
+
+                for string in strings:
+                    write(string, writer, styler, style)
+                strings = None
+
             write(child, writer, styler, style)
 
     return element, recording
@@ -87,7 +123,6 @@ def write_td(element, writer, styler, style):
 
 @return_cursor(CursorStrategy.bottom_left)
 def write_tr(element, writer, styler, style):
-    logger.debug("Writing <tr> at {}".format(writer.ref))
     style = styler.get_style(element) or style
     with writer.record() as recording:
         for td in element.content():
@@ -98,18 +133,25 @@ def write_tr(element, writer, styler, style):
 
 @return_cursor(CursorStrategy.top_right)
 def write_th(element, writer, styler, style):
-    logger.debug("Writing <th> at {}".format(writer.ref))
     style = styler.get_style(element) or style
     with writer.record() as recording:
-        data_type = _type_map[element.attrs.get("data-type")]
-        logger.debug("Setting cell {} to {}".format(writer.ref, data_type))
-        write_value(
-            data_type(element.text.strip() if element.text else None), writer, styler, style
-        )
-
+        data_type = element.attrs.get("data-type")
         colspan = int(element.attrs.get("colspan", 1))
         rowspan = int(element.attrs.get("rowspan", 1))
 
+        column_type = element.attrs.get(htmxl.compose.attributes.DATA_COLUMN_TYPE)
+        if column_type is not None:
+            for col in range(writer.col, writer.col + colspan):
+                writer.column_types[col] = column_type
+
+        field = element.get(htmxl.compose.attributes.DATA_FIELD, None)
+        if field is not None:
+            write_value(bound_value(element, field, data_type), writer, styler, style)
+        elif element.text:
+            write_value(text_value(element.text, writer, data_type), writer, styler, style)
+        else:
+            write_value(convert(None, data_type), writer, styler, style)
+
         # If we want this cell to span more than one row or column
         # we can traverse to the maximum row and column and write some blank data.
         # This will expand the recorded "bounding ref" to the proper location
@@ -122,7 +164,7 @@ def write_th(element, writer, styler, style):
     if len(recording) > 1:
         if rowspan or colspan:
             merge_ref = recording.bounding_ref
-            writer.sheet.merge_cells(merge_ref)
+            writer.merge_cells(merge_ref)
             if style:
                 style_name = styler.calculate_style(style)
                 reference_style = styler.named_styles[style_name]
@@ -133,14 +175,19 @@ def write_th(element, writer, styler, style):
 
 @return_cursor(CursorStrategy.bottom_left)
 def write_table(element, writer, styler, style):
-    logger.debug("Writing <table> at {}".format(writer.ref))
     style = styler.get_style(element) or style
     autofilter = element.get(htmxl.compose.attributes.DATA_AUTOFILTER, "false")
 
+    # Column types are declared per table, and only apply to the table's own cells.
+    column_types = writer.column_types
+    writer.column_types = {}
+
     with writer.record() as recording:
         for sub_component in element.content():
             write(sub_component, writer, styler, style)
 
+    writer.column_types = column_types
+
     if autofilter == "true":
         bounding_ref = recording.bounding_ref
         writer.auto_filter(bounding_ref)
@@ -148,9 +195,23 @@ def write_table(element, writer, styler, style):
     return element, recording
 
 
+def write_colgroup(element, writer, styler, style):
+    """Declare the `data-type` of the columns of a table, by way of its `<col>` elements."""
+    col = writer.col
+    for item in element.content():
+        if item.name != "col":
+            continue
+
+        span = int(item.attrs.get("span", 1))
+        data_type = item.attrs.get("data-type")
+        if data_type is not None:
+            for offset in range(span):
+                writer.column_types[col + offset] = data_type
+        col += span
+
+
 @return_cursor(CursorStrategy.bottom_left)
 def write_thead(element, writer, styler, style):
-    logger.debug("Writing <thead> at {}".format(writer.ref))
     style = styler.get_style(element) or style
     with writer.record() as recording:
         for sub_component in element.content():
@@ -161,18 +222,25 @@ def write_thead(element, writer, styler, style):
 
 @return_cursor(CursorStrategy.bottom_left)
 def write_tbody(element, writer, styler, style):
-    logger.debug("Writing <tbody> at {}".format(writer.ref))
     style = styler.get_style(element) or style
+    rows = element.get(htmxl.compose.attributes.DATA_ROWS, None)
+    parallel = element.get(htmxl.compose.attributes.DATA_PARALLEL, "false") == "true"
+
     with writer.record() as recording:
-        for sub_component in element.content():
-            write(sub_component, writer, styler, style)
+        if rows is not None:
+            for sub_component in bound_rows(element, rows, writer.data):
+                write(sub_component, writer, styler, style)
+        elif parallel and writer.workers is not None and writer.workers > 1:
+            write_rows_parallel(writer, element.content(), styler, style)
+        else:
+            for sub_component in element.content():
+                write(sub_component, writer, styler, style)
 
     return element, recording
 
 
 @return_cursor(CursorStrategy.bottom_left)
 def write_div(element, writer, styler, style):
-    logger.debug("Writing <div> at {}".format(writer.ref))
     style = styler.get_style(element) or style
 
     with writer.record() as recording:
@@ -184,7 +252,6 @@ def write_div(element, writer, styler, style):
 
 @return_cursor(CursorStrategy.top_right)
 def write_span(element, writer, styler, style):
-    logger.debug("Writing <span> at {}".format(writer.ref))
     with writer.record() as recording:
         for item in element.content():
             style = styler.get_style(element) or style
@@ -194,12 +261,14 @@ def write_span(element, writer, styler, style):
 
 
 def write_string(element, writer, styler, style):
-    write_value(element.text, writer, styler, style)
+    text = element.text
+    if writer.cell_values is not None:
+        text = writer.cell_values.resolve(text)
+    write_value(text, writer, styler, style)
 
 
 @return_cursor(CursorStrategy.top_right)
 def write_input(element, writer, styler, style):
-    logger.debug("Writing <input> at {}".format(writer.ref))
     style = styler.get_style(element) or style
 
     recording = []
@@ -207,11 +276,9 @@ def write_input(element, writer, styler, style):
     if list_validation:
         writer.add_validation_to_cell(list_validation)
         with writer.record() as recording:
-            data_type = _type_map[element.attrs.get("data-type")]
             list_default_value = element.attrs.get("value", "")
-
-            logger.debug("Setting cell {} to {}".format(writer.ref, data_type))
-            write_value(data_type(list_default_value.strip()), writer, styler, style)
+            data_type = element.attrs.get("data-type")
+            write_value(text_value(list_default_value, writer, data_type), writer, styler, style)
 
     return element, recording
 
@@ -228,7 +295,7 @@ def create_datavalidation(element, writer, styler, style):
         if item.name != "option":
             raise ValueError("<datalist> element only supports <option> type children.")
 
-        option = item.get("value", item.text)
+        option = resolve_text(item.get("value", item.text), writer)
         options.append(option)
 
     validation_formula = ",".join(options)
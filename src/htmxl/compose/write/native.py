@@ -0,0 +1,202 @@
+"""A module dedicated to writing the rows of worksheets as SpreadsheetML, bypassing openpyxl.
+
+In streaming mode, every row is appended to an openpyxl write-only worksheet, which binds each
+value to a cell (again) and serializes each cell as an element through lxml. The
+:class:`NativeWriter` instead serializes the rows it flushes directly to the xml of the sheet,
+as text, streaming them to the temporary file which is copied into the workbook's archive when
+it is saved.
+
+Everything other than the rows (the sheet's properties, column widths, merged cells, autofilter
+and validations, along with the workbook's styles and every other part of the package) is still
+written by openpyxl, from the same write-only workbook as in streaming mode. Styles are added to
+the workbook's style tables as cells are styled, and strings are written inline, just as
+openpyxl writes them.
+
+Doing so relies upon openpyxl's internals (its private `_writer` modules, and the `_writer` of a
+write-only worksheet), which other versions of openpyxl needn't have. Where they're missing,
+sheets are written just as in streaming mode instead.
+"""
+import io
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+
+from openpyxl.compat import safe_string
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+from htmxl.compose.write.streaming import StreamingSheet, StreamingWriter
+
+try:
+    from openpyxl.cell._writer import write_cell
+    from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+    from openpyxl.worksheet._writer import ALL_TEMP_FILES, create_temporary_file, WorksheetWriter
+    from openpyxl.xml.functions import xmlfile
+except ImportError:
+    WriteOnlyWorksheet = WorksheetWriter = None
+
+logger = logging.getLogger(__name__)
+
+_date_types = (date, datetime, time, timedelta)
+
+
+def is_supported(sheet):
+    """Whether the openpyxl internals which `sheet` would be natively written with exist."""
+    return (
+        WorksheetWriter is not None
+        and isinstance(sheet, WriteOnlyWorksheet)
+        and hasattr(sheet, "_writer")
+        and all(hasattr(WorksheetWriter, name) for name in ("write_top", "write_tail", "read"))
+        and all(hasattr(sheet.parent, name) for name in ("iso_dates", "epoch"))
+    )
+
+
+def escape(text):
+    """Escape `text` as the content of an element, as lxml would."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    return text
+
+
+class NativeSheetWriter:
+    """Write the xml of a write-only worksheet to a temporary file, row by row.
+
+    Stands in for the sheet's openpyxl `WorksheetWriter`, which the workbook's `ExcelWriter`
+    closes and copies into the archive when it is saved. The xml preceding and following the
+    rows is serialized by a `WorksheetWriter`, when the first row is written and when the sheet
+    is closed respectively.
+    """
+
+    marker = "<sheetData></sheetData>"
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.out = create_temporary_file()
+        self._file = open(self.out, "w", encoding="utf-8", newline="")
+        self._rels = None
+        self._started = False
+
+    def _render(self):
+        """Serialize the sheet without any rows, split around its (empty) `sheetData`."""
+        writer = WorksheetWriter(self.ws, out=io.BytesIO())
+        writer.write_top()
+        xf = writer.xf.send(True)
+        with xf.element("sheetData"):
+            pass
+        writer.xf.send(None)
+        writer.write_tail()
+
+        xml = writer.read().decode("utf-8").replace("<sheetData/>", self.marker)
+        head, _, tail = xml.partition(self.marker)
+        return writer, head, tail
+
+    def start(self):
+        if not self._started:
+            _, head, _ = self._render()
+            self._file.write(head)
+            self._file.write("<sheetData>")
+            self._started = True
+
+    def write(self, xml):
+        self.start()
+        self._file.write(xml)
+
+    def write_rows(self):
+        """Rows are written as they are flushed, so there is nothing left to write."""
+        self.start()
+
+    def write_tail(self):
+        writer, _, tail = self._render()
+        self._rels = writer._rels
+        self._file.write("</sheetData>")
+        self._file.write(tail)
+
+    def close(self):
+        self._file.close()
+
+    def cleanup(self):
+        os.remove(self.out)
+        ALL_TEMP_FILES.remove(self.out)
+
+
+class NativeSheet(StreamingSheet):
+    """Buffer cells for a write-only worksheet, and serialize its rows as they are flushed."""
+
+    def __init__(self, sheet):
+        super().__init__(sheet)
+        sheet._writer = self.writer = NativeSheetWriter(sheet)
+        self.iso_dates = sheet.parent.iso_dates
+        self.epoch = sheet.parent.epoch
+
+    def write_row(self, row, cells):
+        dimension = self.sheet.row_dimensions.get(row)
+        attrs = "".join(f' {key}="{value}"' for key, value in dimension) if dimension else ""
+
+        parts = [f'<row r="{row}"{attrs}>']
+        if cells:
+            for column in sorted(cells):
+                cell = cells[column]
+                if cell._value is None and not cell.has_style:
+                    continue
+                parts.append(self.cell_xml(cell, f"{get_column_letter(column)}{row}"))
+        parts.append("</row>")
+
+        self.writer.write("".join(parts))
+
+    def cell_xml(self, cell, coordinate):
+        """Serialize `cell`, as openpyxl's `write_cell` would."""
+        data_type = cell.data_type
+        value = cell._value
+
+        attrs = f'r="{coordinate}"'
+        if cell.has_style:
+            attrs = f'{attrs} s="{cell.style_id}"'
+
+        if data_type == "s" and type(value) is str:
+            if value == "":
+                return f'<c {attrs} t="inlineStr"></c>'
+            text = escape(value)
+            if value != value.strip():
+                return f'<c {attrs} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+            return f'<c {attrs} t="inlineStr"><is><t>{text}</t></is></c>'
+
+        if data_type in ("n", "b"):
+            if value is None:
+                return f'<c {attrs} t="{data_type}"></c>'
+            return f'<c {attrs} t="{data_type}"><v>{safe_string(value)}</v></c>'
+
+        if (
+            data_type == "d"
+            and not self.iso_dates
+            and isinstance(value, _date_types)
+            and getattr(value, "tzinfo", None) is None
+        ):
+            return f'<c {attrs} t="n"><v>{safe_string(to_excel(value, self.epoch))}</v></c>'
+
+        # Anything else (formulae, errors, rich text, or dates which openpyxl would refuse or
+        # write as ISO-8601) is rare enough to be left to openpyxl.
+        out = io.BytesIO()
+        with xmlfile(out) as xf:
+            write_cell(xf, self.sheet, cell, cell.has_style)
+        return out.getvalue().decode("utf-8")
+
+
+class NativeWriter(StreamingWriter):
+    """Write to a write-only worksheet as in streaming mode, serializing its rows natively."""
+
+    sheet_class = NativeSheet
+
+    def __init__(self, sheet, ref="A1"):
+        if not isinstance(sheet, StreamingSheet) and not is_supported(sheet):
+            logger.warning(
+                "The openpyxl internals which sheet <{}> would be natively written with are "
+                "missing, so it's written as in streaming mode.".format(sheet.title)
+            )
+            sheet = StreamingSheet(sheet)
+        super().__init__(sheet, ref=ref)
@@ -0,0 +1,214 @@
+"""A module dedicated to writing data to write-only (streaming) worksheets.
+
+openpyxl's write-only worksheets must be written strictly row-by-row, whereas the :class:`Writer`
+cursor is free to return to rows it has already visited (for example, a ``<td>`` returns to the
+top of the row after writing its content). The :class:`StreamingWriter` therefore buffers cells
+until no open element could possibly return to their row, and then appends those rows to the
+underlying sheet, releasing them from memory.
+"""
+import logging
+from contextlib import contextmanager
+
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border
+from openpyxl.utils.cell import coordinate_to_tuple, range_boundaries
+
+from htmxl.compose.style import cell_inline_styles
+from htmxl.compose.write.decorators import CursorStrategy
+from htmxl.compose.write.writer import Writer
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingSheet:
+    """Buffer cells destined for an openpyxl write-only worksheet.
+
+    Exposes the subset of the :class:`openpyxl.worksheet.worksheet.Worksheet` API used by the
+    :class:`Writer`, delegating everything else to the underlying sheet.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self._rows = {}
+        self._next_row = 1
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+    @property
+    def title(self):
+        return self.sheet.title
+
+    @title.setter
+    def title(self, value):
+        self.sheet.title = value
+
+    @property
+    def column_dimensions(self):
+        if self._next_row > 1:
+            logger.warning(
+                "Column dimensions of sheet <{}> were modified after rows had been written, "
+                "and will be ignored.".format(self.sheet.title)
+            )
+        return self.sheet.column_dimensions
+
+    def cell(self, row, column, value=None):
+        if row < self._next_row:
+            raise RuntimeError(
+                f"Row {row} of sheet <{self.sheet.title}> has already been written and cannot be "
+                "modified in streaming mode."
+            )
+
+        cells = self._rows.setdefault(row, {})
+        cell = cells.get(column)
+        if cell is None:
+            cell = WriteOnlyCell(self.sheet)
+            cell.row = row
+            cell.column = column
+            cells[column] = cell
+
+        if value is not None:
+            cell.value = value
+        return cell
+
+    def __getitem__(self, key):
+        if ":" not in key:
+            row, column = coordinate_to_tuple(key)
+            return self.cell(row=row, column=column)
+
+        min_col, min_row, max_col, max_row = range_boundaries(key)
+        return tuple(
+            tuple(self.cell(row=row, column=column) for column in range(min_col, max_col + 1))
+            for row in range(min_row, max_row + 1)
+        )
+
+    def add_data_validation(self, validation):
+        self.sheet.data_validations.append(validation)
+
+    def merge_cells(self, ref):
+        """Merge the range `ref`, mirroring `Worksheet.merge_cells`.
+
+        All but the top-left cell are cleared, and the top-left cell's borders are
+        extended along the edges of the range.
+        """
+        if ref in self.sheet.merged_cells:
+            return
+
+        self.sheet.merged_cells.add(ref)
+
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        for row in range(min_row, max_row + 1):
+            cells = self._rows.get(row)
+            if not cells:
+                continue
+
+            for column in range(min_col, max_col + 1):
+                if (row, column) != (min_row, min_col):
+                    cells.pop(column, None)
+
+        start_cell = self._rows.get(min_row, {}).get(min_col)
+        if start_cell is None or not start_cell.has_style:
+            return
+
+        edges = {
+            "top": [(min_row, column) for column in range(min_col, max_col + 1)],
+            "bottom": [(max_row, column) for column in range(min_col, max_col + 1)],
+            "left": [(row, min_col) for row in range(min_row, max_row + 1)],
+            "right": [(row, max_col) for row in range(min_row, max_row + 1)],
+        }
+        for name, coordinates in edges.items():
+            side = getattr(start_cell.border, name)
+            if side is None or side.style is None:
+                continue
+
+            border = Border(**{name: side})
+            for row, column in coordinates:
+                if (row, column) == (min_row, min_col):
+                    continue
+                cell = self.cell(row=row, column=column)
+                cell.border += border
+
+    def flush(self, row=None):
+        """Append all buffered rows above `row` (or every buffered row) to the underlying sheet."""
+        if row is None:
+            row = max(self._rows, default=0) + 1
+
+        while self._next_row < row:
+            self.write_row(self._next_row, self._rows.pop(self._next_row, None))
+            self._next_row += 1
+
+    def write_row(self, row, cells):
+        """Append the buffered `cells` (by column) of `row` to the underlying sheet."""
+        values = []
+        if cells:
+            values = [None] * max(cells)
+            for column, cell in cells.items():
+                values[column - 1] = cell
+
+        self.sheet.append(values)
+
+
+class _Scope:
+    __slots__ = ("pinned", "start_row", "recording")
+
+    def __init__(self, pinned, start_row):
+        self.pinned = pinned
+        self.start_row = start_row
+        self.recording = None
+
+
+class StreamingWriter(Writer):
+    """Write to an openpyxl write-only worksheet, emitting rows as soon as they are final."""
+
+    sheet_class = StreamingSheet
+
+    def __init__(self, sheet, ref="A1"):
+        # The sheet may already be buffered, such as by a backend other than openpyxl.
+        if not isinstance(sheet, StreamingSheet):
+            sheet = self.sheet_class(sheet)
+        super().__init__(sheet, ref=ref)
+        self._scopes = []
+
+    def write(self, element, styler):
+        super().write(element, styler)
+        self.sheet.flush()
+
+    @contextmanager
+    def record(self):
+        with super().record() as recording:
+            if self._scopes and self._scopes[-1].recording is None:
+                self._scopes[-1].recording = recording
+            yield recording
+
+    def open_scope(self, strategy, inline_style):
+        super().open_scope(strategy, inline_style)
+
+        # Only a bottom-left element will never return the cursor to its starting row, and
+        # even then only if it has no pending inline styles to apply to its cells once closed.
+        pinned = strategy != CursorStrategy.bottom_left or not cell_inline_styles.isdisjoint(
+            inline_style
+        )
+        self._scopes.append(_Scope(pinned, self.row))
+
+    def close_scope(self, inline_style):
+        super().close_scope(inline_style)
+        self._scopes.pop()
+
+        # An open element may still return the cursor to its starting row, or (for bottom-left
+        # elements) to the last row written by it, including by its still-open children whose
+        # recordings haven't yet been folded into its own.
+        row = self.row
+        max_row = 0
+        for scope in reversed(self._scopes):
+            recording = scope.recording
+            if recording is not None and recording.count and recording.max_row > max_row:
+                max_row = recording.max_row
+
+            floor = scope.start_row
+            if not scope.pinned and recording is not None and max_row:
+                floor = max_row
+
+            if floor < row:
+                row = floor
+
+        self.sheet.flush(row)
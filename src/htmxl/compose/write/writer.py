@@ -3,10 +3,12 @@ import logging
 from contextlib import contextmanager
 
 import openpyxl.styles
+from openpyxl.styles.cell_style import StyleArray
 
+from htmxl.alphabet import alphabet
 from htmxl.compose.cell import Cell
 from htmxl.compose.recording import Recording
-from htmxl.compose.style import style_range
+from htmxl.compose.style import cell_inline_styles, style_range
 from htmxl.compose.write import elements
 
 logger = logging.getLogger(__name__)
@@ -14,11 +16,36 @@ logger = logging.getLogger(__name__)
 
 class Writer:
     def __init__(self, sheet, ref="A1"):
-        self.current_cell = Cell(ref)
+        cell = Cell(ref)
+        self.row = cell.row
+        self.col = cell.col
+
         self.sheet = sheet
-        self._recordings = {}
+        self._recordings = []
+
+        # The cells written while any element with `cell_inline_styles` is open, which the
+        # recordings made in the meantime slice their individual cells from.
+        self._cell_log = None
+        self._cell_log_users = 0
+
+        self._alignment_ids = {}
         self._validations = {}
 
+        # The references of the ranges merged, in the order they were merged.
+        self.merged_ranges = []
+
+        # The number of processes across which the rows of a `data-parallel` tbody are laid out.
+        self.workers = None
+
+        # The data of the sheet, in which the rows of a `data-rows` tbody are looked up.
+        self.data = {}
+
+        # The values passed through the `cell` filter while rendering the sheet, if any.
+        self.cell_values = None
+
+        # The `data-type` declared for each column of the table being written, by column.
+        self.column_types = {}
+
         self._auto_filter_set = False
         self._element_handlers = {
             "root": elements.write_body,
@@ -34,77 +61,105 @@ class Writer:
             "td": elements.write_td,
             "thead": elements.write_thead,
             "tbody": elements.write_tbody,
+            "colgroup": elements.write_colgroup,
             "string": elements.write_string,
             "datalist": elements.create_datavalidation,
             "input": elements.write_input,
         }
 
     @property
-    def row(self):
-        return self.current_cell.row
-
-    @property
-    def col(self):
-        return self.current_cell.col
+    def current_cell(self):
+        return Cell.from_location(col=self.col, row=self.row)
 
     @property
     def ref(self):
-        return self.current_cell.ref
+        return f"{alphabet[self.col - 1]}{self.row}"
 
     def write(self, element, styler):
         elements.write(writer=self, element=element, styler=styler)
 
     def get_cell(self, *, ref=None):
         if ref is None:
-            ref = self.current_cell
+            return self.sheet.cell(column=self.col, row=self.row)
 
         return self.sheet.cell(column=ref.col, row=ref.row)
 
     def write_cell(self, value, styler, style=None):
-        cell = self.sheet.cell(column=self.col, row=self.row, value=value)
+        row = self.row
+        col = self.col
+        cell = self.sheet.cell(column=col, row=row, value=value)
 
         if style:
-            cell.style = styler.calculate_style(style)
+            styler.apply_style(cell, style)
 
         if self._recordings:
-            for recording in self._recordings.values():
-                recording.append(self.current_cell)
+            self._recordings[-1].append(row, col)
+
+        if self._cell_log is not None:
+            self._cell_log.append((row, col))
 
     def move_down(self, num=1):
-        self.current_cell = Cell.from_location(col=self.col, row=self.row + num)
+        self.row += num
 
     def move_up(self, num=1):
         if self.row == 1:
             return
 
-        self.current_cell = Cell.from_location(col=self.col, row=self.row - num)
+        self.row -= num
 
     def move_left(self, num=1):
         if self.col == 1:
             return
-        self.current_cell = Cell.from_location(col=self.col - num, row=self.row)
+        self.col -= num
 
     def move_right(self, num=1):
-        self.current_cell = Cell.from_location(col=self.col + num, row=self.row)
+        self.col += num
 
     def move(self, movement):
         movement_function = getattr(self, "move_{}".format(movement))
         movement_function()
 
     def move_to(self, col, row):
-        self.current_cell = Cell.from_location(col=col, row=row)
+        self.row = row
+        self.col = col
 
     @contextmanager
     def record(self):
         recording = Recording()
-        recording_id = recording.id()
+        if self._cell_log is not None:
+            recording.log = self._cell_log
+            recording.start = len(self._cell_log)
 
-        self._recordings[recording_id] = recording
+        self._recordings.append(recording)
         yield recording
-        self.stop_recording(recording_id)
+        self.stop_recording()
+
+    def stop_recording(self):
+        recording = self._recordings.pop()
+        recording.stop()
+
+        # Nested recordings are only folded into their parent once they're complete,
+        # rather than every cell being appended to every open recording.
+        if self._recordings:
+            self._recordings[-1].extend(recording)
+
+    def open_scope(self, strategy, inline_style):
+        """Mark the start of writing an element which returns the cursor according to `strategy`."""
+        if cell_inline_styles.isdisjoint(inline_style):
+            return
+
+        if self._cell_log is None:
+            self._cell_log = []
+        self._cell_log_users += 1
+
+    def close_scope(self, inline_style):
+        """Mark the end of writing the most recently opened element."""
+        if cell_inline_styles.isdisjoint(inline_style):
+            return
 
-    def stop_recording(self, recording_id):
-        del self._recordings[recording_id]
+        self._cell_log_users -= 1
+        if not self._cell_log_users:
+            self._cell_log = None
 
     def auto_filter(self, ref):
         if self._auto_filter_set:
@@ -116,48 +171,62 @@ class Writer:
     def style_inline(self, element, included_cells, inline_style):
 
         if inline_style.get("width"):
-            column_refs = set()
-            for cell in included_cells:
-                column_refs.add(cell.col_ref)
+            columns = {col for _, col in included_cells}
 
-            num_cols = len(column_refs)
+            num_cols = len(columns)
             column_width = round(inline_style.get("width") / num_cols)
 
-            for col_ref in column_refs:
-                self.sheet.column_dimensions[col_ref].width = column_width
+            for col in columns:
+                self.sheet.column_dimensions[alphabet[col - 1]].width = column_width
 
         if inline_style.get("height"):
-            row_refs = set()
-            for cell in included_cells:
-                row_refs.add(cell.row)
+            rows = {row for row, _ in included_cells}
 
-            num_rows = len(row_refs)
+            num_rows = len(rows)
             column_height = round(inline_style.get("height") / num_rows)
 
-            for row_ref in row_refs:
-                self.sheet.row_dimensions[row_ref].height = column_height
+            for row in rows:
+                self.sheet.row_dimensions[row].height = column_height
 
+        alignment = {}
         if inline_style.get("text-align"):
-            horizontal_alignment = inline_style.get("text-align")
-            for cell in included_cells:
-                self.sheet[cell.ref].alignment = self.sheet[
-                    cell.ref
-                ].alignment + openpyxl.styles.Alignment(horizontal=horizontal_alignment)
+            alignment["horizontal"] = inline_style.get("text-align")
 
         if inline_style.get("vertical-align"):
-            vertical_alignment = inline_style.get("vertical-align")
-            for cell in included_cells:
-                self.sheet[cell.ref].alignment = self.sheet[
-                    cell.ref
-                ].alignment + openpyxl.styles.Alignment(vertical=vertical_alignment)
+            alignment["vertical"] = inline_style.get("vertical-align")
 
         if inline_style.get("data-wrap-text"):
             if inline_style.get("data-wrap-text").lower() == "true":
-                for cell in included_cells:
-                    logger.debug("Setting wrapText=True for cell {}".format(cell))
-                    self.sheet[cell.ref].alignment = self.sheet[
-                        cell.ref
-                    ].alignment + openpyxl.styles.Alignment(wrapText=True)
+                alignment["wrapText"] = True
+
+        if alignment:
+            logger.debug("Setting alignment {} for cells of {}".format(alignment, element.name))
+            self.align_cells(included_cells, alignment)
+
+    def align_cells(self, cells, alignment):
+        """Merge the `alignment` attributes into the existing alignment of each of `cells`."""
+        alignments = self.sheet.parent._alignments
+        delta = tuple(sorted(alignment.items()))
+
+        for row, col in cells:
+            cell = self.sheet.cell(row=row, column=col)
+            style = cell._style
+            if style is None:
+                style = cell._style = StyleArray()
+
+            # Cells sharing an alignment share the merged result, rather than each building
+            # (and then looking up) an identical `Alignment`.
+            key = (style.alignmentId, delta)
+            alignment_id = self._alignment_ids.get(key)
+            if alignment_id is None:
+                merged = alignments[style.alignmentId] + openpyxl.styles.Alignment(**alignment)
+                alignment_id = self._alignment_ids[key] = alignments.add(merged)
+
+            style.alignmentId = alignment_id
+
+    def merge_cells(self, ref):
+        self.sheet.merge_cells(ref)
+        self.merged_ranges.append(ref)
 
     def style_range(self, reference_style, cell_range):
         style_range(self.sheet, reference_style, cell_range)
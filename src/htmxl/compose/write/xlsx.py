@@ -0,0 +1,357 @@
+"""A module dedicated to writing the rows of worksheets with xlsxwriter, in constant memory.
+
+Cells are buffered (and styled) just as in streaming mode, against a write-only openpyxl sheet.
+As each row is flushed, its cells are written to an xlsxwriter worksheet in `constant_memory`
+mode, each with the xlsxwriter `Format` translated from its openpyxl style (once per distinct
+style). Everything else recorded on the openpyxl sheet (merged cells, column widths, the
+autofilter and validations) is written to the xlsxwriter worksheet when it is saved.
+
+xlsxwriter has no named styles, so cells are formatted as their named style would format them,
+but not associated with it. Theme colors, gradient fills and validations other than lists are
+not supported.
+"""
+import math
+
+from openpyxl.styles import PatternFill
+from openpyxl.styles.colors import COLOR_INDEX
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+from htmxl.compose.write.streaming import StreamingSheet
+
+# The indices of the options of xlsxwriter's `Format` properties, by their openpyxl names.
+_patterns = [
+    "none",
+    "solid",
+    "mediumGray",
+    "darkGray",
+    "lightGray",
+    "darkHorizontal",
+    "darkVertical",
+    "darkDown",
+    "darkUp",
+    "darkGrid",
+    "darkTrellis",
+    "lightHorizontal",
+    "lightVertical",
+    "lightDown",
+    "lightUp",
+    "lightGrid",
+    "lightTrellis",
+    "gray125",
+    "gray0625",
+]
+_border_styles = [
+    "none",
+    "thin",
+    "medium",
+    "dashed",
+    "dotted",
+    "thick",
+    "double",
+    "hair",
+    "mediumDashed",
+    "dashDot",
+    "mediumDashDot",
+    "dashDotDot",
+    "mediumDashDotDot",
+    "slantDashDot",
+]
+_underlines = {"single": 1, "double": 2, "singleAccounting": 33, "doubleAccounting": 34}
+_scripts = {"superscript": 1, "subscript": 2}
+_horizontal_alignments = {
+    "left": "left",
+    "center": "center",
+    "right": "right",
+    "fill": "fill",
+    "justify": "justify",
+    "centerContinuous": "center_across",
+    "distributed": "distributed",
+}
+_vertical_alignments = {
+    "top": "top",
+    "center": "vcenter",
+    "bottom": "bottom",
+    "justify": "vjustify",
+    "distributed": "vdistributed",
+}
+
+# openpyxl writes column widths as given, whereas xlsxwriter pads them (by 5 pixels of a 7 pixel
+# wide digit) as Excel does.
+_column_padding = 5 / 7
+
+
+def color(value):
+    """Return the "#RRGGBB" of an openpyxl `Color`, if it has one (theme colors don't)."""
+    if value is None:
+        return None
+
+    if value.type == "rgb":
+        rgb = value.rgb
+    elif value.type == "indexed" and value.indexed < len(COLOR_INDEX):
+        rgb = COLOR_INDEX[value.indexed]
+    else:
+        return None
+    return f"#{rgb[-6:]}"
+
+
+def rotation(text_rotation):
+    """Convert an openpyxl `textRotation` (0-180, or 255 for vertical text) for xlsxwriter."""
+    if text_rotation == 255:
+        return 270
+    if text_rotation > 90:
+        return 90 - text_rotation
+    return text_rotation
+
+
+def format_properties(wb, style):
+    """Translate the openpyxl `StyleArray` of a cell into the properties of an xlsxwriter format."""
+    properties = {}
+
+    font = wb._fonts[style.fontId]
+    font_properties = [
+        ("font_name", font.name),
+        ("font_size", font.sz),
+        ("bold", font.b),
+        ("italic", font.i),
+        ("underline", _underlines.get(font.u)),
+        ("font_strikeout", font.strike),
+        ("font_script", _scripts.get(font.vertAlign)),
+        ("font_outline", font.outline),
+        ("font_shadow", font.shadow),
+        ("font_condense", font.condense),
+        ("font_extend", font.extend),
+        ("font_family", font.family and int(font.family)),
+        ("font_charset", font.charset),
+        ("font_scheme", font.scheme),
+        ("font_color", color(font.color)),
+    ]
+    properties.update((name, value) for name, value in font_properties if value)
+
+    fill = wb._fills[style.fillId]
+    if not isinstance(fill, PatternFill):
+        raise ValueError("Only pattern fills are supported by the xlsxwriter engine.")
+    if fill.patternType:
+        properties["pattern"] = _patterns.index(fill.patternType)
+        colors = [("fg_color", fill.fgColor), ("bg_color", fill.bgColor)]
+        if fill.patternType == "solid":
+            # xlsxwriter reverses the roles of the colors of a solid fill, as Excel does.
+            colors = [("bg_color", fill.fgColor), ("fg_color", fill.bgColor)]
+        for name, value in colors:
+            value = color(value)
+            if value:
+                properties[name] = value
+
+    border = wb._borders[style.borderId]
+    for name in ["left", "right", "top", "bottom"]:
+        side = getattr(border, name)
+        if side is not None and side.style:
+            properties[name] = _border_styles.index(side.style)
+            side_color = color(side.color)
+            if side_color:
+                properties[f"{name}_color"] = side_color
+
+    diagonal = border.diagonal
+    if diagonal is not None and diagonal.style and (border.diagonalUp or border.diagonalDown):
+        properties["diag_type"] = int(bool(border.diagonalUp)) + 2 * int(bool(border.diagonalDown))
+        properties["diag_border"] = _border_styles.index(diagonal.style)
+        diagonal_color = color(diagonal.color)
+        if diagonal_color:
+            properties["diag_color"] = diagonal_color
+
+    alignment = wb._alignments[style.alignmentId]
+    alignment_properties = [
+        ("align", _horizontal_alignments.get(alignment.horizontal)),
+        ("valign", _vertical_alignments.get(alignment.vertical)),
+        ("text_wrap", alignment.wrapText),
+        ("shrink", alignment.shrinkToFit),
+        ("indent", alignment.indent and int(alignment.indent)),
+        ("rotation", alignment.textRotation and rotation(alignment.textRotation)),
+        ("reading_order", alignment.readingOrder and int(alignment.readingOrder)),
+    ]
+    properties.update((name, value) for name, value in alignment_properties if value)
+
+    number_format_id = style.numFmtId
+    if number_format_id >= BUILTIN_FORMATS_MAX_SIZE:
+        properties["num_format"] = wb._number_formats[number_format_id - BUILTIN_FORMATS_MAX_SIZE]
+    elif number_format_id:
+        properties["num_format"] = number_format_id
+
+    protection = wb._protections[style.protectionId]
+    if not protection.locked:
+        properties["locked"] = False
+    if protection.hidden:
+        properties["hidden"] = True
+
+    return properties
+
+
+def validation_options(validation):
+    """Translate an openpyxl `DataValidation` into the options of an xlsxwriter validation."""
+    if validation.type != "list":
+        raise ValueError(
+            f"Only list validations are supported by the xlsxwriter engine, not {validation.type}."
+        )
+
+    formula = validation.formula1
+    if formula.startswith('"') and formula.endswith('"'):
+        source = formula[1:-1].split(",")
+    else:
+        source = f"={formula}"
+
+    options = {
+        "validate": "list",
+        "source": source,
+        "ignore_blank": bool(validation.allow_blank),
+        "dropdown": not validation.showDropDown,
+        "show_input": bool(validation.showInputMessage),
+        "show_error": bool(validation.showErrorMessage),
+    }
+    messages = [
+        ("input_title", validation.promptTitle),
+        ("input_message", validation.prompt),
+        ("error_title", validation.errorTitle),
+        ("error_message", validation.error),
+    ]
+    options.update((name, value) for name, value in messages if value)
+    return options
+
+
+class XlsxWriterWorkbook:
+    """An xlsxwriter workbook (in `constant_memory` mode), mirroring the openpyxl workbook `wb`."""
+
+    def __init__(self, wb):
+        import xlsxwriter
+
+        self.wb = wb
+        self.workbook = xlsxwriter.Workbook(
+            None, {"constant_memory": True, "date_1904": wb.epoch == CALENDAR_MAC_1904}
+        )
+        self.sheets = []
+        self._formats = {}
+
+    def create_sheet(self, sheet):
+        """Create the xlsxwriter worksheet for the openpyxl `sheet`, and the sheet buffering it."""
+        worksheet = XlsxWriterSheet(self, sheet, self.workbook.add_worksheet(sheet.title))
+        self.sheets.append(worksheet)
+        return worksheet
+
+    def format(self, style):
+        """Return the xlsxwriter format of the openpyxl `StyleArray` of a cell."""
+        key = tuple(style)
+        cell_format = self._formats.get(key)
+        if cell_format is None:
+            properties = format_properties(self.wb, style)
+            cell_format = self._formats[key] = self.workbook.add_format(properties)
+        return cell_format
+
+    def save(self, file_path):
+        for sheet in self.sheets:
+            sheet.close()
+
+        self.workbook.filename = file_path
+        self.workbook.close()
+
+
+class XlsxWriterSheet(StreamingSheet):
+    """Buffer cells for an xlsxwriter worksheet, writing its rows as they are flushed."""
+
+    def __init__(self, workbook, sheet, worksheet):
+        super().__init__(sheet)
+        self.workbook = workbook
+        self.worksheet = worksheet
+
+    @property
+    def title(self):
+        return self.sheet.title
+
+    @title.setter
+    def title(self, value):
+        self.sheet.title = value
+        self.worksheet.name = self.sheet.title
+
+    @property
+    def column_dimensions(self):
+        # Unlike openpyxl, xlsxwriter writes column widths once the sheet is complete.
+        return self.sheet.column_dimensions
+
+    def write_row(self, row, cells):
+        worksheet = self.worksheet
+        index = row - 1
+
+        dimension = self.sheet.row_dimensions.get(row)
+        if dimension is not None:
+            options = {"hidden": dimension.hidden, "level": dimension.outlineLevel or 0}
+            worksheet.set_row(index, dimension.height, None, options)
+
+        if not cells:
+            return
+
+        for column, cell in cells.items():
+            cell_format = None
+            if cell.has_style:
+                cell_format = self.workbook.format(cell._style)
+            self.write_cell(index, column - 1, cell, cell_format)
+
+    def write_cell(self, row, col, cell, cell_format):
+        worksheet = self.worksheet
+        data_type = cell.data_type
+        value = cell._value
+
+        if value is None or value == "":
+            if cell_format is not None:
+                worksheet.write_blank(row, col, None, cell_format)
+        elif data_type == "s" and isinstance(value, str):
+            worksheet.write_string(row, col, value, cell_format)
+        elif data_type == "n":
+            if math.isnan(value) or math.isinf(value):
+                # openpyxl writes these as empty values.
+                worksheet.write_blank(row, col, None, cell_format)
+            else:
+                worksheet.write_number(row, col, value, cell_format)
+        elif data_type == "d":
+            worksheet.write_datetime(row, col, value, cell_format)
+        elif data_type == "b":
+            worksheet.write_boolean(row, col, value, cell_format)
+        elif data_type == "f" and isinstance(value, str):
+            worksheet.write_formula(row, col, value, cell_format)
+        elif data_type == "e":
+            worksheet.write_string(row, col, value, cell_format)
+        else:
+            raise TypeError(
+                f"Cannot write {type(value).__name__} values with the xlsxwriter engine."
+            )
+
+    def close(self):
+        """Write everything recorded on the openpyxl sheet (other than its rows) to xlsxwriter."""
+        worksheet = self.worksheet
+
+        for dimension in self.sheet.column_dimensions.values():
+            if not (dimension.customWidth or dimension.hidden or dimension.outlineLevel):
+                continue
+
+            dimension.reindex()
+            width = dimension.width - _column_padding if dimension.customWidth else None
+            options = {"hidden": dimension.hidden, "level": dimension.outlineLevel or 0}
+            worksheet.set_column(dimension.min - 1, dimension.max - 1, width, None, options)
+
+        # The cells of merged ranges have already been written (and bordered) as openpyxl would
+        # write them, whereas `merge_range` would write them (again), so only the ranges are added.
+        for cell_range in self.sheet.merged_cells.ranges:
+            min_col, min_row, max_col, max_row = cell_range.bounds
+            worksheet.merge.append([min_row - 1, min_col - 1, max_row - 1, max_col - 1])
+
+        if self.sheet.auto_filter.ref:
+            worksheet.autofilter(self.sheet.auto_filter.ref)
+
+        for validation in self.sheet.data_validations.dataValidation:
+            ranges = sorted(validation.sqref.ranges, key=lambda cell_range: cell_range.bounds)
+            if not ranges:
+                continue
+
+            options = validation_options(validation)
+            if len(ranges) > 1:
+                options["multi_range"] = " ".join(cell_range.coord for cell_range in ranges)
+
+            min_col, min_row, max_col, max_row = ranges[0].bounds
+            worksheet.data_validation(min_row - 1, min_col - 1, max_row - 1, max_col - 1, options)
@@ -1,6 +1,32 @@
 import importlib
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
+
+# The `text` of a token which has yet to be read from its node.
+_unread = object()
+
+
+class _NodeText:
+    """The `text` of a token, which is only read from its node once it's asked for.
+
+    Reading the text of a bs4 element joins that of all of its descendants, so reading it for
+    every element would repeat the text of the whole document at every level of nesting. Only a
+    few elements' writers (such as those of `<td>`s) actually read their text.
+    """
+
+    def __get__(self, token, owner=None):
+        if token is None:
+            return self
+
+        text = token.__dict__["text"]
+        if text is _unread:
+            text = token.__dict__["text"] = token.read_text(token.node)
+        return text
+
+    def __set__(self, token, text):
+        token.__dict__["text"] = text
 
 
 @dataclass(frozen=True)
@@ -11,6 +37,16 @@ class TokenStream:
     classes: Optional[List[str]] = None
     text: str = ""
 
+    # Whether whitespace-only text is retained by the parser, rather than being discarded.
+    keeps_blank_text = True
+
+    @classmethod
+    def split_classes(cls, value: Optional[str]):
+        """Split the raw value of an html `class` attribute into `classes`, as the parser would."""
+        if value:
+            return value.split()
+        return []
+
     @classmethod
     def from_node(cls, node):
         """Produce a `TokenStream` node from a tree node produced by the specific parser."""
@@ -19,6 +55,23 @@ class TokenStream:
     def parse_str(cls, data: str):
         """Parse a raw string representing a template into a `TokenStream`."""
 
+    @classmethod
+    def parse_iter(cls, chunks: Iterable[str]):
+        """Parse an iterable of string chunks representing a template into a `TokenStream`.
+
+        Parsers which support incremental parsing produce the tree lazily, as its content is
+        consumed. Otherwise the chunks are joined and parsed as a whole.
+        """
+        return cls.parse_str("".join(chunks))
+
+    @classmethod
+    def parse_events(cls, data: str) -> "EventStream":
+        """Parse a raw string representing a template into an `EventStream`.
+
+        The parser's own tree is discarded as soon as it has been flattened into events.
+        """
+        return Events.from_token(cls.parse_str(data)).root()
+
     def content(self):
         """Yield the next token."""
 
@@ -29,6 +82,12 @@ class TokenStream:
 
 @dataclass(frozen=True)
 class Bs4Stream(TokenStream):
+    text = _NodeText()
+
+    @staticmethod
+    def read_text(node):
+        return node.text
+
     @classmethod
     def parse_str(cls, data: str):
         import bs4
@@ -48,7 +107,7 @@ class Bs4Stream(TokenStream):
             node=node,
             name=node.name,
             attrs=node.attrs,
-            text=node.text,
+            text=_unread,
             classes=classes,
         )
 
@@ -63,9 +122,92 @@ class Bs4Stream(TokenStream):
             else:
                 yield self.from_node(node)
 
+    @classmethod
+    def parse_events(cls, data: str):
+        import bs4.element
+
+        events = Events()
+        start = events.start
+        string = events.string
+        add_piece = events.add_piece
+        navigable_string = bs4.element.NavigableString
+
+        soup = cls.parse_str(data).node
+
+        # The text of an element only includes strings of exactly the types it's interested in:
+        # most elements, plain strings, but some (such as `<script>`) only strings of their own.
+        containers = getattr(soup.builder, "string_containers", {})
+        piece_kinds = {navigable_string: None, bs4.element.CData: None}
+        piece_kinds.update((container, container) for container in containers.values())
+
+        def add(node):
+            for child in node.contents:
+                if isinstance(child, navigable_string):
+                    child_type = type(child)
+                    if child_type in piece_kinds:
+                        add_piece(str(child), piece_kinds[child_type])
+
+                    text = child.strip()
+                    if text:
+                        string(text)
+                else:
+                    attrs = child.attrs
+                    kind = containers.get(child.name)
+                    index = start(
+                        child.name, attrs, attrs.get("class", []), DESCENDANT_TEXT, kind=kind
+                    )
+                    add(child)
+                    events.end(index)
+
+        index = start("body", None, None, "")
+        add(soup)
+        events.end(index)
+        return events.finish().root()
+
+
+@dataclass(frozen=True)
+class BuiltinStream(TokenStream):
+    """Parse templates with htmxl's own (dependency-free) tokenizer.
+
+    Produces the same tokens as `Bs4Stream`, malformed markup included, but for the text of an
+    unclosed `<script>` or `<style>` element (see `htmxl.tokenizer`). The tokenizer produces
+    `Events` directly, so its tokens are always `EventStream`s.
+    """
+
+    @classmethod
+    def parse_str(cls, data: str):
+        return cls.parse_events(data)
+
+    @classmethod
+    def parse_events(cls, data: str):
+        from htmxl.tokenizer import parse
+
+        return parse(data).root()
+
 
 @dataclass(frozen=True)
 class LxmlStream(TokenStream):
+    keeps_blank_text = False
+
+    text = _NodeText()
+
+    @staticmethod
+    def read_text(node):
+        return node.text
+
+    @classmethod
+    def split_classes(cls, value: Optional[str]):
+        if value:
+            # lxml represents classes as a string. We need a list.
+            # eg <div class="some-class some-other-class">
+            #  node.attrib.get("class") = "some-class some-other-class"
+            return value.strip().split(" ")
+        return value
+
+    @classmethod
+    def parse_iter(cls, chunks: Iterable[str]):
+        return _LxmlPullStream.parse_iter(chunks)
+
     @classmethod
     def parse_str(cls, data: str):
         from lxml import etree
@@ -79,14 +221,36 @@ class LxmlStream(TokenStream):
 
     @classmethod
     def from_node(cls, node):
-        classes = node.attrib.get("class")
-        if classes:
-            # lxml represents classes as a string. We need a list.
-            # eg <div class="some-class some-other-class">
-            #  node.attrib.get("class") = "some-class some-other-class"
-            classes = classes.strip().split(" ")
+        classes = cls.split_classes(node.attrib.get("class"))
+        return cls(node=node, name=node.tag, attrs=node.attrib, text=_unread, classes=classes)
 
-        return cls(node=node, name=node.tag, attrs=node.attrib, text=node.text, classes=classes)
+    @classmethod
+    def parse_events(cls, data: str):
+        events = Events()
+        start = events.start
+        string = events.string
+        split_classes = cls.split_classes
+
+        def add(node):
+            attrib = node.attrib
+            if attrib:
+                key = tuple(attrib.items())
+                index = start(node.tag, attrib, split_classes(attrib.get("class")), node.text, key)
+            else:
+                index = start(node.tag, None, None, node.text)
+
+            for child in node.iterchildren():
+                text = child.text
+                if text:
+                    string(text.strip())
+                add(child)
+                tail = child.tail
+                if tail:
+                    string(tail.strip())
+            events.end(index)
+
+        add(cls.parse_str(data).node)
+        return events.finish().root()
 
     def content(self):
         for node in self.node.iterchildren():
@@ -101,29 +265,365 @@ class LxmlStream(TokenStream):
                 yield self.__class__(None, "string", text=text)
 
 
+class _LxmlEventReader:
+    """Feed string chunks to an incremental lxml parser on demand, one event at a time."""
+
+    chunk_size = 2**16
+
+    def __init__(self, chunks: Iterable[str]):
+        from lxml import etree
+
+        self.parser = etree.XMLPullParser(
+            events=("start", "end"), remove_blank_text=True, recover=True
+        )
+        self.chunks = iter(chunks)
+        self.events: deque = deque()
+        self.closed = False
+        self.depth = 0
+
+        # Lxml requires a single top-level node.
+        self.parser.feed("<root>")
+
+    def _read(self):
+        while not self.events and not self.closed:
+            buffer = []
+            size = 0
+            for chunk in self.chunks:
+                buffer.append(chunk)
+                size += len(chunk)
+                if size >= self.chunk_size:
+                    break
+            else:
+                buffer.append("</root>")
+                self.closed = True
+
+            self.parser.feed("".join(buffer))
+            if self.closed:
+                self.parser.close()
+            self.events.extend(self.parser.read_events())
+
+    def peek(self):
+        """Ensure the next event has been parsed, which guarantees the completeness of the text \
+        of the current element or the tail of the most recently ended one."""
+        self._read()
+
+    def next(self):
+        self._read()
+        event, node = self.events.popleft()
+        if event == "start":
+            self.depth += 1
+        else:
+            self.depth -= 1
+        return event, node
+
+    def skip_to_depth(self, depth):
+        """Discard events until the reader has returned to the given `depth`."""
+        while self.depth > depth:
+            self.next()
+
+
+@dataclass(frozen=True)
+class _LxmlPullStream(LxmlStream):
+    """An `LxmlStream` whose content is parsed lazily, and discarded once it has been consumed."""
+
+    reader: Optional[_LxmlEventReader] = None
+
+    @classmethod
+    def parse_iter(cls, chunks: Iterable[str]):
+        reader = _LxmlEventReader(chunks)
+        _, node = reader.next()
+        reader.peek()
+        return cls.from_node(node, reader)
+
+    @classmethod
+    def from_node(cls, node, reader=None):
+        token = LxmlStream.from_node(node)
+        return cls(
+            node=node,
+            name=token.name,
+            attrs=dict(token.attrs),
+            text=_unread,
+            classes=token.classes,
+            reader=reader,
+        )
+
+    def content(self):
+        reader = self.reader
+        while True:
+            event, node = reader.next()
+            if event == "end":
+                # The end of this token's own node.
+                return
+
+            reader.peek()
+            if node.text:
+                text = node.text.strip()
+                yield LxmlStream(None, "string", text=text)
+
+            depth = reader.depth
+            yield self.from_node(node, reader)
+
+            # Skip over whatever content the consumer of the token did not itself consume.
+            reader.skip_to_depth(depth - 1)
+
+            reader.peek()
+            if node.tail:
+                text = node.tail.strip()
+                yield LxmlStream(None, "string", text=text)
+
+            # Free the (now fully written) node, along with any preceding siblings.
+            node.clear()
+            parent = node.getparent()
+            previous = node.getprevious()
+            while previous is not None:
+                parent.remove(previous)
+                previous = node.getprevious()
+
+
+@dataclass(frozen=True)
+class DetachedStream(TokenStream):
+    """A token whose content has been read in full, independently of the parser's tree.
+
+    Detached tokens can be pickled, such that they can be written in another process.
+    """
+
+    @classmethod
+    def from_token(cls, token: TokenStream):
+        content = ()
+        if token.name != "string":
+            content = tuple(cls.from_token(child) for child in token.content())
+
+        return cls(
+            node=content,
+            name=token.name,
+            attrs=dict(token.attrs),
+            classes=token.classes,
+            text=token.text,
+        )
+
+    def content(self):
+        return iter(self.node)
+
+
+# The `text` of an element whose text is that of its descendant strings, which is only joined
+# together if it's asked for.
+DESCENDANT_TEXT = object()
+
+
+class Events:
+    """A document flattened into a compact sequence of events, as an alternative to a tree.
+
+    Each element is a "start" event, followed by the events of its content. Its `end` is the
+    index just beyond its last descendant, such that its content (or the element as a whole) can
+    be skipped over. Strings are events of their own, named "string".
+
+    The names and attributes of events are stored as indices into tables of their distinct
+    values, which are shared between all of the events with equal values (such as the many cells
+    of a large table with the same classes). Shared attributes must therefore not be mutated.
+
+    The text of an element may either be given outright, or be `DESCENDANT_TEXT`: the slice of
+    the document's text `pieces` added while the element was open (as with bs4's `Tag.text`).
+    """
+
+    def __init__(self):
+        self.names = array("i")
+        self.attrs = array("i")
+        self.ends = array("i")
+        self.texts: List[Any] = []
+
+        self.name_table: List[str] = ["string"]
+        self.attr_table: List[tuple] = [({}, None)]
+
+        # The raw text of the document, which the `DESCENDANT_TEXT` of elements is a slice of.
+        self.pieces: List[str] = []
+
+        # The kind of each piece and element, when some pieces are of a kind (such as the content
+        # of a `<script>`) which is excluded from the text of other kinds of element.
+        self.piece_kinds: Optional[List[Any]] = None
+        self.text_kinds: Dict[int, Any] = {}
+
+        # The index of each distinct value within its table, while the events are being added.
+        self._name_indices: Optional[Dict[str, int]] = {"string": 0}
+        self._attr_indices: Optional[Dict[tuple, int]] = {((), None): 0}
+
+    def __len__(self):
+        return len(self.ends)
+
+    @classmethod
+    def from_token(cls, token: TokenStream) -> "Events":
+        """Flatten the given token, and all of its content, into events."""
+        events = cls()
+        events.add(token)
+        return events.finish()
+
+    def add(self, token: TokenStream):
+        if token.name == "string":
+            self.string(token.text)
+            return
+
+        index = self.start(token.name, token.attrs, token.classes, token.text)
+        for child in token.content():
+            self.add(child)
+        self.end(index)
+
+    def start(self, name, attrs, classes, text, attrs_key=None, kind=None) -> int:
+        """Add the start event of an element, returning its index.
+
+        Parsers may give an `attrs_key` which identifies the element's attributes (and classes)
+        more cheaply than the attributes themselves, such as the raw text of its tag. The `kind`
+        of an element is that of the pieces its `DESCENDANT_TEXT` includes.
+        """
+        index = len(self.ends)
+
+        name_index = self._name_indices.get(name)
+        if name_index is None:
+            name_index = self._name_indices[name] = len(self.name_table)
+            self.name_table.append(name)
+
+        if attrs_key is not None:
+            key = ("key", attrs_key)
+        elif attrs:
+            key = tuple(
+                (attr, tuple(value) if isinstance(value, list) else value)
+                for attr, value in attrs.items()
+            )
+            key = (key, None if classes is None else tuple(classes))
+        else:
+            key = ((), None if classes is None else tuple(classes))
+        attrs_index = self._attr_indices.get(key)
+        if attrs_index is None:
+            attrs_index = self._attr_indices[key] = len(self.attr_table)
+            self.attr_table.append((dict(attrs) if attrs else {}, classes))
+
+        if text is DESCENDANT_TEXT:
+            # The end of the slice is only known once the element has ended.
+            text = slice(len(self.pieces), None)
+            if kind is not None:
+                self.text_kinds[index] = kind
+
+        self.names.append(name_index)
+        self.attrs.append(attrs_index)
+        self.ends.append(index + 1)
+        self.texts.append(text)
+        return index
+
+    def end(self, index: int):
+        """Add the end of the element started at `index`."""
+        self.ends[index] = len(self.ends)
+
+        text = self.texts[index]
+        if type(text) is slice:
+            self.texts[index] = slice(text.start, len(self.pieces))
+
+    def string(self, text: str):
+        self.names.append(0)
+        self.attrs.append(0)
+        self.ends.append(len(self.ends) + 1)
+        self.texts.append(text)
+
+    def add_piece(self, text: str, kind: Any = None):
+        """Add a piece of the document's text, of the given `kind`."""
+        if kind is not None and self.piece_kinds is None:
+            self.piece_kinds = [None] * len(self.pieces)
+
+        self.pieces.append(text)
+        if self.piece_kinds is not None:
+            self.piece_kinds.append(kind)
+
+    def text(self, index: int):
+        """Return the text of the event at `index`."""
+        text = self.texts[index]
+        if type(text) is not slice:
+            return text
+
+        kind = self.text_kinds.get(index)
+        if self.piece_kinds is None:
+            # Every piece is of no kind, so none is the text of a container.
+            return "" if kind is not None else "".join(self.pieces[text])
+
+        return "".join(
+            piece
+            for piece, piece_kind in zip(self.pieces[text], self.piece_kinds[text])
+            if piece_kind == kind
+        )
+
+    def finish(self) -> "Events":
+        """Discard the state only required while events are being added."""
+        self._name_indices = self._attr_indices = None
+        return self
+
+    def root(self) -> "EventStream":
+        return EventStream(self, 0)
+
+
+class EventStream:
+    """A token of a document which has been flattened into `Events`.
+
+    Tokens are only produced as they're consumed, as lightweight views of their events, and
+    otherwise behave as any other `TokenStream`.
+    """
+
+    __slots__ = ("node", "index", "name", "attrs", "classes", "_text")
+
+    def __init__(self, events: Events, index: int):
+        self.node = events
+        self.index = index
+        self.name = events.name_table[events.names[index]]
+        self.attrs, self.classes = events.attr_table[events.attrs[index]]
+        self._text = events.texts[index]
+
+    @property
+    def text(self):
+        text = self._text
+        if type(text) is slice:
+            text = self._text = self.node.text(self.index)
+        return text
+
+    def content(self):
+        events = self.node
+        ends = events.ends
+        index = self.index + 1
+        end = ends[self.index]
+        while index < end:
+            yield EventStream(events, index)
+            index = ends[index]
+
+    def get(self, name: str, default: Any):
+        """Get a `TokenStream`'s HTML attribute."""
+        return self.attrs.get(name, default)
+
+
 _parsers_by_name = {
     "lxml": LxmlStream,
     "beautifulsoup": Bs4Stream,
+    "builtin": BuiltinStream,
 }
 
-_parser_fallback = [("bs4", "beautifulsoup"), ("lxml", "lxml")]
+_parser_fallback = [("bs4", "beautifulsoup"), ("lxml", "lxml"), ("htmxl.tokenizer", "builtin")]
+
+
+def available_parsers() -> List[str]:
+    """Return the names of the parsers whose libraries are installed, in order of preference."""
+    parsers = []
+    for import_name, parser_name in _parser_fallback:
+        try:
+            importlib.import_module(import_name)
+        except ImportError:
+            pass
+        else:
+            parsers.append(parser_name)
+    return parsers
 
 
 def get_parser(name: Optional[str]) -> TokenStream:
     if name is None:
-        for import_name, parser_name in _parser_fallback:
-            try:
-                importlib.import_module(import_name)
-            except ImportError:
-                pass
-            else:
-                name = parser_name
-                break
-        else:
+        parsers = available_parsers()
+        if not parsers:
             parser_options = ", ".join(_parsers_by_name)
             raise RuntimeError(
                 "Failed to find an available parser library. Please use one of the"
                 f"provided package extras to install supported parser: {parser_options}."
             )
+        name = parsers[0]
 
     return _parsers_by_name[name]
@@ -0,0 +1,354 @@
+"""A dependency-free html tokenizer, producing the same tokens as `bs4`'s "html.parser" builder.
+
+Only what htmxl requires is produced: the name, attributes and content of each element, and the
+text of the document. Unlike `html.parser`, the document is tokenized by a single regular
+expression, and its `Events` are produced in the same pass, without building a tree.
+
+Malformed markup is tokenized the way `html.parser` does too: `</` followed by anything but a
+letter is a comment, and a slash ending an unquoted attribute value belongs to the value (rather
+than closing the tag). The one known difference is a `<script>` or `<style>` element which is never
+closed, whose text is kept, where (some versions of) `html.parser` discard it.
+
+Examples:
+    >>> body = parse('<td class="a b" data-type="int">1<br>2</td>').root()
+    >>> td, = body.content()
+    >>> td.name, td.attrs, td.text
+    ('td', {'class': ['a', 'b'], 'data-type': 'int'}, '12')
+    >>> [(token.name, token.text) for token in td.content()]
+    [('string', '1'), ('br', ''), ('string', '2')]
+"""
+import functools
+import html
+import re
+from html.entities import html5
+
+from htmxl.token import DESCENDANT_TEXT, Events
+
+# Tags which are closed as soon as they're opened.
+void_tags = frozenset(
+    {
+        "area",
+        "base",
+        "basefont",
+        "bgsound",
+        "br",
+        "col",
+        "command",
+        "embed",
+        "frame",
+        "hr",
+        "image",
+        "img",
+        "input",
+        "isindex",
+        "keygen",
+        "link",
+        "menuitem",
+        "meta",
+        "nextid",
+        "param",
+        "source",
+        "spacer",
+        "track",
+        "wbr",
+    }
+)
+
+# Attributes whose values are split on whitespace into a list, by tag ("*" being any tag).
+list_attributes = {
+    "*": {"class", "accesskey", "dropzone"},
+    "a": {"rel", "rev"},
+    "link": {"rel", "rev"},
+    "td": {"headers"},
+    "th": {"headers"},
+    "form": {"accept-charset"},
+    "object": {"archive"},
+    "area": {"rel"},
+    "icon": {"sizes"},
+    "iframe": {"sandbox"},
+    "output": {"for"},
+}
+
+# Tags within which whitespace-only text is preserved, rather than collapsed.
+preserve_whitespace_tags = frozenset({"pre", "textarea"})
+
+# Tags whose content is raw text, rather than markup.
+raw_text_tags = frozenset({"script", "style"})
+
+# Tags whose strings are of a kind of their own, and so are excluded from the text of any other
+# (enclosing) element.
+container_tags = frozenset({"script", "style", "template", "rt", "rp"})
+
+_markup = re.compile(
+    r"""
+    <(?:
+        /\s*(?P<end>[a-zA-Z][-.a-zA-Z0-9:_]*)\s*>
+      | /(?P<loose_end>[a-zA-Z][^\t\n\r\f\ />\x00]*)[^>]*>
+      | /(?P<bogus>[^>]*)>
+      | (?P<name>[a-zA-Z][^\t\n\r\f\ />\x00]*)
+        (?P<attrs>[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*)
+        >
+      | !--(?P<comment>.*?)--!?>
+      | !\[CDATA\[(?P<cdata>.*?)\]\]>
+      | (?P<special>[!?])(?P<declaration>[^>]*)>
+    )
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+_attribute_padding = re.compile(r"(?:\s|/(?!>))*")
+
+_attribute = re.compile(
+    r"""((?<=['"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*('[^']*'|"[^"]*"|(?!['"])[^>\s]*))?(?:\s|/(?!>))*"""
+)
+
+_reference = re.compile(
+    r"&(?:#(?:[xX](?P<hex>[0-9a-fA-F]+)|(?P<decimal>[0-9]+))|(?P<entity>[a-zA-Z][-.a-zA-Z0-9]*));?"
+)
+
+_spaces = " \t\n\r\f"
+
+_raw_text_end = {tag: re.compile(rf"</\s*{tag}\s*>", re.IGNORECASE) for tag in raw_text_tags}
+
+
+def parse(data: str) -> Events:
+    """Parse the html `data` into `Events`, the first of which is the document (named "body")."""
+    events = Events()
+    event_texts = events.texts
+    pieces = events.pieces
+    start_event = events.start
+    add_string = events.string
+    add_piece = events.add_piece
+
+    # The name, event index and container kind of each open element.
+    stack = [("[document]", start_event("body", None, None, ""), None)]
+    containers = []
+    already_closed = []
+    continued = False
+    preserving = 0
+
+    # The raw (uncollapsed) last text, and the index of its event (or -1 if it had none), while
+    # it's the most recent content of the innermost open element.
+    raw_text = ""
+    text_event = None
+
+    def add_text(text, contained=True):
+        nonlocal raw_text, text_event
+        joined = continued and text_event is not None
+        if joined:
+            # Text either side of an ignored end tag is a single string.
+            text = raw_text + text
+        raw_text = text
+
+        if not preserving and not text.strip(_spaces):
+            # Like bs4, whitespace-only strings are collapsed.
+            text = "\n" if "\n" in text else " "
+
+        stripped = text.strip()
+        if joined:
+            pieces[-1] = text
+            if text_event >= 0:
+                event_texts[text_event] = stripped
+                return
+        else:
+            add_piece(text, containers[-1] if contained and containers else None)
+
+        if stripped:
+            text_event = len(events)
+            add_string(stripped)
+        else:
+            text_event = -1
+
+    def add_special(text):
+        nonlocal text_event
+        text_event = None
+        text = text.strip()
+        if text:
+            add_string(text)
+
+    position = 0
+    length = len(data)
+    search = _markup.search
+    while position < length:
+        match = search(data, position)
+        if match is None:
+            add_text(_unescape(data[position:]))
+            break
+
+        start = match.start()
+        if start > position:
+            add_text(_unescape(data[position:start]))
+        position = match.end()
+        continued = False
+
+        (
+            end,
+            loose_end,
+            bogus,
+            name,
+            raw_attrs,
+            comment,
+            cdata,
+            special,
+            declaration,
+        ) = match.groups()
+        if name is None:
+            end = end or loose_end
+            if end is not None:
+                name = end.lower()
+            elif bogus:
+                # Like html.parser, `</` followed by anything but a letter is a (bogus) comment.
+                add_special(bogus)
+                continue
+            elif bogus is not None:
+                # `</>` is ignored altogether.
+                continued = True
+                continue
+            elif comment is not None:
+                add_special(comment)
+                continue
+            elif cdata is not None:
+                # Like bs4, a CDATA section is a string of its own, which (unlike the other strings
+                # of a container) counts towards the text of every element it's within.
+                add_text(cdata, contained=False)
+                text_event = None
+                continue
+            else:
+                if special == "!" and declaration[:7].lower() == "doctype":
+                    declaration = declaration[len("DOCTYPE ") :]
+                add_special(declaration)
+                continue
+
+            if name in already_closed:
+                # The end tag of a void element, which was closed as soon as it was opened.
+                already_closed.remove(name)
+                continued = True
+                continue
+
+            text_event = None
+            for depth in range(len(stack) - 1, 0, -1):
+                if stack[depth][0] == name:
+                    for element_name, index, kind in reversed(stack[depth:]):
+                        events.end(index)
+                        if kind is not None:
+                            containers.pop()
+                        if element_name in preserve_whitespace_tags:
+                            preserving -= 1
+                    del stack[depth:]
+                    break
+            continue
+
+        name = name.lower()
+        if raw_attrs:
+            tag = _parse_start_tag(name, raw_attrs)
+            if tag is None:
+                # Like html.parser, a start tag which can't be parsed is text (as it was written).
+                continued = True
+                add_text(match.group())
+                continue
+            attrs, attrs_key, self_closing = tag
+        else:
+            attrs = attrs_key = None
+            self_closing = False
+
+        text_event = None
+        kind = name if name in container_tags else None
+        classes = attrs and attrs.get("class", []) or []
+        index = start_event(name, attrs, classes, DESCENDANT_TEXT, attrs_key, kind)
+
+        if name in void_tags or self_closing:
+            events.end(index)
+            if not self_closing:
+                already_closed.append(name)
+            continue
+
+        stack.append((name, index, kind))
+        if kind is not None:
+            containers.append(kind)
+        if name in preserve_whitespace_tags:
+            preserving += 1
+
+        if name in raw_text_tags:
+            end = _raw_text_end[name].search(data, position)
+            raw_end = length if end is None else end.start()
+            if raw_end > position:
+                add_text(data[position:raw_end])
+            position = raw_end
+
+    for _, index, _ in reversed(stack):
+        events.end(index)
+    return events.finish()
+
+
+def _unescape(text):
+    """Replace the character references of `text` the way bs4 does.
+
+    Unlike `html.unescape`, unknown named references are kept without their semicolon.
+    """
+    if "&" in text:
+        return _reference.sub(_dereference, text)
+    return text
+
+
+def _dereference(match):
+    entity = match.group("entity")
+    if entity is not None:
+        return html5.get(entity + ";") or html5.get(entity) or "&" + entity
+
+    hex_number = match.group("hex")
+    if hex_number is not None:
+        number = int(hex_number, 16)
+    else:
+        number = int(match.group("decimal"))
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd"
+    if 0x80 <= number <= 0x9F:
+        # References to the windows-1252 encoding of a character, rather than its code point.
+        try:
+            return bytes([number]).decode("cp1252")
+        except UnicodeDecodeError:
+            pass
+    return chr(number)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_start_tag(name, raw_attrs):
+    """Parse the attributes of a start tag, into a dict of their (unescaped) values.
+
+    Templates tend to repeat the same few tags many times over, so each distinct tag's
+    attributes are only parsed once. The tag itself is returned as the key by which the
+    attributes are interned, along with whether the tag closes itself. Like html.parser, it only
+    does so when its closing slash isn't taken as part of an unquoted attribute value, and a tag
+    with anything else left over (once its attributes are parsed) is None.
+    """
+    # The attribute pattern requires each name to follow whitespace, a quote or a slash, which
+    # the last character of the tag's name stands in for.
+    text = name[-1] + raw_attrs + ">"
+    position = _attribute_padding.match(text, 1).end()
+    list_names = list_attributes["*"] | list_attributes.get(name, set())
+
+    attrs = {}
+    while True:
+        match = _attribute.match(text, position)
+        if match is None:
+            break
+        position = match.end()
+
+        attr, _, value = match.groups()
+        attr = attr.lower()
+        if value is None:
+            value = ""
+        elif value[:1] in ("'", '"') and value[:1] == value[-1:] and len(value) > 1:
+            value = value[1:-1]
+
+        if "&" in value:
+            value = html.unescape(value)
+        if attr in list_names:
+            value = value.split()
+        attrs[attr] = value
+
+    rest = text[position:].strip()
+    if rest not in (">", "/>"):
+        return None
+    return attrs or None, (name, raw_attrs[: position - 1]), rest == "/>"
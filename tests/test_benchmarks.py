@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from htmxl.benchmarks import compare, Result, run
+from htmxl.benchmarks.__main__ import main
+from htmxl.benchmarks.cases import cases
+
+
+@pytest.mark.parametrize("case", list(cases))
+def test_cases_compose(case):
+    (result,) = run([case], parsers=["lxml"], scale=0.01, repeat=1)
+    assert result.total > 0
+    assert result.peak_memory > 0
+    assert set(result.phases) == {"render", "parse", "write", "save"}
+
+
+def test_compare():
+    baseline = Result(
+        "case", "lxml", phases={"write": 1.0, "save": 0.001}, total=2.0, peak_memory=100
+    )
+    results = [
+        Result("case", "lxml", phases={"write": 1.5, "save": 0.002}, total=2.1, peak_memory=130),
+        Result("other", "lxml", phases={"write": 5.0}, total=5.0, peak_memory=1000),
+    ]
+
+    regressions = compare(results, {baseline.key: baseline.__dict__}, threshold=0.2)
+
+    # The save phase doubled, but only by a negligible amount of time.
+    assert [(r.key, r.metric) for r in regressions] == [
+        ("case[lxml]", "write"),
+        ("case[lxml]", "peak_memory"),
+    ]
+    assert str(regressions[0]) == "case[lxml] write: 1 -> 1.5 (+50.0%)"
+
+
+def test_main(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    assert main(["datalist", "--scale", "0.01", "--repeat", "1", "--save", str(baseline)]) == 0
+    assert set(json.loads(baseline.read_text())) >= {"datalist[lxml]"}
+
+    # Every result is a regression against an impossibly fast baseline.
+    results = json.loads(baseline.read_text())
+    for result in results.values():
+        result["peak_memory"] = 1
+    baseline.write_text(json.dumps(results))
+
+    assert main(["datalist", "--scale", "0.01", "--repeat", "1", "--baseline", str(baseline)]) == 1
+    assert "peak_memory" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit):
+        main(["missing"])
@@ -0,0 +1,131 @@
+import datetime
+import io
+from decimal import Decimal
+
+import openpyxl
+import pytest
+
+from htmxl.compose import Workbook
+from htmxl.compose.backends import OpenpyxlBackend
+from tests.utils import formatting
+
+template = """
+<head><title>Report</title></head>
+<body>
+  <datalist id="options">
+    <option value="yes" />
+    <option value="no" />
+  </datalist>
+  <table data-autofilter="true">
+    <thead>
+      <tr>
+        <th colspan="2" class="header" style="width: 30ch">Name</th>
+        <th rowspan="2" class="header">Value</th>
+        <th>Ok</th>
+      </tr>
+    </thead>
+    <tbody>
+      {% for value in values %}
+        <tr style="height: 20px">
+          <td class="bold">{{ loop.index }}</td>
+          <td style="text-align: center; vertical-align: top" class="money">1.5</td>
+          <td>{{ value | cell }}</td>
+          <input list="options" value="yes" />
+        </tr>
+      {% endfor %}
+    </tbody>
+  </table>
+  <table><tr><td style="width: 12ch">Total</td></tr></table>
+</body>
+"""
+
+styles = [
+    {"name": "bold", "font": {"bold": True, "italic": True, "color": "FF0000"}},
+    {
+        "name": "header",
+        "font": {"bold": True, "size": 14},
+        "pattern_fill": {"fill_type": "solid", "fgColor": "DDDDDD"},
+        "border": {"bottom": {"style": "thick", "color": "0000FF"}},
+        "alignment": {"horizontal": "center", "wrap_text": True},
+    },
+    {"name": "money", "number_format": "$#,##0.00"},
+]
+
+values = [
+    "text",
+    " padded ",
+    "",
+    -12,
+    1.5,
+    Decimal("2.25"),
+    True,
+    datetime.date(2020, 1, 31),
+    datetime.datetime(2020, 1, 31, 10, 30, 15),
+    "=SUM(A1:A2)",
+    None,
+]
+
+
+def compose(engine, **kwargs):
+    workbook = Workbook(styles=styles, parser="lxml", engine=engine, **kwargs)
+    workbook.add_sheet_from_template(template, data=dict(values=values))
+    workbook.add_sheet_from_template("<table></table>", sheet_name="empty")
+
+    buffer = io.BytesIO()
+    workbook.compose(buffer)
+    buffer.seek(0)
+    return openpyxl.load_workbook(buffer)
+
+
+def test_xlsxwriter_matches_openpyxl():
+    pytest.importorskip("xlsxwriter")
+    expected = compose("openpyxl")
+    result = compose("xlsxwriter")
+
+    assert result.sheetnames == expected.sheetnames == ["Report", "empty"]
+
+    result_sheet, expected_sheet = result.worksheets[0], expected.worksheets[0]
+    assert [[cell.value for cell in row] for row in result_sheet.rows] == [
+        [cell.value for cell in row] for row in expected_sheet.rows
+    ]
+    for result_row, expected_row in zip(result_sheet.rows, expected_sheet.rows):
+        for result_cell, expected_cell in zip(result_row, expected_row):
+            assert formatting(result_cell) == formatting(expected_cell), result_cell.coordinate
+
+    assert result_sheet.merged_cells == expected_sheet.merged_cells
+    assert result_sheet.auto_filter.ref == expected_sheet.auto_filter.ref
+    result_ranges = [str(v.sqref) for v in result_sheet.data_validations.dataValidation]
+    expected_ranges = [str(v.sqref) for v in expected_sheet.data_validations.dataValidation]
+    assert result_ranges == expected_ranges
+    assert [result_sheet.row_dimensions[row].height for row in range(1, 5)] == [
+        expected_sheet.row_dimensions[row].height for row in range(1, 5)
+    ]
+    assert result_sheet.column_dimensions["A"].width == expected_sheet.column_dimensions["A"].width
+
+
+def test_xlsxwriter_column_widths_after_rows():
+    """Unlike openpyxl's write-only sheets, xlsxwriter's are given their widths once complete."""
+    pytest.importorskip("xlsxwriter")
+    result = compose("xlsxwriter")
+    assert result.worksheets[0].column_dimensions["A"].width == 12
+
+
+def test_xlsxwriter_only_streams():
+    pytest.importorskip("xlsxwriter")
+    with pytest.raises(ValueError) as e:
+        Workbook(engine="xlsxwriter", mode="default")
+
+    assert "expected one of: streaming" in str(e.value)
+
+
+def test_engine_backend_class():
+    workbook = Workbook(engine=OpenpyxlBackend, mode="streaming")
+    assert isinstance(workbook.backend, OpenpyxlBackend)
+    assert workbook.wb.write_only
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError) as e:
+        Workbook(engine="pandas")
+
+    assert "Unknown engine 'pandas'" in str(e.value)
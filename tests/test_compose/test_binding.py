@@ -0,0 +1,220 @@
+import datetime
+import io
+from collections import namedtuple
+
+import openpyxl
+import pytest
+
+from htmxl.compose import Workbook
+
+styles = [
+    {"name": "bold", "font": {"bold": True}},
+    {"name": "money", "number_format": "$#,##0.00"},
+]
+
+rendered_template = """
+<table data-autofilter="true">
+  <thead><tr><th>Name</th><th>Amount</th><th>Date</th><th>Note</th></tr></thead>
+  <tbody class="bold">
+    {% for row in rows %}
+    <tr>
+      <th>{{ row.name }}</th>
+      <td class="money" data-type="float" style="width: 20ch">{{ row.amount }}</td>
+      <td data-type="date">{{ row.date }}</td>
+      <td>static</td>
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+<div>after</div>
+"""
+
+bound_template = """
+<table data-autofilter="true">
+  <thead><tr><th>Name</th><th>Amount</th><th>Date</th><th>Note</th></tr></thead>
+  <tbody class="bold" data-rows="{{ rows_name }}">
+    <tr>
+      <th data-field="name"></th>
+      <td class="money" data-type="float" data-field="amount" style="width: 20ch"></td>
+      <td data-type="date" data-field="date"></td>
+      <td>static</td>
+    </tr>
+  </tbody>
+</table>
+<div>after</div>
+"""
+
+
+def rows(count=5):
+    return [
+        dict(name=f"row {i}", amount=i * 1.5, date=datetime.date(2020, 1, i + 1))
+        for i in range(count)
+    ]
+
+
+def compose(template, data, parser="lxml", mode="default"):
+    workbook = Workbook(styles=styles, parser=parser, mode=mode)
+    workbook.add_sheet_from_template(template, data=data)
+
+    fileobj = io.BytesIO()
+    workbook.compose(fileobj)
+    fileobj.seek(0)
+    return openpyxl.load_workbook(fileobj).worksheets[0]
+
+
+def describe(sheet):
+    return (
+        [
+            (cell.coordinate, cell.value, cell.font.b, cell.number_format)
+            for row in sheet.iter_rows()
+            for cell in row
+        ],
+        {letter: dim.width for letter, dim in sheet.column_dimensions.items()},
+        sheet.auto_filter.ref,
+    )
+
+
+@pytest.mark.parametrize("mode", ["default", "streaming"])
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_bound_rows_match_rendered(parser, mode):
+    expected = compose(rendered_template, dict(rows=rows()), parser, mode)
+    result = compose(bound_template, dict(rows=rows(), rows_name="rows"), parser, mode)
+    assert describe(result) == describe(expected)
+
+
+Row = namedtuple("Row", ["name", "amount", "date"])
+
+
+@pytest.mark.parametrize(
+    "data, rows_name",
+    [
+        (dict(rows=(row for row in rows())), "rows"),
+        (dict(rows=[Row(**row) for row in rows()]), "rows"),
+        (dict(report=dict(rows=rows())), "report.rows"),
+    ],
+)
+def test_bound_rows_sources(data, rows_name):
+    expected = compose(rendered_template, dict(rows=rows()))
+    result = compose(bound_template, dict(data, rows_name=rows_name))
+    assert describe(result) == describe(expected)
+
+
+def test_bound_rows_by_index():
+    template = '<table><tbody data-rows="rows"><tr><td data-field="1"></td></tr></tbody></table>'
+    sheet = compose(template, dict(rows=[("a", 1), ("b", 2)]))
+    assert [row for row in sheet.values] == [(1,), (2,)]
+
+
+def test_bound_rows_convert_strings():
+    template = """
+    <table><tbody data-rows="rows"><tr>
+      <td data-field="a" data-type="int"></td>
+      <td data-field="b" data-type="str"></td>
+      <td data-field="c"></td>
+    </tr></tbody></table>
+    """
+    sheet = compose(template, dict(rows=[dict(a=" 5 ", b=1.5, c=2)]))
+    assert [row for row in sheet.values] == [(5, "1.5", 2)]
+
+
+@pytest.mark.parametrize(
+    "template, data, message",
+    [
+        (bound_template, dict(rows_name="missing"), "no 'missing'"),
+        (bound_template, dict(rows=[dict(name="a")], rows_name="rows"), "no field 'amount'"),
+        ('<table><tr><td data-field="a"></td></tr></table>', {}, "within a `data-rows` tbody"),
+    ],
+)
+def test_bound_rows_errors(template, data, message):
+    with pytest.raises(ValueError) as e:
+        compose(template, data)
+
+    assert message in str(e.value)
+
+
+def columns():
+    table = rows()
+    return {name: [row[name] for row in table] for name in table[0]}
+
+
+def assert_bound_columns(source):
+    expected = compose(rendered_template, dict(rows=rows()))
+    result = compose(bound_template, dict(rows=source, rows_name="rows"))
+    assert describe(result) == describe(expected)
+
+
+def test_bound_rows_from_columns():
+    assert_bound_columns(columns())
+
+
+def test_bound_rows_from_uneven_columns():
+    data = dict(rows=dict(name=["a", "b"], amount=[1], date=[None, None]), rows_name="rows")
+    with pytest.raises(ValueError) as e:
+        compose(bound_template, data)
+
+    assert "aren't all the same length" in str(e.value)
+
+
+def test_bound_rows_from_numpy():
+    np = pytest.importorskip("numpy")
+    source = {name: np.array(column) for name, column in columns().items()}
+    source["date"] = source["date"].astype("datetime64[D]")
+    assert_bound_columns(source)
+
+
+def test_bound_rows_from_pandas():
+    pd = pytest.importorskip("pandas")
+    assert_bound_columns(pd.DataFrame(columns()))
+
+
+def test_bound_rows_from_pyarrow():
+    pa = pytest.importorskip("pyarrow")
+    assert_bound_columns(pa.table(columns()))
+
+
+missing_template = """
+<table><tbody data-rows="rows"><tr>
+  <td data-field="amount"></td><td data-field="when"></td><td data-field="note"></td>
+</tr></tbody></table>
+"""
+
+
+def assert_missing_values(source):
+    sheet = compose(missing_template, dict(rows=source))
+    assert [[cell.value for cell in row] for row in sheet.iter_rows(max_row=2, max_col=3)] == [
+        [1.5, datetime.datetime(2020, 1, 1, 10, 30), "a"],
+        [None, None, None],
+    ]
+
+
+def test_bound_rows_missing_from_numpy():
+    np = pytest.importorskip("numpy")
+    source = dict(
+        amount=np.array([1.5, np.nan]),
+        when=np.array(["2020-01-01T10:30", "NaT"], dtype="datetime64[ns]"),
+        note=np.array(["a", None], dtype=object),
+    )
+    assert_missing_values(source)
+
+
+def test_bound_rows_missing_from_pandas():
+    pd = pytest.importorskip("pandas")
+    when = pd.to_datetime(["2020-01-01T10:30", None])
+    source = pd.DataFrame(
+        dict(amount=[1.5, None], when=when.tz_localize("Europe/Paris"), note=["a", None])
+    )
+    assert_missing_values(source)
+
+
+def test_bound_rows_missing_from_pyarrow():
+    pa = pytest.importorskip("pyarrow")
+    tz = datetime.timezone(datetime.timedelta(hours=1))
+    when = [datetime.datetime(2020, 1, 1, 10, 30, tzinfo=tz), None]
+    source = pa.table(
+        dict(
+            amount=pa.array([1.5, float("nan")]),
+            when=pa.array(when, type=pa.timestamp("us", tz="+01:00")),
+            note=pa.array(["a", None]),
+        )
+    )
+    assert_missing_values(source)
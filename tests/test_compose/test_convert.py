@@ -0,0 +1,133 @@
+import datetime
+import io
+from decimal import Decimal
+
+import openpyxl
+import pendulum
+import pytest
+
+from htmxl.compose import Workbook
+from htmxl.compose.convert import convert, convert_value, to_date
+
+
+def naive(value):
+    return value.replace(tzinfo=None)
+
+
+@pytest.mark.parametrize(
+    "text", ["2020-01-31", "2020-01-31T10:00:00", "20200131", "2020-W05-5", "2020-02-30"]
+)
+def test_date_matches_pendulum(text):
+    try:
+        expected = pendulum.parse(text).date()
+    except ValueError:
+        with pytest.raises(ValueError):
+            convert(text, "date")
+    else:
+        assert convert(text, "date") == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "2020-01-31",
+        "2020-01-31T10:00",
+        "2020-01-31 10:00:05",
+        "2020-01-31T10:00:05.123",
+        "2020-01-31T10:00:05.123456Z",
+        "2020-01-31T10:00:05+02:00",
+        "20200131T100005",
+    ],
+)
+def test_datetime_matches_pendulum(text):
+    value = convert(text, "datetime")
+    assert value == naive(pendulum.parse(text))
+    assert value.tzinfo is None
+
+
+@pytest.mark.parametrize(
+    "text, data_type, expected",
+    [
+        ("1.10", "decimal", Decimal("1.10")),
+        ("12.5%", "percent", 0.125),
+        ("0.125", "percent", 0.125),
+        ("True", "bool", True),
+        ("3", "int", 3),
+        ("3", None, "3"),
+    ],
+)
+def test_convert(text, data_type, expected):
+    value = convert(text, data_type)
+    assert value == expected
+    assert type(value) is type(expected)
+
+
+def test_convert_unknown_type():
+    with pytest.raises(ValueError) as e:
+        convert("3", "integer")
+
+    assert "Unknown data-type 'integer'" in str(e.value)
+
+
+def test_convert_memoized():
+    to_date.cache_clear()
+    for _ in range(3):
+        convert("2020-01-31", "date")
+
+    assert to_date.cache_info().hits == 2
+
+
+def test_convert_value():
+    assert convert_value(" 5 ", "int") == 5
+    assert convert_value(5, "str") == "5"
+    assert convert_value(5, "date") == 5
+    assert convert_value(None, "int") is None
+
+
+template = """
+<table>
+  <colgroup>
+    <col span="2" />
+    <col data-type="date" />
+  </colgroup>
+  <thead>
+    <tr>
+      <th>Name</th>
+      <th data-column-type="int">Count</th>
+      <th>Date</th>
+      <th data-column-type="percent" colspan="2">Rates</th>
+    </tr>
+  </thead>
+  <tbody>
+    {% for i in range(3) %}
+    <tr>
+      <td>{{ i }}</td>
+      <td>{{ i }}</td>
+      <td>2020-01-0{{ i + 1 }}</td>
+      <td>{{ i }}%</td>
+      <td data-type="str">{{ i }}%</td>
+    </tr>
+    {% endfor %}
+    <tr><td><table><tr><td>1</td><td>2</td><td>3</td></tr></table></td></tr>
+  </tbody>
+</table>
+"""
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_column_types(parser):
+    workbook = Workbook(parser=parser)
+    workbook.add_sheet_from_template(template)
+
+    fileobj = io.BytesIO()
+    workbook.compose(fileobj)
+    fileobj.seek(0)
+    values = list(openpyxl.load_workbook(fileobj).worksheets[0].values)
+
+    assert values[0] == ("Name", "Count", "Date", "Rates", None)
+    assert values[1:4] == [
+        (str(i), i, datetime.datetime(2020, 1, i + 1), i / 100, f"{i}%") for i in range(3)
+    ]
+
+    # A nested table declares column types of its own.
+    assert values[4] == ("1", "2", "3", None, None)
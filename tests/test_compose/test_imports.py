@@ -1,7 +1,10 @@
 import pytest
 
 
-@pytest.mark.parametrize("name", ["Writer", "write", "Cell", "Styler", "Workbook", "Worksheet"])
+@pytest.mark.parametrize(
+    "name",
+    ["Writer", "write", "Cell", "Styler", "Workbook", "Worksheet", "Profiler", "ComposeReport"],
+)
 def test_import_name(name):
     import htmxl.compose
 
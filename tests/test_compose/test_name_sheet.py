@@ -25,3 +25,11 @@ def test_name_sheet():
 
     wb = openpyxl.load_workbook(buffer)
     assert wb.sheetnames == [SHEET_NAME]
+
+
+def test_name_sheet_from_file_positionally():
+    workbook = Workbook(parser="lxml")
+    worksheet = workbook.add_sheet_from_template_file("tests/test_performance.jinja2", data, "Foo")
+
+    assert worksheet.sheet_name == "Foo"
+    assert worksheet.parser == "lxml"
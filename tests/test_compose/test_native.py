@@ -0,0 +1,126 @@
+import datetime
+import io
+import zipfile
+from decimal import Decimal
+
+import pytest
+from lxml import etree
+
+from htmxl.compose import Workbook
+from htmxl.compose.write import native
+
+template = """
+<body>
+  <datalist id="options">
+    <option value="yes" />
+    <option value="no" />
+  </datalist>
+  <table data-autofilter="true">
+    <thead>
+      <tr>
+        <th colspan="2" class="bold" style="width: 30ch">Name</th>
+        <th rowspan="2">Value</th>
+        <th>Ok</th>
+      </tr>
+    </thead>
+    <tbody>
+      {% for value in values %}
+        <tr>
+          <td class="bold">{{ loop.index }}</td>
+          <td style="text-align: center"></td>
+          <td>{{ value | cell }}</td>
+          <input list="options" value="yes" />
+        </tr>
+      {% endfor %}
+    </tbody>
+  </table>
+</body>
+"""
+
+styles = [{"name": "bold", "font": {"bold": True}}]
+
+values = [
+    "text",
+    " padded ",
+    "a & b < c > d",
+    "line\r\nbreak",
+    "café €",
+    "",
+    0,
+    -12,
+    1.5,
+    1e300,
+    float("nan"),
+    Decimal("2.25"),
+    True,
+    False,
+    datetime.date(2020, 1, 31),
+    datetime.datetime(2020, 1, 31, 10, 30, 15, 250),
+    datetime.time(10, 30),
+    datetime.timedelta(hours=36),
+    "=SUM(A1:A2)",
+    "#N/A",
+    None,
+]
+
+
+def compose(mode, parser="lxml", workbook_kwargs=None):
+    workbook = Workbook(styles=styles, parser=parser, mode=mode, workbook_kwargs=workbook_kwargs)
+    workbook.add_sheet_from_template(template, data=dict(values=values), sheet_name="values")
+    workbook.add_sheet_from_template("<table></table>", sheet_name="empty")
+
+    buffer = io.BytesIO()
+    workbook.compose(buffer)
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer)
+
+
+def canonical(xml):
+    return etree.tostring(etree.fromstring(xml), method="c14n")
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+@pytest.mark.parametrize("workbook_kwargs", [None, dict(iso_dates=True)])
+def test_native_matches_streaming(parser, workbook_kwargs):
+    expected = compose("streaming", parser, workbook_kwargs)
+    result = compose("native", parser, workbook_kwargs)
+
+    assert result.namelist() == expected.namelist()
+    for name in result.namelist():
+        if name == "docProps/core.xml":
+            continue
+        assert canonical(result.read(name)) == canonical(expected.read(name)), name
+
+
+def test_native_rejects_time_zones():
+    workbook = Workbook(mode="native")
+    tz = datetime.timezone.utc
+    workbook.add_sheet_from_template(
+        "<table><tr><td>{{ value | cell }}</td></tr></table>",
+        data=dict(value=datetime.datetime(2020, 1, 1, tzinfo=tz)),
+    )
+
+    with pytest.raises(TypeError):
+        workbook.compose(io.BytesIO())
+
+
+@pytest.mark.parametrize(
+    "name, value",
+    [("WorksheetWriter", None), ("WriteOnlyWorksheet", type("OtherWorksheet", (), {}))],
+)
+def test_native_falls_back_to_streaming(monkeypatch, name, value):
+    """Without the openpyxl internals it relies on, sheets are written as in streaming mode."""
+    expected = compose("streaming")
+
+    def write_row(*args, **kwargs):
+        raise AssertionError("A row was written natively.")
+
+    monkeypatch.setattr(native, name, value)
+    monkeypatch.setattr(native.NativeSheet, "write_row", write_row)
+    result = compose("native")
+
+    assert result.namelist() == expected.namelist()
+    for name in result.namelist():
+        if name == "docProps/core.xml":
+            continue
+        assert canonical(result.read(name)) == canonical(expected.read(name)), name
@@ -0,0 +1,198 @@
+import glob
+import io
+import pickle
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+import pytest
+
+from htmxl.compose import parallel, Workbook
+
+template = """
+<datalist id="statuses">
+  <option value="open" />
+  <option value="closed" />
+</datalist>
+<table>
+  <tr><th colspan="3" class="bold shaded" style="text-align: center">{{ title }}</th></tr>
+  {% for row in rows %}
+  <tr>
+    <td class="bold" style="width: 20ch">{{ row }}</td>
+    <td class="money" data-type="float" style="height: 30px">{{ row * 1.5 }}</td>
+    <td><input list="statuses" value="open" /></td>
+  </tr>
+  {% endfor %}
+</table>
+"""
+styles = [
+    {"name": "regular", "font": {"name": "Arial", "size": 10}},
+    {"name": "bold", "font": {"name": "Arial", "size": 10, "bold": True}},
+    {"name": "text", "number_format": "@"},
+    {"name": "red-font", "font": {"color": "FFFF0000"}},
+    {"name": "shaded", "pattern_fill": {"fill_type": "solid", "fgColor": "DDDDDD"}},
+    {"name": "money", "number_format": "$#,##0.00"},
+]
+
+# The `pre` fixtures are excluded, being of an as yet unsupported tag.
+template_files = [
+    path
+    for path in sorted(glob.glob("tests/fixtures/templates/**/*.jinja2", recursive=True))
+    if "/pre/" not in path
+]
+
+
+def compose(workers, template_files=(), parser="lxml", report=False, **kwargs):
+    workbook = Workbook(styles=styles, parser=parser, **kwargs)
+    for i in range(3):
+        workbook.add_sheet_from_template(
+            template, data={"title": f"Sheet {i}", "rows": range(i * 5)}, sheet_name=f"s{i}"
+        )
+    for i, template_file in enumerate(template_files):
+        workbook.add_sheet_from_template_file(template_file, sheet_name=f"t{i}")
+
+    fileobj = io.BytesIO()
+    report = workbook.compose(fileobj, workers=workers, report=report)
+    fileobj.seek(0)
+    return openpyxl.load_workbook(fileobj), report
+
+
+def describe(wb):
+    sheets = []
+    for sheet in wb.worksheets:
+        cells = [
+            (
+                cell.coordinate,
+                cell.value,
+                cell.style,
+                repr(cell.font),
+                repr(cell.fill),
+                repr(cell.border),
+                repr(cell.alignment),
+                cell.number_format,
+            )
+            for row in sheet.iter_rows()
+            for cell in row
+        ]
+        sheets.append(
+            (
+                sheet.title,
+                cells,
+                sorted(str(ref) for ref in sheet.merged_cells.ranges),
+                {letter: dim.width for letter, dim in sheet.column_dimensions.items()},
+                {row: dim.height for row, dim in sheet.row_dimensions.items()},
+                [(v.sqref, v.formula1) for v in sheet.data_validations.dataValidation],
+            )
+        )
+    return sheets
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_parallel_matches_sequential(parser):
+    sequential, _ = compose(None, template_files, parser=parser)
+    parallel, _ = compose(2, template_files, parser=parser)
+
+    assert parallel.sheetnames == sequential.sheetnames
+    assert parallel.named_styles == sequential.named_styles
+    assert describe(parallel) == describe(sequential)
+
+
+def test_parallel_report():
+    _, report = compose(2, report=True)
+
+    assert [sheet.name for sheet in report.sheets] == ["s0", "s1", "s2"]
+    for sheet in report.sheets:
+        assert set(sheet.phases) == {"render", "parse", "write", "apply"}
+    assert report.sheets[2].cell_count > report.sheets[1].cell_count
+    assert report.named_styles == compose(None, report=True)[1].named_styles
+
+
+def test_parallel_compiled_template():
+    """Sheets given only a compiled template are written in this process."""
+    workbook = Workbook(styles=styles)
+    workbook.add_sheet_from_template(template, data={"title": "a", "rows": [1]})
+    sheet = workbook.add_sheet_from_template(template, data={"title": "b", "rows": [2]})
+    sheet.template_source = None
+
+    workbook.write(workers=2)
+    assert [ws["A1"].value for ws in workbook.wb.worksheets] == ["a", "b"]
+
+
+def test_parallel_streaming():
+    workbook = Workbook(mode="streaming")
+    workbook.add_sheet_from_template(template)
+    with pytest.raises(ValueError) as e:
+        workbook.write(workers=2)
+
+    assert "streaming" in str(e.value)
+
+
+rows_template = """
+<datalist id="statuses"><option value="open" /><option value="closed" /></datalist>
+<table style="vertical-align: top">
+  <thead><tr><th colspan="3" class="bold">Header</th><th>Notes</th></tr></thead>
+  <tbody data-parallel="true" class="regular">
+    {% for row in rows %}
+    <tr{% if loop.index is even %} class="shaded"{% endif %}>
+      {% if row % 10 == 0 %}
+      <th rowspan="2" class="bold shaded">{{ row }}</th>
+      {% else %}
+      <td class="bold" style="width: 20ch">{{ row }}</td>
+      {% endif %}
+      <td class="money" data-type="float" style="text-align: right">{{ row * 1.5 }}</td>
+      <td style="height: 30px"><input list="statuses" value="open" /></td>
+      <td class="{{ 'red-font' if row % 3 else 'bold' }} text">{{ row }}<br/>note</td>
+    </tr>
+    {% endfor %}
+    {% if trailer %}<div>{{ trailer }}</div><tr><td>last</td></tr>{% endif %}
+  </tbody>
+</table>
+<div>after</div>
+"""
+
+
+def compose_rows(workers, parser, rows, trailer=None):
+    workbook = Workbook(styles=styles, parser=parser)
+    data = {"rows": range(rows), "trailer": trailer}
+    workbook.add_sheet_from_template(rows_template, data=data, sheet_name="rows")
+
+    fileobj = io.BytesIO()
+    workbook.compose(fileobj, workers=workers)
+    with zipfile.ZipFile(fileobj) as archive:
+        # Other than its timestamps, the workbook is identical.
+        return {
+            name: archive.read(name) for name in archive.namelist() if name != "docProps/core.xml"
+        }
+
+
+@pytest.mark.parametrize("trailer", [None, "trailer"])
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_parallel_rows_identical(monkeypatch, parser, trailer):
+    monkeypatch.setattr(parallel, "min_chunk_size", 7)
+
+    sequential = compose_rows(None, parser, 60, trailer=trailer)
+    assert compose_rows(3, parser, 60, trailer=trailer) == sequential
+
+
+def test_parallel_rows_chunked(monkeypatch):
+    monkeypatch.setattr(parallel, "min_chunk_size", 7)
+
+    submitted = []
+
+    class Executor(ThreadPoolExecutor):
+        """Count the rows of each chunk, copying each job as though it were sent to a process."""
+
+        def submit(self, fn, job):
+            submitted.append(len(job.rows))
+            return super().submit(fn, pickle.loads(pickle.dumps(job)))
+
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", Executor)
+
+    sequential = compose_rows(None, "lxml", 30)
+    assert compose_rows(2, "lxml", 30) == sequential
+    assert submitted == [7, 7, 7, 7, 2]
+
+    # Too few rows to be worth chunking are written in this process.
+    submitted.clear()
+    compose_rows(2, "lxml", 6)
+    assert submitted == []
@@ -0,0 +1,158 @@
+import glob
+import io
+
+import jinja2
+import openpyxl
+import pytest
+
+from htmxl.compose import TemplateCache, Workbook
+
+styles = [
+    {"name": "bold", "font": {"name": "Arial", "size": 10, "bold": True}},
+    {"name": "text", "number_format": "@"},
+    {"name": "red-font", "font": {"color": "FFFF0000"}},
+    {"name": "odd", "pattern_fill": {"patternType": "solid", "fgColor": "FBEAFB"}},
+    {"name": "even", "pattern_fill": {"patternType": "solid", "fgColor": "DFE7F8"}},
+]
+
+data = dict(
+    title="Hello World",
+    name="Bob",
+    column_names=["A", "B"],
+    rows=[{"a": str(i), "b": i, "flag": i % 3 == 0} for i in range(20)],
+    xs=[1, 2, 3],
+    flag=True,
+    entities=["AT&T", "a<b", "&amp;", "\"quoted\" & 'single'"],
+)
+
+control_template = """
+<head><title>{{ title }}</title></head>
+<body>
+  <div>Hello {{ name }}, {{ rows | length }} rows</div>
+  <table data-autofilter="true">
+    <thead>
+      <tr>
+        {% for column_name in column_names %}
+          <th class="bold" style="width: 20ch">{{ column_name }}</th>
+        {% endfor %}
+        <th colspan="2">Both</th>
+      </tr>
+    </thead>
+    <tbody>
+      {% for row in rows %}
+        <tr class="{{ loop.cycle('odd', 'even') }}">
+          <td data-type="int">{{ loop.index }}</td>
+          <td class="{{ 'bold' if row.flag }} text">{{ row.a }}</td>
+          {% if row.flag %}
+            <td>flagged</td>
+          {% elif row.b > 10 %}
+            <td>{{ row["b"] * 2 }}</td>
+          {% else %}
+            <td></td>
+          {% endif %}
+        </tr>
+      {% endfor %}
+    </tbody>
+  </table>
+  {% for name, value in [("x", 1), ("y", 2)] %}
+    <span>{{ name }}</span><span>{{ value }}</span><br />
+  {% endfor %}
+</body>
+"""
+
+entity_template = """
+<table>
+  {% for entity in entities %}
+    <tr><td>{{ entity | e }}</td><td>&lt;{{ entity | e }}&gt; &amp; more</td></tr>
+  {% endfor %}
+</table>
+"""
+
+template_files = [
+    path
+    for path in sorted(glob.glob("tests/fixtures/templates/tags/*/*.jinja2"))
+    if "/pre/" not in path
+]
+template_files.append("tests/test_performance.jinja2")
+templates = [open(path).read() for path in template_files] + [control_template, entity_template]
+template_ids = template_files + ["control_template", "entity_template"]
+
+
+def compose(template, parser, layout_plans, template_cache=None):
+    workbook = Workbook(
+        parser=parser, styles=styles, layout_plans=layout_plans, template_cache=template_cache
+    )
+    workbook.add_sheet_from_template(template=template, data=data, sheet_name="sheet")
+
+    buffer = io.BytesIO()
+    workbook.compose(buffer)
+    buffer.seek(0)
+    return openpyxl.load_workbook(buffer).worksheets[0]
+
+
+def describe(sheet):
+    return dict(
+        title=sheet.title,
+        cells=[[(c.value, c.style, c.fill.fgColor.rgb) for c in row] for row in sheet.rows],
+        merges=sorted(str(r) for r in sheet.merged_cells.ranges),
+        widths={k: v.width for k, v in sheet.column_dimensions.items()},
+        auto_filter=sheet.auto_filter.ref,
+    )
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+@pytest.mark.parametrize("template", templates, ids=template_ids)
+def test_plan_matches_rendered(template, parser):
+    expected = describe(compose(template, parser, layout_plans=False))
+    result = describe(compose(template, parser, layout_plans=True))
+    assert result == expected
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_plan_skips_rendering(parser, monkeypatch):
+    cache = TemplateCache()
+    compose(control_template, parser, layout_plans=True, template_cache=cache)
+
+    def fail_render(*args, **kwargs):
+        raise AssertionError("The template should not be rendered.")
+
+    monkeypatch.setattr(jinja2.Template, "render", fail_render)
+    monkeypatch.setattr(jinja2.Template, "generate", fail_render)
+    compose(control_template, parser, layout_plans=True, template_cache=cache)
+
+
+fallback_templates = [
+    "<div>{% for x in xs %}{{ x }} {% endfor %}</div>",
+    "<div>a {% if flag %}b{% endif %} c</div>",
+    "<div>{% if flag %}b{% endif %}</div>",
+    "<table>{% for x in xs %}<tr><td>{{ loop.changed(x) }}</td></tr>{% endfor %}</table>",
+    "<table>{% for x in xs %}<tr><td>{{ loop.previtem }}</td></tr>{% endfor %}</table>",
+    "<table>{% for x in xs %}<tr><td>{{ loop.depth }}</td></tr>{% endfor %}</table>",
+]
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+@pytest.mark.parametrize("template", fallback_templates)
+def test_fallback_matches_rendered(template, parser):
+    expected = describe(compose(template, parser, layout_plans=False))
+    result = describe(compose(template, parser, layout_plans=True))
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "template",
+    fallback_templates
+    + [
+        "{% set x = 1 %}<div>{{ x }}</div>",
+        "<div {% if flag %}class='bold'{% endif %}>a</div>",
+        "{% if flag %}<div>{% else %}<span>{% endif %}a</div>",
+        "<table><tr><td>{% for x in xs %}{{ x }}{% endfor %}</td></tr></table>",
+    ],
+)
+def test_unsupported_templates_fall_back(template):
+    cache = TemplateCache()
+    workbook = Workbook(parser="lxml", layout_plans=True, template_cache=cache)
+    worksheet = workbook.add_sheet_from_template(template, data={"flag": True, "xs": [1]})
+    assert worksheet.plan is None
+
+    workbook.compose(io.BytesIO())
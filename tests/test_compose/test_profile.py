@@ -0,0 +1,52 @@
+import itertools
+
+from htmxl.compose import Profiler, Workbook
+
+template = """
+<div>Title</div>
+<table>
+  <tr><th>A</th><th>B</th></tr>
+  {% for row in rows %}
+  <tr><td>{{ row }}</td><td><div><div>{{ row }}</div></div></td></tr>
+  {% endfor %}
+</table>
+"""
+
+
+def test_profile_handlers():
+    # Every call to the clock advances it by one, such that the time spent in a handler
+    # is determined by the number of handlers called within it.
+    clock = itertools.count()
+    profiler = Profiler(clock=lambda: next(clock))
+
+    workbook = Workbook(parser="beautifulsoup")
+    workbook.profiler = profiler
+    worksheet = workbook.add_sheet_from_template(template, data={"rows": [1, 2, 3]})
+    worksheet.write()
+
+    stats = profiler.stats
+    assert stats["tr"].calls == 4
+    assert stats["th"].calls == 2
+    assert stats["td"].calls == 6
+    assert stats["div"].calls == 7
+
+    assert stats["th"].cells == 2
+    assert stats["td"].cells == 6
+    assert stats["table"].cells == 0
+
+    # The time spent outside of any children partitions the total time spent.
+    assert sum(s.own_time for s in stats.values()) == stats["body"].cumulative_time
+
+    # Nested elements of the same tag aren't counted twice: the title's <div> spans 3 ticks
+    # (itself and its string), and each outer <div> within a <td> spans 5.
+    assert stats["div"].cumulative_time == 3 + 3 * 5
+
+    assert profiler.report().splitlines()[1].split()[0] == "body"
+
+
+def test_profile_disabled_by_default():
+    workbook = Workbook()
+    worksheet = workbook.add_sheet_from_template(template, data={"rows": [1]})
+    assert workbook.profiler is None
+    assert not hasattr(worksheet.writer.write_cell, "__wrapped__")
+    assert worksheet.writer._element_handlers["td"].__name__ == "write_td"
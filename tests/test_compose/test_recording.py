@@ -0,0 +1,54 @@
+import pytest
+
+from htmxl.compose import Workbook
+
+
+def write(template):
+    workbook = Workbook()
+    worksheet = workbook.add_sheet_from_template(template)
+    worksheet.write()
+    return worksheet
+
+
+def test_nested_recordings_fold_into_parents():
+    worksheet = write("")
+
+    with worksheet.writer.record() as outer:
+        worksheet.writer.move_to(col=3, row=5)
+        with worksheet.writer.record() as inner:
+            worksheet.writer.write_cell("x", worksheet.styler)
+            worksheet.writer.move_right()
+            worksheet.writer.write_cell("y", worksheet.styler)
+
+        worksheet.writer.move_to(col=2, row=7)
+        worksheet.writer.write_cell("z", worksheet.styler)
+
+    assert inner.bounding_ref == "C5:D5"
+    assert outer.bounding_ref == "B5:D7"
+    assert len(outer) == 3
+
+
+def test_merged_range_excludes_preceding_cells():
+    worksheet = write("<div>a</div><table><tr><td>b</td><th colspan=2>c</th></tr></table>")
+    assert [str(ref) for ref in worksheet.worksheet.merged_cells.ranges] == ["B2:C2"]
+
+
+def test_cells_retained_only_for_styled_elements():
+    worksheet = write("")
+    writer = worksheet.writer
+
+    with writer.record() as recording:
+        writer.write_cell("x", worksheet.styler)
+
+    with pytest.raises(RuntimeError):
+        recording.cells
+
+    writer.open_scope(None, {"text-align": "center"})
+    with writer.record() as recording:
+        writer.write_cell("x", worksheet.styler)
+        writer.move_down()
+        writer.write_cell("y", worksheet.styler)
+    writer.close_scope({"text-align": "center"})
+
+    assert recording.cells == [(1, 1), (2, 1)]
+    assert writer._cell_log is None
@@ -0,0 +1,84 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from htmxl.compose import Workbook
+
+template = """
+<table>
+  <tr><th colspan="2">Header</th></tr>
+  {% for row in rows %}
+  <tr><td class="bold">{{ row }}</td><td>{{ row }}</td></tr>
+  {% endfor %}
+</table>
+"""
+styles = [{"name": "bold", "font": {"bold": True}}]
+
+
+def compose(**kwargs):
+    workbook = Workbook(styles=styles, **kwargs)
+    workbook.add_sheet_from_template(template, data={"rows": range(10)}, sheet_name="first")
+    workbook.add_sheet_from_template(template, data={"rows": range(20)}, sheet_name="second")
+    return workbook.compose(io.BytesIO(), report=True)
+
+
+def test_compose_report():
+    report = compose()
+
+    assert set(report.phases) == {"write", "save"}
+    assert [sheet.name for sheet in report.sheets] == ["first", "second"]
+
+    first, second = report.sheets
+    assert set(first.phases) == {"render", "parse", "write"}
+    assert first.cell_count >= 2 + 10 * 2
+    assert second.cell_count > first.cell_count
+    assert first.merged_ranges == 1
+    assert first.node_count > 10 * 3
+    assert first.html_size < second.html_size
+    assert report.named_styles == 2
+
+    for phases in [report.phases, first.phases, second.phases]:
+        for phase in phases.values():
+            assert phase.wall_time > 0
+            assert phase.peak_memory > 0
+
+    # Writing the workbook includes writing each of the sheets.
+    assert report.phases["write"].peak_memory >= first.phases["write"].peak_memory
+    assert report.phases["write"].wall_time >= first.phases["write"].wall_time
+
+    json.dumps(report.as_dict())
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize(
+    "kwargs, html",
+    [(dict(incremental=True, parser="lxml"), True), (dict(layout_plans=True), False)],
+)
+def test_compose_report_combined_phases(kwargs, html):
+    report = compose(**kwargs)
+
+    first, _ = report.sheets
+    assert set(first.phases) == {"write"}
+    assert first.cell_count >= 2 + 10 * 2
+    assert (first.html_size is not None) is html
+
+
+def test_compose_report_detaches_profiler():
+    workbook = Workbook(styles=styles, profile=True)
+    worksheet = workbook.add_sheet_from_template(template, data={"rows": range(10)})
+    handlers = worksheet.writer._element_handlers
+    write_cell = worksheet.writer.write_cell
+
+    report = workbook.compose(io.BytesIO(), report=True)
+    assert report.sheets[0].cell_count >= 2 + 10 * 2
+    assert worksheet.writer._element_handlers is handlers
+    assert worksheet.writer.write_cell is write_cell
+    assert workbook.profiler.stats["td"].calls == 10 * 2
+
+
+def test_no_report_by_default():
+    workbook = Workbook(styles=styles)
+    workbook.add_sheet_from_template(template, data={"rows": range(1)})
+    assert workbook.compose(io.BytesIO()) is None
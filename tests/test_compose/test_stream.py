@@ -0,0 +1,105 @@
+import io
+import threading
+
+import openpyxl
+import pytest
+
+from htmxl.compose import Workbook
+
+template = """
+<table>
+  {% for row in rows %}
+    <tr><td>{{ row }}</td><td style="text-align: center">{{ row * 2 }}</td></tr>
+  {% endfor %}
+</table>
+"""
+
+rows = list(range(2000))
+
+
+def new_workbook(**kwargs):
+    workbook = Workbook(**kwargs)
+    workbook.add_sheet_from_template(template, data=dict(rows=rows), sheet_name="rows")
+    workbook.add_sheet_from_template("<table></table>", sheet_name="empty")
+    return workbook
+
+
+def load(chunks):
+    return openpyxl.load_workbook(io.BytesIO(b"".join(chunks)))
+
+
+def values(wb):
+    return [[cell.value for cell in row] for row in wb["rows"].rows]
+
+
+@pytest.mark.parametrize("mode", ["default", "streaming", "native"])
+def test_iter_bytes(mode):
+    expected = io.BytesIO()
+    new_workbook(mode=mode).compose(expected)
+    expected.seek(0)
+
+    chunks = list(new_workbook(mode=mode).iter_bytes(chunk_size=1024))
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 1024 for chunk in chunks[:-1])
+
+    result = load(chunks)
+    assert result.sheetnames == ["rows", "empty"]
+    assert values(result) == values(openpyxl.load_workbook(expected))
+
+
+def test_iter_bytes_xlsxwriter():
+    pytest.importorskip("xlsxwriter")
+    result = load(new_workbook(engine="xlsxwriter").iter_bytes(chunk_size=1024))
+    assert values(result) == [[str(row), str(row * 2)] for row in rows]
+
+
+def test_iter_bytes_closed_early():
+    chunks = new_workbook().iter_bytes(chunk_size=1024)
+    next(chunks)
+    chunks.close()
+
+    assert not any(thread.name == "htmxl-save" for thread in threading.enumerate())
+
+
+def test_iter_bytes_error():
+    workbook = new_workbook()
+
+    def save(file_path):
+        file_path.write(b"PK")
+        raise RuntimeError("Disk full")
+
+    workbook.backend.save = save
+    with pytest.raises(RuntimeError) as e:
+        list(workbook.iter_bytes())
+
+    assert "Disk full" in str(e.value)
+
+
+def test_compose_to_stream():
+    class Sink:
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, chunk):
+            self.chunks.append(chunk)
+
+    sink = Sink()
+    report = new_workbook().compose_to_stream(sink, chunk_size=1024, report=True)
+    assert set(report.phases) == {"write", "save"}
+    assert values(load(sink.chunks))[0] == ["0", "0"]
+
+    chunks = []
+    new_workbook().compose_to_stream(chunks.append)
+    assert len(chunks) == 1
+    assert values(load(chunks))[-1] == ["1999", "3998"]
+
+
+def test_compose_to_stream_xlsxwriter():
+    pytest.importorskip("xlsxwriter")
+    chunks = []
+    new_workbook(engine="xlsxwriter").compose_to_stream(chunks.append, chunk_size=1024)
+    assert len(chunks) > 1
+
+    result = load(chunks)
+    assert result.sheetnames == ["rows", "empty"]
+    assert values(result) == [[str(row), str(row * 2)] for row in rows]
@@ -0,0 +1,79 @@
+import io
+
+import openpyxl
+import pytest
+
+from htmxl.compose import Workbook
+from htmxl.compose.write.streaming import StreamingSheet
+
+template = """
+<body>
+  <datalist id="options">
+    <option value="yes" />
+    <option value="no" />
+  </datalist>
+  <table data-autofilter="true">
+    <thead>
+      <tr>
+        <th colspan="2">Name</th>
+        <th>Ok</th>
+      </tr>
+    </thead>
+    <tbody>
+      {% for row in rows %}
+        <tr>
+          <td>{{ row.a }}</td>
+          <td>{{ row.b }}</td>
+          <input list="options" value="yes" />
+        </tr>
+      {% endfor %}
+    </tbody>
+  </table>
+</body>
+"""
+
+
+def compose(mode, parser, row_count):
+    workbook = Workbook(parser=parser, mode=mode)
+    workbook.add_sheet_from_template(
+        template=template, data=dict(rows=[{"a": str(i), "b": i} for i in range(row_count)])
+    )
+
+    buffer = io.BytesIO()
+    workbook.compose(buffer)
+    buffer.seek(0)
+    return openpyxl.load_workbook(buffer).worksheets[0]
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_streaming_matches_default(parser):
+    expected = compose("default", parser, 10)
+    result = compose("streaming", parser, 10)
+
+    assert [[c.value for c in row] for row in result.rows] == [
+        [c.value for c in row] for row in expected.rows
+    ]
+    assert result.merged_cells.ranges == expected.merged_cells.ranges
+    assert result.auto_filter.ref == expected.auto_filter.ref
+    assert [str(dv.sqref) for dv in result.data_validations.dataValidation] == [
+        str(dv.sqref) for dv in expected.data_validations.dataValidation
+    ]
+
+
+def test_streaming_buffers_bounded_rows(monkeypatch):
+    buffered_row_counts = []
+    flush = StreamingSheet.flush
+
+    def record_flush(self, row=None):
+        buffered_row_counts.append(len(self._rows))
+        flush(self, row)
+
+    monkeypatch.setattr(StreamingSheet, "flush", record_flush)
+    compose("streaming", "lxml", 500)
+
+    assert max(buffered_row_counts) <= 3
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        Workbook(mode="invalid")
@@ -0,0 +1,109 @@
+import io
+
+import openpyxl
+import pytest
+
+from htmxl.compose import Styler, Workbook
+from htmxl.compose.style import empty_inline_style
+from htmxl.token import Bs4Stream
+
+styles = [
+    {"name": "bold", "font": {"bold": True}},
+    {"name": "red", "font": {"color": "FF0000"}},
+    {"name": "unused", "font": {"italic": True}},
+]
+
+
+def test_styles_registered_on_first_use():
+    wb = openpyxl.Workbook()
+    styler = Styler(wb, styles)
+    assert "bold" not in wb.named_styles
+
+    cell = wb.active.cell(row=1, column=1)
+    styler.apply_style(cell, ["bold", "red"])
+
+    assert cell.style == "bold_red"
+    assert cell.font.bold
+    assert cell.font.color.rgb == "00FF0000"
+    assert "bold_red" in wb.named_styles
+    assert "unused" not in wb.named_styles
+
+
+def test_style_resolved_once_per_class_combination(monkeypatch):
+    wb = openpyxl.Workbook()
+    styler = Styler(wb, styles)
+
+    calls = []
+    calculate_style = styler.calculate_style
+    monkeypatch.setattr(styler, "calculate_style", lambda s: calls.append(s) or calculate_style(s))
+
+    for row in range(1, 5):
+        styler.apply_style(wb.active.cell(row=row, column=1), ["bold"])
+        styler.apply_style(wb.active.cell(row=row, column=2), ["bold", "red"])
+
+    assert calls == [["bold"], ["bold", "red"]]
+    assert [cell.style for cell in wb.active["A"]] == ["bold"] * 4
+    assert [cell.style for cell in wb.active["B"]] == ["bold_red"] * 4
+
+
+def test_builtin_and_unknown_styles():
+    wb = openpyxl.Workbook()
+    styler = Styler(wb)
+
+    cell = wb.active.cell(row=1, column=1)
+    styler.apply_style(cell, ["Good"])
+    assert cell.style == "Good"
+
+    with pytest.raises(ValueError):
+        styler.apply_style(cell, ["missing"])
+
+
+def test_duplicate_style_names_rejected():
+    with pytest.raises(ValueError):
+        Workbook(styles=[styles[0], styles[0]])
+
+
+@pytest.mark.parametrize("mode", ["default", "streaming"])
+def test_inline_alignment(mode):
+    template = """
+    <table data-wrap-text="true">
+      <tr style="text-align: center"><td class="bold">1</td><td>2</td></tr>
+      <tr style="vertical-align: top"><td class="bold">3</td><td>4</td></tr>
+    </table>
+    """
+    workbook = Workbook(styles=styles, mode=mode)
+    workbook.add_sheet_from_template(template)
+
+    buffer = io.BytesIO()
+    workbook.compose(buffer)
+    sheet = openpyxl.load_workbook(buffer).active
+
+    alignments = [
+        [
+            (cell.alignment.horizontal, cell.alignment.vertical, cell.alignment.wrapText)
+            for cell in row
+        ]
+        for row in sheet.iter_rows()
+    ]
+    assert alignments == [
+        [("center", None, True), ("center", None, True)],
+        [(None, "top", True), (None, "top", True)],
+    ]
+    assert sheet["A1"].font.bold
+
+
+def test_inline_styles_shared_between_identical_elements():
+    styler = Styler(openpyxl.Workbook())
+    parse = Bs4Stream.parse_str(
+        '<td style="width: 10ch;text-align: center" data-type="int" class="a">1</td>'
+        '<td style="width: 10ch;text-align: center" data-type="int" class="b">2</td>'
+        '<td class="a">3</td>'
+    )
+    first, second, unstyled = (styler.get_inline_style(td) for td in parse.content())
+
+    assert first == {"data-type": "int", "width": 10, "text-align": "center"}
+    assert first is second
+    assert unstyled is empty_inline_style
+
+    with pytest.raises(TypeError):
+        first["width"] = 20
@@ -0,0 +1,64 @@
+import os
+import time
+
+from htmxl.compose import Workbook
+from htmxl.compose.template import TemplateCache
+
+
+def test_from_string_cached_by_content():
+    cache = TemplateCache()
+    template = cache.from_string("<div>{{ name }}</div>")
+
+    assert cache.from_string("<div>{{ name }}</div>") is template
+    assert cache.from_string("<span>{{ name }}</span>") is not template
+    assert template.render(name="foo") == "<div>foo</div>"
+
+
+def test_from_string_evicts_least_recently_used():
+    cache = TemplateCache(max_size=2)
+    first = cache.from_string("first")
+    cache.from_string("second")
+    cache.from_string("first")
+    cache.from_string("third")
+
+    assert len(cache) == 2
+    assert cache.from_string("first") is first
+
+
+def test_from_file_reloads_on_change(tmp_path):
+    path = tmp_path / "template.html.jinja2"
+    path.write_text("<div>one</div>")
+
+    cache = TemplateCache()
+    template = cache.from_file(str(path))
+    assert cache.from_file(str(path)) is template
+    assert template.render() == "<div>one</div>"
+
+    path.write_text("<div>two</div>")
+    mtime = time.time() + 10
+    os.utime(str(path), (mtime, mtime))
+
+    assert cache.from_file(str(path)).render() == "<div>two</div>"
+
+
+def test_bytecode_cache_shared_between_caches(tmp_path, monkeypatch):
+    source = "<div>{{ name }}</div>"
+    TemplateCache(bytecode_cache_dir=str(tmp_path)).from_string(source)
+    assert os.listdir(str(tmp_path))
+
+    cache = TemplateCache(bytecode_cache_dir=str(tmp_path))
+
+    def fail_compile(*args, **kwargs):
+        raise AssertionError("The template should have been loaded from the bytecode cache.")
+
+    monkeypatch.setattr(cache.environment, "compile", fail_compile)
+    assert cache.from_string(source).render(name="foo") == "<div>foo</div>"
+
+
+def test_workbook_uses_template_cache():
+    cache = TemplateCache()
+    template = "<div>{{ name }}</div>"
+
+    first = Workbook(template_cache=cache).add_sheet_from_template(template, data={"name": "a"})
+    second = Workbook(template_cache=cache).add_sheet_from_template(template, data={"name": "b"})
+    assert first.template is second.template
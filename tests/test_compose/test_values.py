@@ -0,0 +1,138 @@
+import datetime
+import io
+from decimal import Decimal
+
+import openpyxl
+import pytest
+
+from htmxl.compose import parallel, Workbook
+from htmxl.compose.template import TemplateCache
+from htmxl.compose.values import CellValues
+from htmxl.token import DetachedStream, get_parser
+
+template = """
+<table>
+  <tbody{% if parallel %} data-parallel="true"{% endif %}>
+    {% for row in rows %}
+    <tr>
+      <th>{{ row.name | cell }}</th>
+      <td>{{ row.date | cell }}</td>
+      <td>{{ row.amount | cell }}</td>
+      <td>{{ row.flag | cell }}</td>
+      <td>{{ row.missing | default(None) | cell }}</td>
+      <td>#{{ row.amount | cell }}</td>
+    </tr>
+    {% endfor %}
+  </tbody>
+</table>
+<div>{{ total | cell }}</div>
+"""
+
+
+def rows(count=3):
+    return [
+        dict(
+            name=f"row {i}",
+            date=datetime.date(2020, 1, i + 1),
+            amount=Decimal("1.5") * i,
+            flag=i % 2 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+def expected_values(count=3):
+    return [
+        (row["name"], datetime.datetime(2020, 1, i + 1), float(row["amount"]), row["flag"], None)
+        + (f"#{row['amount']}",)
+        for i, row in enumerate(rows(count))
+    ] + [(12, None, None, None, None, None)]
+
+
+def compose(parser="lxml", workers=None, count=3, **kwargs):
+    workbook = Workbook(parser=parser, **kwargs)
+    data = dict(rows=rows(count), total=12, parallel=workers is not None)
+    workbook.add_sheet_from_template(template, data=data)
+
+    fileobj = io.BytesIO()
+    workbook.compose(fileobj, workers=workers)
+    fileobj.seek(0)
+    return list(openpyxl.load_workbook(fileobj).worksheets[0].values)
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+@pytest.mark.parametrize(
+    "options",
+    [{}, dict(mode="streaming"), dict(incremental=True), dict(layout_plans=True)],
+)
+def test_cell_values_written_natively(parser, options):
+    assert compose(parser, **options) == expected_values()
+
+
+def test_cell_values_parallel_rows(monkeypatch):
+    monkeypatch.setattr(parallel, "min_chunk_size", 7)
+    assert compose(workers=2, count=20) == expected_values(20)
+
+
+def test_cell_values_converted_by_data_type():
+    workbook = Workbook(parser="lxml")
+    workbook.add_sheet_from_template(
+        '<table><tr><td data-type="str">{{ 1.5 | cell }}</td>'
+        '<td data-type="int">{{ " 2 " | cell }}</td></tr></table>'
+    )
+
+    fileobj = io.BytesIO()
+    workbook.compose(fileobj)
+    fileobj.seek(0)
+    assert list(openpyxl.load_workbook(fileobj).worksheets[0].values) == [("1.5", 2)]
+
+
+@pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+def test_cell_values_outside_of_cells(parser):
+    workbook = Workbook(parser=parser)
+    workbook.add_sheet_from_template(
+        "<head><title>{{ name | cell }}</title></head>"
+        '<datalist id="amounts"><option value="{{ 1.5 | cell }}"></option>'
+        '<option value="#{{ 2 | cell }}"></option></datalist>'
+        '<input list="amounts" value="{{ 1.5 | cell }}" data-type="float"/>',
+        data=dict(name="Totals"),
+    )
+
+    fileobj = io.BytesIO()
+    workbook.compose(fileobj)
+    fileobj.seek(0)
+    worksheet = openpyxl.load_workbook(fileobj).worksheets[0]
+    assert worksheet.title == "Totals"
+    assert worksheet["A1"].value == 1.5
+    assert worksheet.data_validations.dataValidation[0].formula1 == '"1.5,#2"'
+
+
+def test_cell_values_kept_while_writing():
+    workbook = Workbook(parser="lxml")
+    worksheet = workbook.add_sheet_from_template("<div>{{ 1 | cell }}</div>")
+
+    workbook.compose(io.BytesIO())
+    assert worksheet.writer.cell_values is None
+
+
+def test_cell_filter_outside_of_a_sheet():
+    template = TemplateCache().from_string("<td>{{ value | cell }}</td>")
+    assert template.render(value=1.5) == "<td>1.5</td>"
+
+
+def test_cell_values_subset():
+    cell_values = CellValues()
+    first = cell_values.add("first")
+    cell_values.add("second")
+    third = cell_values.add("third")
+    fourth = cell_values.add("fourth")
+
+    tree = get_parser("lxml").parse_events(
+        f'<tr><td>{first}</td><td>{third}</td><td><input value="{fourth}"></td></tr>'
+    )
+    tokens = [DetachedStream.from_token(child) for child in tree.content()]
+
+    subset = cell_values.subset(tokens)
+    assert subset.values == {0: "first", 2: "third", 3: "fourth"}
+    assert subset.resolve(f" {third} ") == "third"
+    assert subset.resolve(f"{first}, {third}") == "first, third"
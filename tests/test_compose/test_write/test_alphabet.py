@@ -1,6 +1,6 @@
 import pytest
 
-from htmxl.alphabet import _Alphabet, _column_letters
+from htmxl.alphabet import _Alphabet, _column_letters, column_index, column_letter, MAX_COLUMNS
 
 
 @pytest.mark.this
@@ -47,3 +47,20 @@ def test_column_letter_factory():
 def test_letters_generated_on_overflow():
     alphabet = _Alphabet()
     assert alphabet[26] == "AA"
+
+
+def test_letters_cover_every_column():
+    alphabet = _Alphabet()
+    assert len(alphabet) == MAX_COLUMNS
+    assert alphabet[MAX_COLUMNS - 1] == "XFD"
+    assert alphabet.index("XFD") == MAX_COLUMNS - 1
+
+    with pytest.raises(IndexError):
+        alphabet[MAX_COLUMNS]
+
+
+def test_arithmetic_conversion_matches_table():
+    alphabet = _Alphabet()
+    for index, letters in enumerate(alphabet.letters):
+        assert column_letter(index) == letters
+        assert column_index(letters) == index
@@ -25,3 +25,9 @@ class TestTdStyleAppliedToNestedElements(WriteTd):
         {"name": "text", "number_format": "@"},
         {"name": "red-font", "font": {"color": "FFFF0000"}},
     ]
+
+
+class TestTdNestedElements(WriteTd):
+    template_file = "td_nested_elements.html.jinja2"
+    expected_result_file = "td_nested_elements.xlsx"
+    styles = [{"name": "bold", "font": {"name": "Arial", "size": 10, "bold": True}}]
@@ -1,37 +1,22 @@
-import io
-import time
+from htmxl.compose import Cell, Writer
 
-from htmxl.compose import Workbook
 
-data = dict(
-    title="Hello World",
-    name="Bob",
-    column_names=["A", "B"],
-    rows=[{"a": str(i), "b": int(i)} for i in range(10000)],
-)
+def test_cursor_movement(monkeypatch):
+    """Moving the cursor should not pay for producing cells (or their A1-style references)."""
+    moves = 1000
+    writer = Writer(sheet=None)
 
+    def produce_cell(*args, **kwargs):
+        raise AssertionError("A cell was produced by moving the cursor.")
 
-def test_large_dataset():
-    with open("tests/test_performance.jinja2") as f:
-        template = f.read()
+    with monkeypatch.context() as patch:
+        patch.setattr(Cell, "__init__", produce_cell)
+        for _ in range(moves):
+            writer.move_down()
+            writer.move_right()
+            writer.move_left()
+        writer.move_up()
+        writer.move_to(col=3, row=writer.row)
 
-    start = time.perf_counter()
-    workbook = Workbook(parser="beautifulsoup")
-    workbook.add_sheet_from_template(template=template, data=data)
-
-    buffer = io.BytesIO()
-    workbook.compose(buffer)
-    end = time.perf_counter()
-
-    bs4_duration = end - start
-
-    start = time.perf_counter()
-    workbook = Workbook(parser="lxml")
-    workbook.add_sheet_from_template(template=template, data=data)
-
-    buffer = io.BytesIO()
-    workbook.compose(buffer)
-    end = time.perf_counter()
-
-    lxml_duration = end - start
-    assert lxml_duration < bs4_duration
+    assert (writer.row, writer.col) == (moves, 3)
+    assert writer.current_cell.ref == f"C{moves}"
@@ -0,0 +1,170 @@
+import glob
+import pickle
+import random
+
+import jinja2
+import pytest
+
+from htmxl.token import Bs4Stream, BuiltinStream, DetachedStream, Events, LxmlStream
+
+with open("tests/test_performance.jinja2") as f:
+    template = jinja2.Environment(trim_blocks=True, lstrip_blocks=True).from_string(f.read())
+
+data = dict(
+    title="Hello World",
+    name="Bob",
+    column_names=["A", "B"],
+    rows=[{"a": str(i), "b": int(i)} for i in range(100)],
+)
+
+
+def flatten(token):
+    result = [(token.name, dict(token.attrs), token.classes, token.text)]
+    if token.name == "string":
+        return result
+
+    for child in token.content():
+        result.extend(flatten(child))
+    return result
+
+
+def find(token, name):
+    for child in token.content():
+        if child.name == name:
+            return child
+
+
+def test_lxml_incremental_tokens_match():
+    expected = flatten(LxmlStream.parse_str(template.render(data)))
+    result = flatten(LxmlStream.parse_iter(template.generate(data)))
+    assert result == expected
+
+
+def test_lxml_incremental_frees_consumed_nodes():
+    large_data = dict(data, rows=[{"a": str(i), "b": int(i)} for i in range(10000)])
+    root = LxmlStream.parse_iter(template.generate(large_data))
+    body = find(root, "body")
+    table = find(body, "table")
+    tbody = find(table, "tbody")
+
+    row_count = 0
+    max_retained_rows = 0
+    for row in tbody.content():
+        max_retained_rows = max(max_retained_rows, len(tbody.node))
+        row_count += 1
+
+    assert row_count == 10000
+    assert max_retained_rows < 2000
+    assert len(tbody.node) <= 1
+
+
+@pytest.mark.parametrize("parser", [Bs4Stream, LxmlStream])
+def test_event_tokens_match(parser):
+    rendered = template.render(data)
+    expected = flatten(parser.parse_str(rendered))
+    assert flatten(parser.parse_events(rendered)) == expected
+    assert flatten(Events.from_token(parser.parse_str(rendered)).root()) == expected
+
+
+@pytest.mark.parametrize("parser", [Bs4Stream, LxmlStream, BuiltinStream])
+def test_events_intern_attrs(parser):
+    large_data = dict(data, rows=[{"a": str(i), "b": int(i)} for i in range(1000)])
+    events = parser.parse_events(template.render(large_data)).node
+
+    assert len(events) > 4000
+    assert len(events.name_table) < 20
+    assert len(events.attr_table) < 20
+
+
+@pytest.mark.parametrize("parser", [Bs4Stream, LxmlStream, BuiltinStream])
+def test_detached_tokens_match(parser):
+    rendered = template.render(data)
+    detached = pickle.loads(pickle.dumps(DetachedStream.from_token(parser.parse_str(rendered))))
+    assert flatten(detached) == flatten(parser.parse_str(rendered))
+
+
+markup = [
+    '<div class="a  b" id=x disabled>t&amp;x<!-- c --><br>y<br/>z<p>q<p>r</div></span>w',
+    '<table><tr><td>1<td>2</tr></table><div/>after<input list="x" value="a&lt;b"/>k',
+    "<!DOCTYPE html><html><body><script>if (a<b) x</script>&nbsp;&#65;&unknown;</body></html>",
+    '<td class="">x</td><td class>y</td><DIV CLASS="Up">z</DIV><td class="a" class="b">dup</td>',
+    '<p>a<br>b</br>c<input x=1></input>d<img src="1"/>&amp</p>x &lt y <  z <3 &#x41;',
+    "<style>a < b &amp; </style><textarea>&amp;<b></textarea><title>&amp;<b></title>",
+    "<template><b>x</b>y</template><div>q<script>s</script>r</div>",
+    "<td style='width: 10ch' data-x=a=b  data-y = \"q\" >v</td><a rel='x y' href=/q>l</a>",
+    '<![CDATA[x<y]]><?xml version="1.0"?><!doctype html><!foo>t',
+    "  \n <div>\n  <span> a </span>\n</div>  <pre>  \n  </pre><textarea>   </textarea>",
+    "&#128;&#x80;&#129;&#0;&#xD800;&ampx;&amp;&AMP;&notit;&lt&gt;<th colspan=2>  5 </th>",
+    "<div>a</ >b</>c</3>d</ div>e</div x>f</ p x>g</p x='>'>h</div>",
+    '<tr><td class=c/>x</td></ ><td class=c />y<td x=a/b/>z<td "q" r/>w</tr>',
+    "<style>s</ style>t<template>u<![CDATA[v]]></template><div\x00>w",
+]
+fixtures = sorted(glob.glob("tests/fixtures/templates/**/*.jinja2", recursive=True))
+
+
+@pytest.mark.parametrize("source", markup + fixtures)
+def test_builtin_tokens_match_bs4(source):
+    if source in fixtures:
+        with open(source) as f:
+            source = jinja2.Template(f.read()).render(data)
+
+    assert flatten(BuiltinStream.parse_str(source)) == flatten(Bs4Stream.parse_str(source))
+
+
+def generate_markup(rand):
+    """Generate a random document, of (more or less) well-formed tags, text and markup."""
+    tags = ["div", "span", "td", "tr", "table", "p", "br", "input", "b", "th", "pre", "template"]
+    texts = ["x", " y ", "a&amp;b", "&lt;", "\n  ", "1 < 2", "q>r", "&nbsp;", "&foo", "'", "/"]
+    values = ['"a b"', '"x/y"', "'q r'", "c", "a/b", "c/", "1", ' = "v"']
+    malformed = ["</ >", "</3>", "</>", "< div>", "</div x>", "</ div>", "<a/b>", "<div<span>"]
+
+    pieces = []
+    for _ in range(rand.randint(1, 12)):
+        kind = rand.random()
+        if kind < 0.35:
+            pieces.append(rand.choice(texts))
+        elif kind < 0.55:
+            attrs = "".join(
+                f" {rand.choice(['class', 'id', 'rel', 'x'])}={rand.choice(values)}"
+                for _ in range(rand.randint(0, 3))
+            )
+            pieces.append(f"<{rand.choice(tags)}{attrs}{rand.choice(['', '/', ' /'])}>")
+        elif kind < 0.75:
+            pieces.append(f"</{rand.choice(tags)}>")
+        elif kind < 0.8:
+            raw = rand.choice(["style", "script"])
+            pieces.append(f"<{raw}>{rand.choice(texts)}{rand.choice(['', '<p>', '</ b>'])}</{raw}>")
+        elif kind < 0.85:
+            pieces.append(rand.choice(["<!-- c -->", "<!doctype html>", "<?x?>", "<![CDATA[<]]>"]))
+        else:
+            pieces.append(rand.choice(malformed))
+    return "".join(pieces)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_builtin_tokens_match_bs4_generated(seed):
+    rand = random.Random(seed)
+    for _ in range(100):
+        source = generate_markup(rand)
+        assert flatten(BuiltinStream.parse_str(source)) == flatten(
+            Bs4Stream.parse_str(source)
+        ), source
+
+
+@pytest.mark.parametrize("parser", [Bs4Stream, LxmlStream])
+def test_text_read_lazily(monkeypatch, parser):
+    read = []
+    read_text = parser.read_text
+    monkeypatch.setattr(
+        parser, "read_text", staticmethod(lambda node: read.append(node) or read_text(node))
+    )
+
+    def walk(token):
+        if token.name == "td":
+            assert token.text
+        elif token.name != "string":
+            for child in token.content():
+                walk(child)
+
+    walk(parser.parse_str(template.render(data)))
+    assert len(read) == 200
@@ -4,6 +4,7 @@ import os
 import openpyxl
 import pytest
 from openpyxl.cell.cell import MergedCell
+from openpyxl.utils import column_index_from_string
 
 from htmxl.compose import Workbook
 from htmxl.compose.cell import Cell
@@ -19,18 +20,22 @@ class WriteTests:
     def load_result(self):
         return openpyxl.load_workbook(os.path.join(self.fixture_dir, self.expected_result_file))
 
-    def load_source(self, parser):
+    def load_source(self, parser, mode=None, incremental=False, engine="openpyxl"):
         template_file = os.path.join(self.fixture_dir, self.template_file)
-        wb = Workbook(parser=parser, styles=self.styles)
+        wb = Workbook(
+            parser=parser, styles=self.styles, mode=mode, incremental=incremental, engine=engine
+        )
         wb.add_sheet_from_template_file(template_file)
         fileobj = BytesIO()
         wb.compose(fileobj)
         fileobj.seek(0)
         return openpyxl.load_workbook(fileobj)
 
-    @pytest.mark.parametrize("parser", ["beautifulsoup", "lxml"])
-    def test_equality(self, parser):
-        result = self.load_source(parser)
+    @pytest.mark.parametrize("incremental", [False, True])
+    @pytest.mark.parametrize("mode", ["default", "streaming", "native"])
+    @pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+    def test_equality(self, parser, mode, incremental):
+        result = self.load_source(parser, mode, incremental)
         expected_result = self.load_result()
 
         result_worksheet = list(result.worksheets[0].rows)
@@ -46,6 +51,26 @@ class WriteTests:
                 assert result_cell.style == expected_cell.style
                 self.compare_width(result, result_cell, expected_result, expected_cell)
 
+    @pytest.mark.parametrize("parser", ["beautifulsoup", "lxml", "builtin"])
+    def test_xlsxwriter_equality(self, parser):
+        pytest.importorskip("xlsxwriter")
+        result = self.load_source(parser, engine="xlsxwriter")
+        expected_result = self.load_result()
+
+        result_worksheet = list(result.worksheets[0].rows)
+        expected_worksheet = list(expected_result.worksheets[0].rows)
+
+        assert len(result_worksheet) == len(expected_worksheet)
+        for result_row, expected_row in zip(result_worksheet, expected_worksheet):
+            assert len(result_row) == len(expected_row)
+            for result_cell, expected_cell in zip(result_row, expected_row):
+                assert result_cell.value == expected_cell.value
+                # xlsxwriter has no named styles, so only the formatting of cells can be compared.
+                assert formatting(result_cell) == formatting(expected_cell)
+                self.compare_width(result, result_cell, expected_result, expected_cell)
+
+        assert result.worksheets[0].merged_cells == expected_result.worksheets[0].merged_cells
+
     def display(self, name, data):
         print(name)
         print("------")
@@ -60,16 +85,48 @@ class WriteTests:
 
     def compare_width(self, result, result_cell, expected_result, expected_cell):
         if isinstance(result_cell, MergedCell):
-            assert math.floor(
-                result.worksheets[0].column_dimensions[Cell(result_cell.coordinate).col_ref].width
-            ) == math.floor(
-                expected_result.worksheets[0]
-                .column_dimensions[Cell(expected_cell.coordinate).col_ref]
-                .width
-            )
+            result_column = Cell(result_cell.coordinate).col_ref
+            expected_column = Cell(expected_cell.coordinate).col_ref
         else:
-            assert math.floor(
-                result.worksheets[0].column_dimensions[result_cell.column_letter].width
-            ) == math.floor(
-                expected_result.worksheets[0].column_dimensions[expected_cell.column_letter].width
-            )
+            result_column = result_cell.column_letter
+            expected_column = expected_cell.column_letter
+
+        assert math.floor(column_width(result.worksheets[0], result_column)) == math.floor(
+            column_width(expected_result.worksheets[0], expected_column)
+        )
+
+
+def column_width(worksheet, column_letter):
+    """Return the width of a column, including those given by the dimension of a range of columns."""
+    column = column_index_from_string(column_letter)
+    for dimension in worksheet.column_dimensions.values():
+        if dimension.min and dimension.max and dimension.min <= column <= dimension.max:
+            return dimension.width
+    return worksheet.column_dimensions[column_letter].width
+
+
+def rgb(color):
+    if color is None or color.type != "rgb":
+        return None
+    return color.rgb[-6:]
+
+
+def formatting(cell):
+    """Return the formatting of `cell`, as it's displayed regardless of how it was written."""
+    font = cell.font
+    fill = cell.fill
+    border = cell.border
+    alignment = cell.alignment
+    fill_type = fill.fill_type if fill.fill_type != "none" else None
+    return (
+        (font.name or "Calibri", font.sz or 11),
+        (bool(font.b), bool(font.i), font.u, rgb(font.color)),
+        (fill_type, fill_type and rgb(fill.fgColor)),
+        tuple(
+            (side.style, rgb(side.color)) if side is not None and side.style else None
+            for side in [border.left, border.right, border.top, border.bottom]
+        ),
+        (alignment.horizontal, alignment.vertical, bool(alignment.wrap_text)),
+        cell.number_format,
+        (cell.protection.locked, cell.protection.hidden),
+    )